@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Application
+from .models import Application, ApplicationStatusChange
 
 
 @admin.register(Application)
@@ -23,3 +23,11 @@ class ApplicationAdmin(admin.ModelAdmin):
             'fields': ('applied_at', 'updated_at')
         }),
     )
+
+
+@admin.register(ApplicationStatusChange)
+class ApplicationStatusChangeAdmin(admin.ModelAdmin):
+    list_display = ['application', 'from_status', 'to_status', 'changed_by', 'created_at']
+    list_filter = ['to_status', 'created_at']
+    search_fields = ['application__applicant__email', 'application__job__title']
+    readonly_fields = ['application', 'from_status', 'to_status', 'changed_by', 'note', 'created_at']
@@ -6,3 +6,6 @@ class ApplicationsConfig(AppConfig):
     name = 'apps.applications'
     label = 'applications'
     verbose_name = 'Applications'
+    
+    def ready(self):
+        import apps.applications.signals  # noqa
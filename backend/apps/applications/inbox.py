@@ -0,0 +1,129 @@
+"""
+Employer applicant inbox.
+
+Applications received on a poster's jobs, newest first, paginated by keyset on
+(applied_at, id): a page is "the next N rows after the last one seen", so every
+page costs the same no matter how deep the employer scrolls. The same filters
+can be exported as CSV or NDJSON, streamed straight from a server-side cursor.
+"""
+import base64
+import csv
+import datetime
+import json
+import uuid
+
+from django.db.models import Q
+
+from .models import Application
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+EXPORT_CHUNK_SIZE = 1000
+
+# Spreadsheets run a cell starting with one of these as a formula
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+EXPORT_FIELDS = (
+    ('id', 'id'),
+    ('job_id', 'job_id'),
+    ('job_title', 'job_title'),
+    ('applicant_id', 'applicant_id'),
+    ('applicant_name', 'applicant__name'),
+    ('applicant_email', 'applicant__email'),
+    ('status', 'status'),
+    ('applied_at', 'applied_at'),
+    ('reviewed_at', 'reviewed_at'),
+    ('interview_scheduled_at', 'interview_scheduled_at'),
+    ('portfolio_url', 'portfolio_url'),
+)
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def inbox_queryset(user, status=None, job_id=None):
+    """Applications to the jobs of ``user``, newest first"""
+    queryset = Application.objects.filter(job__posted_by=user)
+    if status:
+        queryset = queryset.filter(status=status)
+    if job_id:
+        queryset = queryset.filter(job_id=job_id)
+    return queryset.order_by('-applied_at', '-id')
+
+
+def encode_cursor(application):
+    raw = f'{application.applied_at.isoformat()}|{application.id}'
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        applied_at, application_id = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+        return datetime.datetime.fromisoformat(applied_at), uuid.UUID(application_id)
+    except (ValueError, UnicodeError) as e:
+        raise InvalidCursor(str(e))
+
+
+def inbox_page(queryset, cursor=None, page_size=DEFAULT_PAGE_SIZE):
+    """
+    One page of ``queryset`` (ordered by -applied_at, -id) after ``cursor``.
+    Returns (applications, next_cursor); next_cursor is None on the last page.
+    """
+    if cursor:
+        applied_at, application_id = decode_cursor(cursor)
+        queryset = queryset.filter(
+            Q(applied_at__lt=applied_at) | Q(applied_at=applied_at, id__lt=application_id)
+        )
+
+    # One extra row tells whether there is a next page
+    applications = list(queryset.select_related('applicant')[:page_size + 1])
+    if len(applications) <= page_size:
+        return applications, None
+    applications = applications[:page_size]
+    return applications, encode_cursor(applications[-1])
+
+
+def _export_rows(queryset):
+    lookups = [lookup for _, lookup in EXPORT_FIELDS]
+    for row in queryset.values_list(*lookups).iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        yield [value.isoformat() if isinstance(value, datetime.datetime) else value for value in row]
+
+
+class _Echo:
+    """File-like object for csv.writer that hands each line back instead of storing it"""
+
+    def write(self, value):
+        return value
+
+
+def _csv_cell(value):
+    if value is None:
+        return ''
+    value = str(value)
+    # Applicants write their own names, so a leading quote keeps a "formula" as text
+    if value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def export_csv(queryset):
+    """Lines of a CSV export of ``queryset``"""
+    writer = csv.writer(_Echo())
+    yield writer.writerow([name for name, _ in EXPORT_FIELDS])
+    for row in _export_rows(queryset):
+        yield writer.writerow([_csv_cell(value) for value in row])
+
+
+def export_ndjson(queryset):
+    """Lines of a newline-delimited JSON export of ``queryset``"""
+    names = [name for name, _ in EXPORT_FIELDS]
+    for row in _export_rows(queryset):
+        yield json.dumps(dict(zip(names, row)), default=str) + '\n'
+
+
+EXPORTERS = {
+    'csv': (export_csv, 'text/csv'),
+    'ndjson': (export_ndjson, 'application/x-ndjson'),
+}
@@ -0,0 +1,24 @@
+# Generated by Django 4.2.9 on 2026-10-17 22:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("applications", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="application",
+            index=models.Index(
+                fields=["applicant", "status"], name="application_applica_b6966f_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="application",
+            index=models.Index(
+                fields=["job", "status"], name="application_job_id_7836e3_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.9 on 2026-10-17 22:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("applications", "0002_application_status_indexes"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="application",
+            name="application_job_id_7836e3_idx",
+        ),
+        migrations.AddIndex(
+            model_name="application",
+            index=models.Index(
+                fields=["job", "status", "-applied_at"],
+                name="application_job_id_52a770_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,91 @@
+# Generated by Django 4.2.9 on 2026-10-17 22:40
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+import django.db.models.deletion
+
+
+SNAPSHOT_FIELDS = {
+    "job_title": "title",
+    "job_company_name": "company_name",
+    "job_location": "location",
+    "job_salary_min": "salary_min",
+    "job_salary_max": "salary_max",
+    "job_salary_currency": "salary_currency",
+}
+
+
+def backfill_job_snapshot(apps, schema_editor):
+    """Copy the current job fields into the applications made before the snapshot existed"""
+    Application = apps.get_model("applications", "Application")
+    Job = apps.get_model("jobs", "Job")
+
+    job = Job.objects.filter(pk=OuterRef("job_id"))
+    Application.objects.filter(job__isnull=False).update(
+        **{
+            field: Subquery(job.values(job_field)[:1])
+            for field, job_field in SNAPSHOT_FIELDS.items()
+        }
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("jobs", "0006_job_alert_fanout"),
+        ("applications", "0004_applicationstatuschange"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="application",
+            name="job_company_name",
+            field=models.CharField(blank=True, editable=False, max_length=200),
+        ),
+        migrations.AddField(
+            model_name="application",
+            name="job_location",
+            field=models.CharField(blank=True, editable=False, max_length=200),
+        ),
+        migrations.AddField(
+            model_name="application",
+            name="job_salary_currency",
+            field=models.CharField(blank=True, editable=False, max_length=3),
+        ),
+        migrations.AddField(
+            model_name="application",
+            name="job_salary_max",
+            field=models.DecimalField(
+                blank=True, decimal_places=2, editable=False, max_digits=10, null=True
+            ),
+        ),
+        migrations.AddField(
+            model_name="application",
+            name="job_salary_min",
+            field=models.DecimalField(
+                blank=True, decimal_places=2, editable=False, max_digits=10, null=True
+            ),
+        ),
+        migrations.AddField(
+            model_name="application",
+            name="job_title",
+            field=models.CharField(blank=True, editable=False, max_length=200),
+        ),
+        migrations.AlterField(
+            model_name="application",
+            name="job",
+            field=models.ForeignKey(
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="applications",
+                to="jobs.job",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="application",
+            index=models.Index(
+                fields=["applicant", "-applied_at"],
+                name="application_applica_4af993_idx",
+            ),
+        ),
+        migrations.RunPython(backfill_job_snapshot, migrations.RunPython.noop),
+    ]
@@ -18,9 +18,19 @@ class Application(models.Model):
     ]
     
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
-    job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name='applications')
+    # Kept as NULL when the job is deleted; the snapshot below still describes it
+    job = models.ForeignKey(Job, on_delete=models.SET_NULL, null=True, related_name='applications')
     applicant = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='applications')
     
+    # Snapshot of the job taken when applying; lists render from it and it
+    # doesn't change when the job is edited or deleted
+    job_title = models.CharField(max_length=200, blank=True, editable=False)
+    job_company_name = models.CharField(max_length=200, blank=True, editable=False)
+    job_location = models.CharField(max_length=200, blank=True, editable=False)
+    job_salary_min = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True, editable=False)
+    job_salary_max = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True, editable=False)
+    job_salary_currency = models.CharField(max_length=3, blank=True, editable=False)
+    
     # Application details
     cover_letter = models.TextField(blank=True)
     resume = models.FileField(upload_to='resumes/', null=True, blank=True)
@@ -46,12 +56,58 @@ class Application(models.Model):
         indexes = [
             models.Index(fields=['-applied_at']),
             models.Index(fields=['status', '-applied_at']),
+            # "My applications": one user's rows, newest first
+            models.Index(fields=['applicant', '-applied_at']),
+            # Dashboard statistics (counts by status) and the employer inbox
+            # (per job, optionally by status, newest first)
+            models.Index(fields=['applicant', 'status']),
+            models.Index(fields=['job', 'status', '-applied_at']),
         ]
     
     def __str__(self):
-        return f"{self.applicant.name} applied to {self.job.title}"
+        return f"{self.applicant.name} applied to {self.job_title}"
+    
+    def save(self, *args, **kwargs):
+        if self._state.adding and self.job_id and not self.job_title:
+            self.capture_job_snapshot()
+        super().save(*args, **kwargs)
+    
+    def capture_job_snapshot(self):
+        """Copy the job fields shown in application lists"""
+        job = self.job
+        self.job_title = job.title
+        self.job_company_name = job.company_name
+        self.job_location = job.location
+        self.job_salary_min = job.salary_min
+        self.job_salary_max = job.salary_max
+        self.job_salary_currency = job.salary_currency
     
     @property
     def is_active(self):
         """Check if application is still active (not rejected/withdrawn/accepted)"""
         return self.status in ['pending', 'reviewed', 'interview', 'offered']
+
+
+class ApplicationStatusChange(models.Model):
+    """Audit trail of application status changes made by job posters"""
+    
+    application = models.ForeignKey(Application, on_delete=models.CASCADE, related_name='status_changes')
+    from_status = models.CharField(max_length=20, choices=Application.STATUS_CHOICES)
+    to_status = models.CharField(max_length=20, choices=Application.STATUS_CHOICES)
+    changed_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name='application_status_changes'
+    )
+    note = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['application', '-created_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.application_id}: {self.from_status} -> {self.to_status}"
@@ -1,5 +1,6 @@
 from rest_framework import serializers
 from .models import Application
+from .transitions import MAX_BULK_APPLICATIONS, POSTER_STATUSES
 from apps.jobs.serializers import JobListSerializer
 
 
@@ -14,7 +15,9 @@ class ApplicationSerializer(serializers.ModelSerializer):
     class Meta:
         model = Application
         fields = [
-            'id', 'job', 'job_details', 'applicant', 'applicant_name', 'applicant_email',
+            'id', 'job', 'job_details', 'job_title', 'job_company_name', 'job_location',
+            'job_salary_min', 'job_salary_max', 'job_salary_currency',
+            'applicant', 'applicant_name', 'applicant_email',
             'cover_letter', 'resume', 'portfolio_url', 'status', 'status_notes',
             'applied_at', 'updated_at', 'reviewed_at', 'interview_scheduled_at',
             'interview_location', 'interview_notes', 'is_active'
@@ -28,6 +31,8 @@ class ApplicationCreateSerializer(serializers.ModelSerializer):
     class Meta:
         model = Application
         fields = ['job', 'cover_letter', 'resume', 'portfolio_url']
+        # The model allows a null job so applications outlive deleted jobs, but a new one needs a job
+        extra_kwargs = {'job': {'required': True, 'allow_null': False}}
     
     def validate(self, data):
         """Check if user already applied to this job"""
@@ -46,18 +51,45 @@ class ApplicationCreateSerializer(serializers.ModelSerializer):
 
 
 class ApplicationListSerializer(serializers.ModelSerializer):
-    """Simplified serializer for application listings"""
+    """Simplified serializer for application listings (job fields come from the snapshot)"""
     
-    job_title = serializers.CharField(source='job.title', read_only=True)
-    company_name = serializers.CharField(source='job.company_name', read_only=True)
+    company_name = serializers.CharField(source='job_company_name', read_only=True)
     applicant_name = serializers.CharField(source='applicant.name', read_only=True)
     
+    # Columns read by list_queryset(); keep in step with the fields below
+    LIST_FIELDS = (
+        'id', 'job_id', 'job_title', 'job_company_name', 'job_location', 'job_salary_min',
+        'job_salary_max', 'job_salary_currency', 'applicant__name', 'status', 'applied_at',
+        'interview_scheduled_at',
+    )
+    
     class Meta:
         model = Application
         fields = [
-            'id', 'job', 'job_title', 'company_name', 'applicant_name',
+            'id', 'job', 'job_title', 'company_name', 'job_location', 'job_salary_min',
+            'job_salary_max', 'job_salary_currency', 'applicant_name',
             'status', 'applied_at', 'interview_scheduled_at'
         ]
+    
+    @classmethod
+    def list_queryset(cls, queryset):
+        """Only the columns this serializer reads, with the applicant joined"""
+        return queryset.select_related('applicant').only(*cls.LIST_FIELDS)
+
+
+class ApplicationInboxSerializer(serializers.ModelSerializer):
+    """Flat serializer for the employer inbox (job snapshot, applicant from select_related)"""
+    
+    applicant_name = serializers.CharField(source='applicant.name', read_only=True)
+    applicant_email = serializers.EmailField(source='applicant.email', read_only=True)
+    
+    class Meta:
+        model = Application
+        fields = [
+            'id', 'job', 'job_title', 'applicant', 'applicant_name', 'applicant_email',
+            'cover_letter', 'resume', 'portfolio_url', 'status', 'status_notes',
+            'applied_at', 'reviewed_at', 'interview_scheduled_at'
+        ]
 
 
 class ApplicationStatusUpdateSerializer(serializers.ModelSerializer):
@@ -67,3 +99,26 @@ class ApplicationStatusUpdateSerializer(serializers.ModelSerializer):
         model = Application
         fields = ['status', 'status_notes', 'reviewed_at', 'interview_scheduled_at', 
                   'interview_location', 'interview_notes']
+
+
+class ApplicationBulkStatusSerializer(serializers.Serializer):
+    """Serializer for moving many applications to one status"""
+    
+    status = serializers.ChoiceField(choices=POSTER_STATUSES)
+    application_ids = serializers.ListField(
+        child=serializers.UUIDField(),
+        required=False,
+        allow_empty=False,
+        max_length=MAX_BULK_APPLICATIONS
+    )
+    job_id = serializers.UUIDField(required=False)
+    from_status = serializers.ListField(
+        child=serializers.ChoiceField(choices=POSTER_STATUSES),
+        required=False
+    )
+    note = serializers.CharField(required=False, allow_blank=True, default='')
+    
+    def validate(self, data):
+        if 'application_ids' not in data and 'job_id' not in data:
+            raise serializers.ValidationError("Provide application_ids, job_id or both.")
+        return data
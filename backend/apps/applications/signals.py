@@ -0,0 +1,30 @@
+"""
+Signals for Applications App
+"""
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.jobs.models import Job
+from .models import Application
+from .statistics import invalidate_statistics
+
+
+def _poster_id(application):
+    if application.job_id is None:
+        return None
+    if Application.job.is_cached(application):
+        return application.job.posted_by_id
+    return Job.objects.filter(pk=application.job_id).values_list('posted_by_id', flat=True).first()
+
+
+@receiver(post_save, sender=Application)
+@receiver(post_delete, sender=Application)
+def invalidate_application_statistics(sender, instance, **kwargs):
+    """Any saved or deleted application can change both sides' dashboard counts"""
+    invalidate_statistics(applicant_ids=[instance.applicant_id], poster_ids=[_poster_id(instance)])
+
+
+@receiver(post_delete, sender=Job)
+def invalidate_poster_statistics(sender, instance, **kwargs):
+    """The job's applications are kept (job set to NULL) but no longer count for the poster"""
+    invalidate_statistics(poster_ids=[instance.posted_by_id])
@@ -0,0 +1,83 @@
+"""
+Application statistics for the dashboard.
+
+Each role is counted with one conditional-aggregation query, served by the
+(applicant, status) and (job, status, -applied_at) indexes, and cached per user.
+The cache is dropped when an application of the user (or to one of their jobs)
+is created, changes or is deleted, see signals.py.
+
+The cache is best-effort: if it is down, statistics are computed from the
+database and a failed invalidation is logged, leaving at most
+STATISTICS_CACHE_TIMEOUT of stale counts.
+"""
+import logging
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Q
+
+from .models import Application
+
+logger = logging.getLogger(__name__)
+
+APPLICANT_STATUSES = ('pending', 'reviewed', 'interview', 'offered', 'accepted', 'rejected')
+POSTER_STATUSES = ('pending', 'reviewed', 'interview')
+
+# Invalidation covers every write through the ORM; the timeout bounds what it can't see
+STATISTICS_CACHE_TIMEOUT = 60 * 10
+
+
+def _cache_key(role, user_id):
+    return f'application_stats:{role}:{user_id}'
+
+
+def _count_by_status(queryset, statuses):
+    return queryset.aggregate(
+        total=Count('id'),
+        **{status: Count('id', filter=Q(status=status)) for status in statuses}
+    )
+
+
+def _cached(role, user_id, compute):
+    key = _cache_key(role, user_id)
+    try:
+        stats = cache.get(key)
+    except Exception as e:
+        logger.error(f"Could not read {key} from the cache: {str(e)}")
+        return compute()
+    if stats is None:
+        stats = compute()
+        try:
+            cache.set(key, stats, STATISTICS_CACHE_TIMEOUT)
+        except Exception as e:
+            logger.error(f"Could not write {key} to the cache: {str(e)}")
+    return stats
+
+
+def _delete_keys(keys):
+    try:
+        cache.delete_many(keys)
+    except Exception as e:
+        logger.error(f"Could not invalidate {len(keys)} statistics keys: {str(e)}")
+
+
+def applicant_statistics(user):
+    """Applications sent by ``user``, in total and by status"""
+    return _cached('applicant', user.pk, lambda: _count_by_status(
+        Application.objects.filter(applicant=user), APPLICANT_STATUSES
+    ))
+
+
+def poster_statistics(user):
+    """Applications received on the jobs posted by ``user``, in total and by status"""
+    return _cached('poster', user.pk, lambda: _count_by_status(
+        Application.objects.filter(job__posted_by=user), POSTER_STATUSES
+    ))
+
+
+def invalidate_statistics(applicant_ids=(), poster_ids=()):
+    """Drop the cached statistics of these applicants and posters once the current transaction commits"""
+    keys = [_cache_key('applicant', user_id) for user_id in set(applicant_ids)]
+    keys += [_cache_key('poster', user_id) for user_id in set(poster_ids) if user_id is not None]
+    if keys:
+        transaction.on_commit(lambda: _delete_keys(keys))
@@ -0,0 +1,264 @@
+"""
+Tests for Applications App
+"""
+import csv
+import io
+import json
+from datetime import timedelta
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.applications.inbox import inbox_queryset
+from apps.applications.models import Application, ApplicationStatusChange
+from apps.applications.statistics import applicant_statistics, poster_statistics
+from apps.jobs.models import Job
+from apps.notifications.models import Notification, NotificationPreference
+from apps.users.models_referral import PointsTransaction
+from joby_api.factories import make_job, make_user
+from joby_api.testing import assert_max_queries
+
+
+class ApplicationStatisticsTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.poster = make_user()
+        self.applicant = make_user()
+        self.jobs = [make_job(self.poster, title=f'Empleo {index}') for index in range(3)]
+        with self.captureOnCommitCallbacks(execute=True):
+            Application.objects.create(job=self.jobs[0], applicant=self.applicant)
+            Application.objects.create(job=self.jobs[1], applicant=self.applicant, status='interview')
+            Application.objects.create(job=self.jobs[0], applicant=make_user())
+        self.client = APIClient()
+        self.client.force_authenticate(self.applicant)
+
+    def test_one_query_per_role_then_cached(self):
+        with assert_max_queries(2):
+            response = self.client.get('/api/applications/statistics/')
+        with assert_max_queries(0):
+            self.client.get('/api/applications/statistics/')
+
+        stats = response.data['as_applicant']
+        self.assertEqual((stats['total'], stats['pending'], stats['interview'], stats['rejected']), (2, 1, 1, 0))
+        self.assertEqual(response.data['as_poster']['total'], 0)
+
+    def test_application_writes_invalidate_both_sides(self):
+        self.assertEqual(applicant_statistics(self.applicant)['total'], 2)
+        self.assertEqual(poster_statistics(self.poster)['pending'], 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Application.objects.create(job=self.jobs[2], applicant=self.applicant)
+        with self.captureOnCommitCallbacks(execute=True):
+            application = Application.objects.get(job=self.jobs[1], applicant=self.applicant)
+            application.status = 'reviewed'
+            application.save()
+
+        self.assertEqual(applicant_statistics(self.applicant)['total'], 3)
+        stats = poster_statistics(self.poster)
+        self.assertEqual((stats['total'], stats['pending'], stats['reviewed'], stats['interview']), (4, 3, 1, 0))
+
+    def test_deleting_a_job_invalidates_the_poster(self):
+        self.assertEqual(poster_statistics(self.poster)['total'], 3)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.jobs[0].delete()
+
+        self.assertEqual(poster_statistics(self.poster)['total'], 1)
+        self.assertEqual(applicant_statistics(self.applicant)['total'], 2)
+
+    def test_cache_errors_do_not_fail_requests(self):
+        broken = mock.Mock(**{
+            f'{method}.side_effect': ConnectionError('cache down') for method in ('get', 'set', 'delete_many')
+        })
+        with mock.patch('apps.applications.statistics.cache', broken), \
+                self.assertLogs('apps.applications.statistics', 'ERROR'):
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post('/api/applications/', {'job': str(self.jobs[2].id)}, format='json')
+            self.assertEqual(response.status_code, 201)
+
+            response = self.client.get('/api/applications/statistics/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['as_applicant']['total'], 3)
+
+
+class InboxKeysetPaginationTests(TestCase):
+
+    def setUp(self):
+        self.poster = make_user()
+        jobs = [make_job(self.poster, title=f'Empleo {index}') for index in range(2)]
+        make_job(make_user(), title='Empleo de otro')
+        applications = [
+            Application.objects.create(job=jobs[index % 2], applicant=make_user(), status=status)
+            for index, status in enumerate(['pending', 'reviewed', 'pending', 'interview', 'pending', 'pending', 'reviewed'])
+        ]
+        # Several rows share applied_at, so the id has to break the tie
+        now = timezone.now()
+        for index, application in enumerate(applications):
+            Application.objects.filter(pk=application.pk).update(applied_at=now - timedelta(minutes=index // 3))
+        self.client = APIClient()
+        self.client.force_authenticate(self.poster)
+
+    def walk(self, url):
+        ids = []
+        while url:
+            with assert_max_queries(1):
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            ids.extend(row['id'] for row in response.data['results'])
+            url = response.data['next']
+        return ids
+
+    def test_pages_cover_every_row_once_in_order(self):
+        ids = self.walk('/api/applications/inbox/?page_size=3')
+
+        expected = [str(pk) for pk in inbox_queryset(self.poster).values_list('id', flat=True)]
+        self.assertEqual(len(expected), 7)
+        self.assertEqual(ids, expected)
+
+    def test_filters_are_kept_across_pages(self):
+        ids = self.walk('/api/applications/inbox/?page_size=2&status=pending')
+
+        self.assertEqual(len(ids), 4)
+        self.assertEqual(set(Application.objects.filter(id__in=ids).values_list('status', flat=True)), {'pending'})
+
+    def test_invalid_cursor(self):
+        response = self.client.get('/api/applications/inbox/', {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_exports_stream_every_row(self):
+        response = self.client.get('/api/applications/inbox/', {'export': 'csv'})
+        rows = list(csv.reader(io.StringIO(b''.join(response.streaming_content).decode())))
+        self.assertEqual(rows[0][:3], ['id', 'job_id', 'job_title'])
+        self.assertEqual(len(rows), 8)
+
+        response = self.client.get('/api/applications/inbox/', {'export': 'ndjson', 'status': 'reviewed'})
+        lines = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+        self.assertEqual([line['status'] for line in lines], ['reviewed', 'reviewed'])
+
+        self.assertEqual(self.client.get('/api/applications/inbox/', {'export': 'xml'}).status_code, 400)
+
+    def test_invalid_job_id(self):
+        response = self.client.get('/api/applications/inbox/', {'job_id': 'abc'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_csv_export_neutralizes_formulas(self):
+        application = inbox_queryset(self.poster).first()
+        application.applicant.name = '=HYPERLINK("http://evil.example","x")'
+        application.applicant.save(update_fields=['name'])
+        Application.objects.filter(pk=application.pk).update(job_title='-Backend')
+
+        response = self.client.get('/api/applications/inbox/', {'export': 'csv'})
+        rows = list(csv.DictReader(io.StringIO(b''.join(response.streaming_content).decode())))
+
+        row = next(row for row in rows if row['id'] == str(application.id))
+        self.assertEqual(row['applicant_name'], '\'=HYPERLINK("http://evil.example","x")')
+        self.assertEqual(row['job_title'], "'-Backend")
+
+
+class BulkStatusTests(TestCase):
+
+    def setUp(self):
+        self.poster = make_user()
+        self.job = make_job(self.poster)
+        self.applications = {
+            status: [Application.objects.create(job=self.job, applicant=make_user(), status=status) for _ in range(3)]
+            for status in ('pending', 'reviewed', 'interview', 'withdrawn')
+        }
+        self.foreign = Application.objects.create(job=make_job(make_user()), applicant=make_user())
+        self.client = APIClient()
+        self.client.force_authenticate(self.poster)
+
+    def bulk(self, **data):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post('/api/applications/bulk_status/', data, format='json')
+
+    def test_reject_remaining_moves_audits_and_notifies_the_batch(self):
+        opted_out = self.applications['pending'][0].applicant
+        NotificationPreference.objects.create(user=opted_out, inapp_application_updates=False)
+
+        # Locking SELECT, UPDATE and audit INSERT, then two reads and one INSERT in the
+        # notification task, whatever the batch size
+        with assert_max_queries(6):
+            response = self.bulk(status='rejected', job_id=str(self.job.id), from_status=['pending', 'reviewed'])
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['updated'], 6)
+        moved = self.applications['pending'] + self.applications['reviewed']
+        self.assertEqual(
+            set(Application.objects.filter(status='rejected').values_list('id', flat=True)),
+            {application.id for application in moved}
+        )
+        # Leaving 'pending' marks the application reviewed
+        pending_ids = [application.id for application in self.applications['pending']]
+        self.assertFalse(Application.objects.filter(id__in=pending_ids, reviewed_at__isnull=True).exists())
+        changes = ApplicationStatusChange.objects.filter(changed_by=self.poster)
+        self.assertEqual(sorted(changes.values_list('from_status', flat=True)), ['pending'] * 3 + ['reviewed'] * 3)
+        self.assertEqual(
+            set(Notification.objects.filter(notification_type='application_status').values_list('recipient_id', flat=True)),
+            {application.applicant_id for application in moved} - {opted_out.id}
+        )
+
+    def test_withdrawn_and_foreign_applications_are_left_alone(self):
+        ids = [str(self.applications['withdrawn'][0].id), str(self.foreign.id), str(self.applications['interview'][0].id)]
+
+        response = self.bulk(status='offered', application_ids=ids)
+
+        self.assertEqual(response.data['application_ids'], [str(self.applications['interview'][0].id)])
+        self.assertEqual(
+            sorted(Application.objects.filter(pk__in=ids).values_list('status', flat=True)),
+            ['offered', 'pending', 'withdrawn']
+        )
+
+    def test_requires_a_batch(self):
+        self.assertEqual(self.bulk(status='rejected').status_code, 400)
+        self.assertEqual(self.bulk(status='withdrawn', job_id=str(self.job.id)).status_code, 400)
+
+
+class ApplicationSnapshotTests(TestCase):
+
+    def setUp(self):
+        self.poster = make_user()
+        self.applicant = make_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.applicant)
+
+    def test_snapshot_survives_job_edits_and_deletion(self):
+        job = make_job(self.poster, title='Data Engineer', company_name='Globex', location='Lima, Perú')
+        application = Application.objects.create(job=job, applicant=self.applicant)
+
+        Job.objects.filter(pk=job.pk).update(title='Otro título')
+        job.delete()
+        application.refresh_from_db()
+
+        self.assertIsNone(application.job_id)
+        self.assertEqual(
+            (application.job_title, application.job_company_name, application.job_location),
+            ('Data Engineer', 'Globex', 'Lima, Perú')
+        )
+
+    def test_create_requires_a_job(self):
+        for data in ({'cover_letter': 'Hola'}, {'job': None, 'cover_letter': 'Hola'}):
+            response = self.client.post('/api/applications/', data, format='json')
+            self.assertEqual(response.status_code, 400)
+            self.assertIn('job', response.data)
+
+        self.assertFalse(Application.objects.filter(applicant=self.applicant).exists())
+        self.assertFalse(PointsTransaction.objects.filter(user=self.applicant).exists())
+
+    def test_my_applications_is_one_query(self):
+        for index in range(5):
+            Application.objects.create(job=make_job(self.poster, title=f'Empleo {index}'), applicant=self.applicant)
+        Job.objects.filter(title='Empleo 0').delete()
+
+        with assert_max_queries(1):
+            response = self.client.get('/api/applications/my_applications/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(sorted(row['job_title'] for row in response.data), [f'Empleo {index}' for index in range(5)])
+        self.assertEqual({row['company_name'] for row in response.data}, {'Acme'})
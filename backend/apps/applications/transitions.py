@@ -0,0 +1,102 @@
+"""
+Application status transitions made by job posters.
+
+A transition, of one application or of a whole batch ("reject all remaining",
+"move these 30 to interview"), is one locking SELECT, one UPDATE ... WHERE id IN
+(...), one bulk_create of ApplicationStatusChange audit rows and a single
+notification task for every affected applicant, so its cost doesn't grow per
+application.
+"""
+import logging
+
+from django.db import transaction
+from django.db.models import Case, F, Value, When
+from django.utils import timezone
+
+from .models import Application, ApplicationStatusChange
+from .statistics import invalidate_statistics
+
+logger = logging.getLogger(__name__)
+
+# Only the applicant can withdraw, and a withdrawn application can't be moved
+POSTER_STATUSES = [choice for choice, _ in Application.STATUS_CHOICES if choice != 'withdrawn']
+
+MAX_BULK_APPLICATIONS = 1000
+
+
+def transition_applications(poster, to_status, application_ids=None, job_id=None, from_statuses=None, note=''):
+    """
+    Move the applications received by ``poster`` to ``to_status``.
+
+    The batch is picked by ``application_ids`` and/or ``job_id`` and optionally
+    narrowed to ``from_statuses``. Applications already in ``to_status`` or
+    withdrawn are left alone. Returns the ApplicationStatusChange rows created.
+    """
+    queryset = Application.objects.filter(job__posted_by=poster).exclude(status__in=[to_status, 'withdrawn'])
+    if application_ids is not None:
+        queryset = queryset.filter(id__in=application_ids)
+    if job_id is not None:
+        queryset = queryset.filter(job_id=job_id)
+    if from_statuses:
+        queryset = queryset.filter(status__in=from_statuses)
+
+    now = timezone.now()
+    with transaction.atomic():
+        # Locked so the audit rows record the status each application really had
+        rows = list(
+            queryset.select_for_update(of=('self',)).order_by('id').values_list('id', 'status', 'applicant_id')
+        )
+        if not rows:
+            return []
+
+        update = {'status': to_status, 'updated_at': now}
+        if note:
+            update['status_notes'] = note
+        # Same rule as update_status: leaving 'pending' marks the application reviewed
+        if to_status != 'pending':
+            update['reviewed_at'] = Case(When(status='pending', then=Value(now)), default=F('reviewed_at'))
+        Application.objects.filter(id__in=[row[0] for row in rows]).update(**update)
+
+        changes = ApplicationStatusChange.objects.bulk_create([
+            ApplicationStatusChange(
+                application_id=application_id,
+                from_status=from_status,
+                to_status=to_status,
+                changed_by=poster,
+                note=note
+            )
+            for application_id, from_status, _ in rows
+        ])
+
+        # QuerySet.update() skips the post_save signals that normally drop these
+        invalidate_statistics(applicant_ids=[row[2] for row in rows], poster_ids=[poster.pk])
+        notify_status_changes([change.id for change in changes])
+
+    return changes
+
+
+def record_status_change(application, from_status, changed_by, note=''):
+    """Audit and notify a status change already saved on ``application``"""
+    if application.status == from_status:
+        return None
+    change = ApplicationStatusChange.objects.create(
+        application=application,
+        from_status=from_status,
+        to_status=application.status,
+        changed_by=changed_by,
+        note=note
+    )
+    notify_status_changes([change.id])
+    return change
+
+
+def notify_status_changes(change_ids):
+    """Queue one notification task for the whole batch once the transaction commits"""
+    from apps.notifications.tasks import send_application_status_notifications
+
+    def enqueue():
+        try:
+            send_application_status_notifications.delay(change_ids)
+        except Exception as e:
+            logger.error(f"Could not queue status notifications for {len(change_ids)} changes: {str(e)}")
+    transaction.on_commit(enqueue)
@@ -1,14 +1,26 @@
+import uuid
+
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from django.db import transaction
+from django.http import StreamingHttpResponse
 from django.utils import timezone
+from rest_framework.utils.urls import replace_query_param
 
+from apps.jobs.serializers import get_saved_job_ids
+from apps.users.points import award_points
+from .inbox import (
+    DEFAULT_PAGE_SIZE, EXPORTERS, MAX_PAGE_SIZE, InvalidCursor, inbox_page, inbox_queryset
+)
 from .models import Application
+from .statistics import applicant_statistics, poster_statistics
 from .serializers import (
-    ApplicationSerializer, ApplicationCreateSerializer,
-    ApplicationListSerializer, ApplicationStatusUpdateSerializer
+    ApplicationSerializer, ApplicationCreateSerializer, ApplicationInboxSerializer,
+    ApplicationListSerializer, ApplicationStatusUpdateSerializer, ApplicationBulkStatusSerializer
 )
+from .transitions import record_status_change, transition_applications
 
 
 class ApplicationViewSet(viewsets.ModelViewSet):
@@ -23,6 +35,7 @@ class ApplicationViewSet(viewsets.ModelViewSet):
     """
     
     permission_classes = [IsAuthenticated]
+    query_budget = {'default': 5, 'create': 15, 'destroy': 10, 'update_status': 10, 'bulk_status': 15}
     
     def get_queryset(self):
         """
@@ -34,12 +47,13 @@ class ApplicationViewSet(viewsets.ModelViewSet):
         
         # If filtering by job (for job posters)
         job_id = self.request.query_params.get('job_id')
+        queryset = Application.objects.select_related('job__posted_by', 'applicant')
         if job_id:
             # Return applications to jobs posted by this user
-            return Application.objects.filter(job__posted_by=user, job__id=job_id)
+            return queryset.filter(job__posted_by=user, job__id=job_id)
         
         # Default: return user's own applications
-        return Application.objects.filter(applicant=user)
+        return queryset.filter(applicant=user)
     
     def get_serializer_class(self):
         if self.action == 'list':
@@ -57,8 +71,7 @@ class ApplicationViewSet(viewsets.ModelViewSet):
         self.perform_create(serializer)
         
         # Award points for applying (gamification)
-        request.user.points += 10
-        request.user.save(update_fields=['points'])
+        award_points(request.user, 'application', 10, 'Postulación enviada')
         
         headers = self.get_success_headers(serializer.data)
         return Response(
@@ -100,7 +113,9 @@ class ApplicationViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def my_applications(self, request):
         """Get all applications by current user"""
-        queryset = Application.objects.filter(applicant=request.user)
+        queryset = ApplicationListSerializer.list_queryset(
+            Application.objects.filter(applicant=request.user)
+        )
         
         # Filter by status if provided
         status_filter = request.query_params.get('status')
@@ -113,7 +128,9 @@ class ApplicationViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def received(self, request):
         """Get applications received for jobs posted by current user"""
-        queryset = Application.objects.filter(job__posted_by=request.user)
+        queryset = Application.objects.filter(
+            job__posted_by=request.user
+        ).select_related('job__posted_by', 'applicant')
         
         # Filter by status if provided
         status_filter = request.query_params.get('status')
@@ -125,16 +142,72 @@ class ApplicationViewSet(viewsets.ModelViewSet):
         if job_id:
             queryset = queryset.filter(job__id=job_id)
         
-        serializer = ApplicationSerializer(queryset, many=True, context={'request': request})
+        applications = list(queryset)
+        context = {
+            'request': request,
+            'saved_job_ids': get_saved_job_ids(
+                request, [application.job for application in applications if application.job]
+            ),
+        }
+        serializer = ApplicationSerializer(applications, many=True, context=context)
         return Response(serializer.data)
     
+    @action(detail=False, methods=['get'])
+    def inbox(self, request):
+        """
+        Employer inbox: applications received on the current user's jobs, newest first
+        GET /api/applications/inbox/?status=&job_id=&page_size=&cursor=
+        GET /api/applications/inbox/?export=csv|ndjson streams every matching row
+        """
+        job_id = request.query_params.get('job_id')
+        if job_id:
+            try:
+                job_id = uuid.UUID(job_id)
+            except ValueError:
+                return Response({'error': 'job_id must be a UUID'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        queryset = inbox_queryset(request.user, status=request.query_params.get('status'), job_id=job_id)
+        
+        export = request.query_params.get('export')
+        if export:
+            if export not in EXPORTERS:
+                return Response(
+                    {'error': f"export must be one of: {', '.join(EXPORTERS)}"},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            exporter, content_type = EXPORTERS[export]
+            response = StreamingHttpResponse(exporter(queryset), content_type=content_type)
+            response['Content-Disposition'] = f'attachment; filename="applications.{export}"'
+            return response
+        
+        try:
+            page_size = min(int(request.query_params.get('page_size', DEFAULT_PAGE_SIZE)), MAX_PAGE_SIZE)
+        except ValueError:
+            page_size = DEFAULT_PAGE_SIZE
+        
+        try:
+            applications, next_cursor = inbox_page(
+                queryset, request.query_params.get('cursor'), max(page_size, 1)
+            )
+        except InvalidCursor:
+            return Response({'error': 'Invalid cursor'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        next_url = None
+        if next_cursor:
+            next_url = replace_query_param(request.build_absolute_uri(), 'cursor', next_cursor)
+        
+        return Response({
+            'next': next_url,
+            'results': ApplicationInboxSerializer(applications, many=True).data
+        })
+    
     @action(detail=True, methods=['patch'])
     def update_status(self, request, pk=None):
         """Update application status (job poster only)"""
         application = self.get_object()
         
         # Only job poster can update status
-        if application.job.posted_by != request.user:
+        if application.job is None or application.job.posted_by_id != request.user.id:
             return Response(
                 {'error': 'Only the job poster can update application status'},
                 status=status.HTTP_403_FORBIDDEN
@@ -151,33 +224,48 @@ class ApplicationViewSet(viewsets.ModelViewSet):
         if application.status == 'pending' and request.data.get('status') != 'pending':
             serializer.validated_data['reviewed_at'] = timezone.now()
         
-        serializer.save()
+        previous_status = application.status
+        with transaction.atomic():
+            serializer.save()
+            record_status_change(
+                application, previous_status, request.user, serializer.validated_data.get('status_notes', '')
+            )
         
         return Response(serializer.data)
     
+    @action(detail=False, methods=['post'])
+    def bulk_status(self, request):
+        """
+        Move many received applications to one status (job poster only)
+        POST /api/applications/bulk_status/
+        Body: {"status": "rejected", "job_id": "...", "from_status": ["pending", "reviewed"]}
+           or {"status": "interview", "application_ids": ["...", ...]}
+        """
+        serializer = ApplicationBulkStatusSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        
+        changes = transition_applications(
+            request.user,
+            data['status'],
+            application_ids=data.get('application_ids'),
+            job_id=data.get('job_id'),
+            from_statuses=data.get('from_status'),
+            note=data['note']
+        )
+        
+        return Response({
+            'status': data['status'],
+            'updated': len(changes),
+            'application_ids': [str(change.application_id) for change in changes]
+        })
+    
     @action(detail=False, methods=['get'])
     def statistics(self, request):
         """Get application statistics for current user"""
-        user = request.user
-        
-        # Statistics for applicant
-        applicant_stats = {
-            'total': Application.objects.filter(applicant=user).count(),
-            'pending': Application.objects.filter(applicant=user, status='pending').count(),
-            'reviewed': Application.objects.filter(applicant=user, status='reviewed').count(),
-            'interview': Application.objects.filter(applicant=user, status='interview').count(),
-            'offered': Application.objects.filter(applicant=user, status='offered').count(),
-            'accepted': Application.objects.filter(applicant=user, status='accepted').count(),
-            'rejected': Application.objects.filter(applicant=user, status='rejected').count(),
-        }
-        
-        # Statistics for job poster
-        poster_stats = {
-            'total': Application.objects.filter(job__posted_by=user).count(),
-            'pending': Application.objects.filter(job__posted_by=user, status='pending').count(),
-            'reviewed': Application.objects.filter(job__posted_by=user, status='reviewed').count(),
-            'interview': Application.objects.filter(job__posted_by=user, status='interview').count(),
-        }
+        # One aggregate query per role, cached per user until their applications change
+        applicant_stats = applicant_statistics(request.user)
+        poster_stats = poster_statistics(request.user)
         
         return Response({
             'as_applicant': applicant_stats,
@@ -6,3 +6,6 @@ class JobsConfig(AppConfig):
     name = 'apps.jobs'
     label = 'jobs'
     verbose_name = 'Jobs'
+    
+    def ready(self):
+        import apps.jobs.signals  # noqa
@@ -0,0 +1,55 @@
+"""
+Filter backends for job listings
+"""
+import re
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connection
+from django.db.models import F
+from rest_framework import filters
+
+from .models import SEARCH_CONFIGS
+
+
+class JobFullTextSearchFilter(filters.BaseFilterBackend):
+    """
+    Ranked full-text search over Job.search_vector (``?q=``).
+
+    Every word is matched as a prefix, in both Spanish and English
+    configurations, and results are ordered by ts_rank unless an explicit
+    ``?ordering=`` is given. On databases other than PostgreSQL it falls back
+    to the regular SearchFilter behaviour.
+    """
+    
+    search_param = 'q'
+    
+    def get_search_terms(self, request):
+        params = request.query_params.get(self.search_param, '')
+        return re.findall(r'\w+', params.lower())
+    
+    def filter_queryset(self, request, queryset, view):
+        terms = self.get_search_terms(request)
+        if not terms:
+            return queryset
+        
+        if connection.vendor != 'postgresql':
+            return self.fallback_filter(request, queryset, view, terms)
+        
+        raw_query = ' & '.join(f'{term}:*' for term in terms)
+        query = None
+        for config in SEARCH_CONFIGS:
+            part = SearchQuery(raw_query, config=config, search_type='raw')
+            query = part if query is None else query | part
+        
+        queryset = queryset.filter(search_vector=query).annotate(
+            search_rank=SearchRank(F('search_vector'), query)
+        )
+        
+        if request.query_params.get(filters.OrderingFilter.ordering_param):
+            return queryset
+        return queryset.order_by('-search_rank', '-posted_at')
+    
+    def fallback_filter(self, request, queryset, view, terms):
+        """Plain icontains search over the view's search_fields"""
+        search_filter = filters.SearchFilter()
+        search_filter.get_search_terms = lambda request: terms
+        return search_filter.filter_queryset(request, queryset, view)
@@ -0,0 +1,32 @@
+"""
+Management command para reconstruir la tabla materializada de matches (UserJobMatch)
+"""
+from django.core.management.base import BaseCommand
+from apps.users.models import User
+from apps.jobs.match_index import refresh_user_matches
+
+
+class Command(BaseCommand):
+    help = 'Recalcula los matches materializados de todos los usuarios (o de uno con --email)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--email',
+            type=str,
+            help='Email del usuario específico',
+        )
+
+    def handle(self, *args, **options):
+        users = User.objects.order_by('pk')
+        if options.get('email'):
+            users = users.filter(email=options['email'])
+
+        self.stdout.write(self.style.SUCCESS('Reconstruyendo matches de trabajos...'))
+
+        total_users = 0
+        total_matches = 0
+        for user in users.iterator(chunk_size=500):
+            total_matches += refresh_user_matches(user)
+            total_users += 1
+
+        self.stdout.write(self.style.SUCCESS(f'✓ {total_matches} matches guardados para {total_users} usuarios'))
@@ -0,0 +1,110 @@
+"""
+Materialized user x job match scores (UserJobMatch).
+
+Rows are kept for active jobs that pass the user's JobAlertPreference filters and
+score at least MATCH_INDEX_MIN_SCORE. They are refreshed per user (profile or
+preference changes) or per job (job created or edited) by the tasks in tasks.py.
+"""
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+
+from .matching import BatchMatchScorer, MATCH_INDEX_MIN_SCORE
+from .models import Job, UserJobMatch
+from .services import JobMatchingService
+
+# User and job fields that feed the score or the preference filters
+USER_MATCH_FIELDS = ('skills', 'location', 'experience')
+JOB_MATCH_FIELDS = (
+    'skills_required', 'location', 'remote_ok', 'experience_level',
+    'job_type', 'salary_min', 'salary_max', 'is_active',
+)
+PREFERENCE_MATCH_FIELDS = ('remote_only', 'preferred_job_types', 'preferred_locations', 'min_salary')
+
+USER_BATCH_SIZE = 2000
+
+
+def _upsert_matches(rows):
+    """Insert the rows, or overwrite the score of the (user, job) pairs already stored"""
+    if rows:
+        UserJobMatch.objects.bulk_create(
+            rows,
+            batch_size=1000,
+            update_conflicts=True,
+            unique_fields=['user', 'job'],
+            update_fields=['score', 'matching_skills', 'computed_at']
+        )
+
+
+def refresh_user_matches(user):
+    """Recompute every stored match of one user. Returns the number of rows kept"""
+    from apps.users.models import JobAlertPreference
+
+    started_at = timezone.now()
+    preferences = JobAlertPreference.objects.filter(user=user).first()
+    jobs = list(JobMatchingService.apply_preference_filters(Job.objects.filter(is_active=True), preferences))
+    scores = BatchMatchScorer().score_jobs(user, jobs)
+
+    rows = [
+        UserJobMatch(
+            user=user,
+            job=job,
+            score=score,
+            matching_skills=JobMatchingService._get_matching_skills(job, user)
+        )
+        for job, score in zip(jobs, scores.tolist())
+        if score >= MATCH_INDEX_MIN_SCORE
+    ]
+    _upsert_matches(rows)
+    # Rows not refreshed above no longer reach the threshold or the preference filters
+    UserJobMatch.objects.filter(user=user, computed_at__lt=started_at).delete()
+    return len(rows)
+
+
+def refresh_job_matches(job):
+    """Recompute the stored matches of one job against every user. Returns the number of rows kept"""
+    started_at = timezone.now()
+    if not job.is_active:
+        UserJobMatch.objects.filter(job=job).delete()
+        return 0
+
+    users = get_user_model().objects.only('id', *USER_MATCH_FIELDS).select_related(
+        'job_alert_preference'
+    ).order_by('pk')
+
+    kept = 0
+    batch = []
+    for user in users.iterator(chunk_size=USER_BATCH_SIZE):
+        batch.append(user)
+        if len(batch) == USER_BATCH_SIZE:
+            kept += _refresh_job_batch(job, batch)
+            batch = []
+    if batch:
+        kept += _refresh_job_batch(job, batch)
+
+    UserJobMatch.objects.filter(job=job, computed_at__lt=started_at).delete()
+    return kept
+
+
+def _refresh_job_batch(job, users):
+    from apps.users.models import JobAlertPreference
+
+    scores = BatchMatchScorer().score_users(job, users).tolist()
+    rows = []
+    for user, score in zip(users, scores):
+        if score < MATCH_INDEX_MIN_SCORE:
+            continue
+        try:
+            preferences = user.job_alert_preference
+        except JobAlertPreference.DoesNotExist:
+            preferences = None
+        if not JobMatchingService.job_matches_preferences(job, preferences):
+            continue
+        rows.append(UserJobMatch(
+            user=user,
+            job=job,
+            score=score,
+            matching_skills=JobMatchingService._get_matching_skills(job, user)
+        ))
+
+    _upsert_matches(rows)
+    return len(rows)
@@ -0,0 +1,223 @@
+"""
+Motor de matching vectorizado (NumPy) para scoring de trabajos en lote
+"""
+import numpy as np
+
+
+# Palabras clave para inferir el nivel de experiencia a partir del texto libre del usuario
+EXPERIENCE_LEVEL_MAP = {
+    'entry': ['junior', 'entry', 'beginner', 'recién graduado', 'sin experiencia'],
+    'mid': ['mid', 'intermedio', 'intermediate', '2 años', '3 años', '4 años'],
+    'senior': ['senior', 'sénior', 'avanzado', 'experto', '5 años', '6 años', '7 años'],
+    'lead': ['lead', 'líder', 'jefe', 'gerente', 'manager'],
+    'executive': ['executive', 'director', 'ejecutivo', 'c-level', 'vp', 'ceo', 'cto'],
+}
+
+LEVELS_ORDER = ['entry', 'mid', 'senior', 'lead', 'executive']
+
+# Máximo alcanzable sin ninguna habilidad en común: ubicación (30) + experiencia (30)
+MAX_SCORE_WITHOUT_SKILLS = 60
+
+# Score mínimo que se guarda en UserJobMatch; consultas con umbrales menores se calculan en vivo
+MATCH_INDEX_MIN_SCORE = 50
+
+# Score mínimo para enviar una alerta de trabajo nuevo; al ser mayor que MAX_SCORE_WITHOUT_SKILLS
+# solo los usuarios con alguna habilidad en común pueden recibirla
+ALERT_MIN_SCORE = 70
+
+# Índice reservado para niveles desconocidos (usuario sin nivel detectado o nivel de trabajo inválido)
+_UNKNOWN_LEVEL = len(LEVELS_ORDER)
+
+
+def detect_experience_level(experience_text):
+    """Determina el nivel del usuario basado en palabras clave (None si no se detecta)"""
+    if not experience_text:
+        return None
+    text = experience_text.lower()
+    for level, keywords in EXPERIENCE_LEVEL_MAP.items():
+        if any(keyword in text for keyword in keywords):
+            return level
+    return None
+
+
+def location_score(user_location, job_location, remote_ok):
+    """Puntaje de ubicación (0, 15 o 30) con las mismas reglas que calculate_match_score"""
+    if user_location and job_location:
+        if remote_ok:
+            return 30
+        user_lower = user_location.lower()
+        job_lower = job_location.lower()
+        if user_lower in job_lower or job_lower in user_lower:
+            return 30
+        if user_location.split(',')[-1].strip().lower() == job_location.split(',')[-1].strip().lower():
+            return 15
+        return 0
+    return 30 if remote_ok else 0
+
+
+def _build_experience_table():
+    """Tabla (usuario x trabajo) con el puntaje de experiencia para cada par de niveles"""
+    size = len(LEVELS_ORDER) + 1
+    table = np.zeros((size, size), dtype=np.float64)
+    for user_index in range(len(LEVELS_ORDER)):
+        for job_index in range(len(LEVELS_ORDER)):
+            if user_index == job_index:
+                table[user_index, job_index] = 30
+            elif user_index > job_index:
+                table[user_index, job_index] = 15  # Penalizar overqualification
+            elif user_index == job_index - 1:
+                table[user_index, job_index] = 25  # Un nivel debajo está bien
+    return table
+
+
+EXPERIENCE_SCORE_TABLE = _build_experience_table()
+
+_LEVEL_INDEX = {level: index for index, level in enumerate(LEVELS_ORDER)}
+
+
+def level_index(level):
+    """Índice del nivel en LEVELS_ORDER, o el índice reservado si es desconocido"""
+    return _LEVEL_INDEX.get(level, _UNKNOWN_LEVEL)
+
+
+class SkillVocabulary:
+    """Asigna un ID entero estable a cada habilidad normalizada (en minúsculas)"""
+
+    def __init__(self):
+        self._ids = {}
+
+    def __len__(self):
+        return len(self._ids)
+
+    def id_for(self, skill):
+        key = skill.lower()
+        skill_id = self._ids.get(key)
+        if skill_id is None:
+            skill_id = len(self._ids)
+            self._ids[key] = skill_id
+        return skill_id
+
+    def mask_for(self, skills):
+        """Vector booleano (bitset) sobre el vocabulario con las habilidades dadas"""
+        ids = [self.id_for(skill) for skill in skills]
+        mask = np.zeros(len(self._ids), dtype=bool)
+        mask[ids] = True
+        return mask
+
+
+class SkillMatrix:
+    """
+    Matriz dispersa (formato CSR) de habilidades por fila.
+
+    Cada fila guarda los IDs únicos de sus habilidades y la longitud original de la
+    lista (con duplicados), que es el denominador usado por el scoring.
+    """
+
+    def __init__(self, skill_lists, vocabulary):
+        row_ids = []
+        indices = []
+        lengths = np.zeros(len(skill_lists), dtype=np.float64)
+        for row, skills in enumerate(skill_lists):
+            if not skills:
+                continue
+            lengths[row] = len(skills)
+            unique_ids = {vocabulary.id_for(skill) for skill in skills}
+            indices.extend(unique_ids)
+            row_ids.extend([row] * len(unique_ids))
+
+        self.n_rows = len(skill_lists)
+        self.indices = np.asarray(indices, dtype=np.int64)
+        self.row_ids = np.asarray(row_ids, dtype=np.int64)
+        self.lengths = lengths
+
+    def overlap_counts(self, mask):
+        """Cantidad de habilidades de cada fila presentes en ``mask``"""
+        if not len(self.indices):
+            return np.zeros(self.n_rows, dtype=np.float64)
+        hits = mask[self.indices]
+        return np.bincount(self.row_ids, weights=hits, minlength=self.n_rows)
+
+
+def _finalize(skill_scores, location_scores, experience_scores):
+    """Combina los componentes y aplica el mismo redondeo que la versión escalar"""
+    total = skill_scores + location_scores + experience_scores
+    return np.minimum(np.rint(total), 100).astype(np.int64)
+
+
+def _skill_scores(overlap, lengths, enabled):
+    """Componente de habilidades (peso 40) a partir de las coincidencias por fila"""
+    scores = np.zeros(len(lengths), dtype=np.float64)
+    if not enabled:
+        return scores
+    has_skills = lengths > 0
+    scores[has_skills] = overlap[has_skills] / lengths[has_skills] * 40
+    return scores
+
+
+class BatchMatchScorer:
+    """
+    Calcula en una sola pasada los mismos scores (0-100) que
+    JobMatchingService.calculate_match_score para 1 usuario x N trabajos
+    o para N usuarios x 1 trabajo.
+    """
+
+    def score_jobs(self, user, jobs):
+        """Scores de ``user`` contra cada trabajo de ``jobs`` (mismo orden)"""
+        jobs = list(jobs)
+        if not jobs:
+            return np.zeros(0, dtype=np.int64)
+
+        vocabulary = SkillVocabulary()
+        matrix = SkillMatrix([job.skills_required for job in jobs], vocabulary)
+        user_skills = user.skills or []
+        overlap = matrix.overlap_counts(vocabulary.mask_for(user_skills))
+        skill_scores = _skill_scores(overlap, matrix.lengths, bool(user_skills))
+
+        # Muchas vacantes comparten ubicación: se calcula una vez por valor distinto
+        location_cache = {}
+        location_scores = np.empty(len(jobs), dtype=np.float64)
+        for row, job in enumerate(jobs):
+            key = (job.location, job.remote_ok)
+            if key not in location_cache:
+                location_cache[key] = location_score(user.location, job.location, job.remote_ok)
+            location_scores[row] = location_cache[key]
+
+        user_level = level_index(detect_experience_level(user.experience))
+        job_levels = np.fromiter((level_index(job.experience_level) for job in jobs), dtype=np.int64, count=len(jobs))
+        experience_scores = EXPERIENCE_SCORE_TABLE[user_level, job_levels]
+
+        return _finalize(skill_scores, location_scores, experience_scores)
+
+    def score_users(self, job, users):
+        """Scores de cada usuario de ``users`` contra ``job`` (mismo orden)"""
+        users = list(users)
+        if not users:
+            return np.zeros(0, dtype=np.int64)
+
+        vocabulary = SkillVocabulary()
+        matrix = SkillMatrix([user.skills for user in users], vocabulary)
+        job_skills = job.skills_required or []
+        overlap = matrix.overlap_counts(vocabulary.mask_for(job_skills))
+
+        skill_scores = np.zeros(len(users), dtype=np.float64)
+        if job_skills:
+            has_skills = matrix.lengths > 0
+            # El denominador es la lista de habilidades del trabajo (con duplicados)
+            skill_scores[has_skills] = overlap[has_skills] / len(job_skills) * 40
+
+        location_cache = {}
+        location_scores = np.empty(len(users), dtype=np.float64)
+        for row, user in enumerate(users):
+            if user.location not in location_cache:
+                location_cache[user.location] = location_score(user.location, job.location, job.remote_ok)
+            location_scores[row] = location_cache[user.location]
+
+        job_level = level_index(job.experience_level)
+        user_levels = np.fromiter(
+            (level_index(detect_experience_level(user.experience)) for user in users),
+            dtype=np.int64,
+            count=len(users),
+        )
+        experience_scores = EXPERIENCE_SCORE_TABLE[user_levels, job_level]
+
+        return _finalize(skill_scores, location_scores, experience_scores)
@@ -0,0 +1,65 @@
+# Generated by Django 4.2.9 on 2026-10-17 21:46
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def backfill_job_skills(apps, schema_editor):
+    """Build the skill index for jobs created before it existed"""
+    Job = apps.get_model("jobs", "Job")
+    JobSkill = apps.get_model("jobs", "JobSkill")
+
+    batch = []
+    for job_id, skills in Job.objects.values_list("id", "skills_required").iterator():
+        names = {
+            skill.strip().lower()[:100]
+            for skill in skills or []
+            if isinstance(skill, str) and skill.strip()
+        }
+        batch.extend(JobSkill(job_id=job_id, name=name) for name in names)
+        if len(batch) >= 1000:
+            JobSkill.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    if batch:
+        JobSkill.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("jobs", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="JobSkill",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=100)),
+                (
+                    "job",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="skill_index",
+                        to="jobs.job",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["name", "job"], name="jobs_jobski_name_3570e4_idx"
+                    )
+                ],
+                "unique_together": {("job", "name")},
+            },
+        ),
+        migrations.RunPython(backfill_job_skills, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 4.2.9 on 2026-10-17 21:46
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+
+# Frozen copy of apps.jobs.models.SEARCH_CONFIGS / SEARCH_FIELD_WEIGHTS at the
+# time of this migration, so later changes to the model don't alter it
+SEARCH_CONFIGS = ("spanish", "english")
+SEARCH_FIELD_WEIGHTS = (
+    ("title", "A"),
+    ("skills_required", "B"),
+    ("company_name", "B"),
+    ("location", "C"),
+    ("description", "D"),
+)
+
+
+def backfill_search_vector(apps, schema_editor):
+    """Populate the search document for existing jobs"""
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    vector = None
+    for config in SEARCH_CONFIGS:
+        for field, weight in SEARCH_FIELD_WEIGHTS:
+            part = SearchVector(field, weight=weight, config=config)
+            vector = part if vector is None else vector + part
+    Job = apps.get_model("jobs", "Job")
+    Job.objects.update(search_vector=vector)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("jobs", "0002_jobskill"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="job",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(
+                editable=False, null=True
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="job",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["search_vector"], name="jobs_job_search_gin"
+            ),
+        ),
+        migrations.RunPython(backfill_search_vector, migrations.RunPython.noop),
+    ]
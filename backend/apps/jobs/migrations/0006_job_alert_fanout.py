@@ -0,0 +1,68 @@
+# Generated by Django 4.2.9 on 2026-10-17 21:54
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def mark_existing_jobs_dispatched(apps, schema_editor):
+    """Jobs published before the fan-out existed must not send alerts now"""
+    Job = apps.get_model("jobs", "Job")
+    Job.objects.update(alerts_dispatched_at=models.F("posted_at"))
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("jobs", "0005_userjobmatch"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="job",
+            name="alerts_dispatched_at",
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.CreateModel(
+            name="PendingJobAlert",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("score", models.PositiveSmallIntegerField()),
+                ("matching_skills", models.JSONField(default=list)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "job",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="pending_alerts",
+                        to="jobs.job",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="pending_job_alerts",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["user", "-score"], name="jobs_pendin_user_id_7594f3_idx"
+                    )
+                ],
+                "unique_together": {("user", "job")},
+            },
+        ),
+        migrations.RunPython(mark_existing_jobs_dispatched, migrations.RunPython.noop),
+    ]
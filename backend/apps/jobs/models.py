@@ -1,6 +1,31 @@
 import uuid
-from django.db import models
+from django.db import models, connection
 from django.conf import settings
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector, SearchVectorField
+
+
+# Text configurations used for full-text search (content is mostly Spanish, some English)
+SEARCH_CONFIGS = ('spanish', 'english')
+
+# Searchable fields and their rank weight
+SEARCH_FIELD_WEIGHTS = (
+    ('title', 'A'),
+    ('skills_required', 'B'),
+    ('company_name', 'B'),
+    ('location', 'C'),
+    ('description', 'D'),
+)
+
+
+def job_search_vector():
+    """Expression that builds the weighted tsvector stored in Job.search_vector"""
+    vector = None
+    for config in SEARCH_CONFIGS:
+        for field, weight in SEARCH_FIELD_WEIGHTS:
+            part = SearchVector(field, weight=weight, config=config)
+            vector = part if vector is None else vector + part
+    return vector
 
 
 class Job(models.Model):
@@ -52,15 +77,22 @@ class Job(models.Model):
     is_active = models.BooleanField(default=True)
     views_count = models.IntegerField(default=0)
     
+    # Set once alerts for this job have been fanned out to candidate users
+    alerts_dispatched_at = models.DateTimeField(null=True, blank=True, editable=False)
+    
     # SEO fields
     slug = models.SlugField(max_length=255, unique=True, blank=True)
     
+    # Full-text search document (maintained on save, PostgreSQL only)
+    search_vector = SearchVectorField(null=True, editable=False)
+    
     class Meta:
         ordering = ['-posted_at']
         indexes = [
             models.Index(fields=['-posted_at']),
             models.Index(fields=['is_active', '-posted_at']),
             models.Index(fields=['job_type', '-posted_at']),
+            GinIndex(fields=['search_vector'], name='jobs_job_search_gin'),
         ]
     
     def __str__(self):
@@ -73,6 +105,35 @@ class Job(models.Model):
             base_slug = slugify(f"{self.title}-{self.company_name}")
             self.slug = f"{base_slug}-{str(self.id)[:8]}"
         super().save(*args, **kwargs)
+        
+        # Keep the skill index and search document in sync unless this save didn't touch them
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'skills_required' in update_fields:
+            self.sync_skill_index()
+        if update_fields is None or {field for field, _ in SEARCH_FIELD_WEIGHTS} & set(update_fields):
+            self.update_search_vector()
+    
+    def update_search_vector(self):
+        """Recompute the stored tsvector for this job"""
+        if connection.vendor != 'postgresql':
+            return
+        Job.objects.filter(pk=self.pk).update(search_vector=job_search_vector())
+    
+    def sync_skill_index(self):
+        """Rewrite the JobSkill rows so they match skills_required"""
+        names = JobSkill.normalize_list(self.skills_required)
+        existing = set(self.skill_index.values_list('name', flat=True))
+        
+        stale = existing - names
+        if stale:
+            self.skill_index.filter(name__in=stale).delete()
+        
+        missing = names - existing
+        if missing:
+            JobSkill.objects.bulk_create(
+                [JobSkill(job=self, name=name) for name in missing],
+                ignore_conflicts=True
+            )
     
     @property
     def salary_range(self):
@@ -92,6 +153,100 @@ class Job(models.Model):
         return False
 
 
+class JobSkill(models.Model):
+    """Normalized skill index for jobs (one row per job and skill)"""
+    
+    job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name='skill_index')
+    name = models.CharField(max_length=100)
+    
+    class Meta:
+        unique_together = ['job', 'name']
+        indexes = [
+            models.Index(fields=['name', 'job']),
+        ]
+    
+    def __str__(self):
+        return f"{self.name} ({self.job_id})"
+    
+    @staticmethod
+    def normalize(skill):
+        """Normalized form used for exact skill lookups"""
+        if not isinstance(skill, str):
+            return ''
+        return skill.strip().lower()[:100]
+    
+    @classmethod
+    def normalize_list(cls, skills):
+        """Set of normalized, non-empty skill names"""
+        return {name for name in (cls.normalize(skill) for skill in skills or []) if name}
+    
+    @classmethod
+    def jobs_with_any(cls, skills):
+        """Subquery of job ids that require at least one of the given skills"""
+        return cls.objects.filter(name__in=cls.normalize_list(skills)).values('job_id')
+    
+    @classmethod
+    def jobs_with_all(cls, skills):
+        """Subquery of job ids that require every one of the given skills"""
+        names = cls.normalize_list(skills)
+        return cls.objects.filter(name__in=names).values('job_id').annotate(
+            matched=models.Count('id')
+        ).filter(matched=len(names)).values('job_id')
+
+
+class JobViewStat(models.Model):
+    """Daily view buckets per job, for employer analytics"""
+    
+    job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name='view_stats')
+    date = models.DateField()
+    views = models.IntegerField(default=0)
+    
+    class Meta:
+        unique_together = ['job', 'date']
+        ordering = ['-date']
+    
+    def __str__(self):
+        return f"{self.job_id} - {self.date}: {self.views} views"
+
+
+class UserJobMatch(models.Model):
+    """Materialized match score between a user and an active job (see match_index.py)"""
+    
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='job_matches')
+    job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name='user_matches')
+    score = models.PositiveSmallIntegerField()
+    matching_skills = models.JSONField(default=list)
+    computed_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        unique_together = ['user', 'job']
+        indexes = [
+            models.Index(fields=['user', '-score']),
+        ]
+    
+    def __str__(self):
+        return f"{self.user_id} - {self.job_id}: {self.score}%"
+
+
+class PendingJobAlert(models.Model):
+    """New job matches buffered for users with a daily or weekly digest"""
+    
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='pending_job_alerts')
+    job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name='pending_alerts')
+    score = models.PositiveSmallIntegerField()
+    matching_skills = models.JSONField(default=list)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        unique_together = ['user', 'job']
+        indexes = [
+            models.Index(fields=['user', '-score']),
+        ]
+    
+    def __str__(self):
+        return f"{self.user_id} - {self.job_id}: {self.score}%"
+
+
 class SavedJob(models.Model):
     """Track jobs saved by users"""
     
@@ -2,7 +2,37 @@ from rest_framework import serializers
 from .models import Job, SavedJob
 
 
-class JobSerializer(serializers.ModelSerializer):
+def get_saved_job_ids(request, jobs):
+    """
+    Ids of ``jobs`` saved by the requesting user, fetched in a single query.
+    Pass the result as ``saved_job_ids`` in the serializer context.
+    """
+    if not request or not request.user.is_authenticated:
+        return set()
+    job_ids = [job.pk for job in jobs]
+    if not job_ids:
+        return set()
+    return set(
+        SavedJob.objects.filter(user=request.user, job_id__in=job_ids).values_list('job_id', flat=True)
+    )
+
+
+class SavedJobFlagMixin:
+    """Resolves ``is_saved`` from the context when the view prefetched it"""
+    
+    def get_is_saved(self, obj):
+        """Check if current user has saved this job"""
+        saved_job_ids = self.context.get('saved_job_ids')
+        if saved_job_ids is not None:
+            return obj.pk in saved_job_ids
+        
+        request = self.context.get('request')
+        if request and request.user.is_authenticated:
+            return SavedJob.objects.filter(user=request.user, job=obj).exists()
+        return False
+
+
+class JobSerializer(SavedJobFlagMixin, serializers.ModelSerializer):
     """Serializer for Job model"""
     
     posted_by_name = serializers.CharField(source='posted_by.name', read_only=True)
@@ -23,13 +53,6 @@ class JobSerializer(serializers.ModelSerializer):
             'slug', 'is_expired', 'is_saved'
         ]
         read_only_fields = ['id', 'posted_by', 'posted_at', 'updated_at', 'views_count', 'slug']
-    
-    def get_is_saved(self, obj):
-        """Check if current user has saved this job"""
-        request = self.context.get('request')
-        if request and request.user.is_authenticated:
-            return SavedJob.objects.filter(user=request.user, job=obj).exists()
-        return False
 
 
 class JobCreateSerializer(serializers.ModelSerializer):
@@ -52,7 +75,7 @@ class JobCreateSerializer(serializers.ModelSerializer):
         return super().create(validated_data)
 
 
-class JobListSerializer(serializers.ModelSerializer):
+class JobListSerializer(SavedJobFlagMixin, serializers.ModelSerializer):
     """Simplified serializer for job listings"""
     
     posted_by_name = serializers.CharField(source='posted_by.name', read_only=True)
@@ -66,13 +89,6 @@ class JobListSerializer(serializers.ModelSerializer):
             'job_type', 'experience_level', 'salary_range', 'posted_by_name',
             'posted_at', 'slug', 'is_saved', 'views_count'
         ]
-    
-    def get_is_saved(self, obj):
-        """Check if current user has saved this job"""
-        request = self.context.get('request')
-        if request and request.user.is_authenticated:
-            return SavedJob.objects.filter(user=request.user, job=obj).exists()
-        return False
 
 
 class SavedJobSerializer(serializers.ModelSerializer):
@@ -1,9 +1,14 @@
 """
 Job Matching and Alert Services
 """
+from django.db import transaction
 from django.db.models import Q
 from django.utils import timezone
-from .models import Job
+from .models import Job, JobSkill, PendingJobAlert, UserJobMatch
+from .matching import (
+    ALERT_MIN_SCORE, BatchMatchScorer, EXPERIENCE_LEVEL_MAP, LEVELS_ORDER, MATCH_INDEX_MIN_SCORE,
+    MAX_SCORE_WITHOUT_SKILLS
+)
 from apps.notifications.models import Notification
 
 
@@ -50,17 +55,9 @@ class JobMatchingService:
             # Análisis simple del texto de experiencia
             experience_text = user.experience.lower()
             
-            experience_level_map = {
-                'entry': ['junior', 'entry', 'beginner', 'recién graduado', 'sin experiencia'],
-                'mid': ['mid', 'intermedio', 'intermediate', '2 años', '3 años', '4 años'],
-                'senior': ['senior', 'sénior', 'avanzado', 'experto', '5 años', '6 años', '7 años'],
-                'lead': ['lead', 'líder', 'jefe', 'gerente', 'manager'],
-                'executive': ['executive', 'director', 'ejecutivo', 'c-level', 'vp', 'ceo', 'cto'],
-            }
-            
             # Determinar nivel del usuario basado en palabras clave
             user_level = None
-            for level, keywords in experience_level_map.items():
+            for level, keywords in EXPERIENCE_LEVEL_MAP.items():
                 if any(keyword in experience_text for keyword in keywords):
                     user_level = level
                     break
@@ -69,11 +66,10 @@ class JobMatchingService:
             if user_level == job.experience_level:
                 score += 30
             # Si el usuario tiene un nivel superior (puede aplicar a junior siendo senior)
-            elif user_level and experience_level_map.keys():
-                levels_order = ['entry', 'mid', 'senior', 'lead', 'executive']
-                if user_level in levels_order and job.experience_level in levels_order:
-                    user_index = levels_order.index(user_level)
-                    job_index = levels_order.index(job.experience_level)
+            elif user_level:
+                if user_level in LEVELS_ORDER and job.experience_level in LEVELS_ORDER:
+                    user_index = LEVELS_ORDER.index(user_level)
+                    job_index = LEVELS_ORDER.index(job.experience_level)
                     if user_index > job_index:
                         score += 15  # Penalizar overqualification
                     elif user_index == job_index - 1:
@@ -82,27 +78,29 @@ class JobMatchingService:
         return min(round(score), 100)
     
     @staticmethod
-    def find_matching_jobs(user, min_score=60, limit=10):
+    def calculate_match_scores(user, jobs):
         """
-        Encuentra trabajos que coincidan con el perfil del usuario
+        Versión en lote de calculate_match_score: scores de un usuario contra N trabajos
+        (mismo orden que ``jobs``)
         """
-        from apps.users.models import JobAlertPreference
-        
-        # Obtener preferencias del usuario
-        try:
-            preferences = user.job_alert_preference
-        except JobAlertPreference.DoesNotExist:
-            # Crear preferencias por defecto
-            preferences = JobAlertPreference.objects.create(user=user)
-        
-        # Si las alertas están desactivadas, retornar lista vacía
-        if not preferences.is_enabled:
-            return []
-        
-        # Filtros base
-        jobs_query = Job.objects.filter(is_active=True)
+        return BatchMatchScorer().score_jobs(user, jobs).tolist()
+    
+    @staticmethod
+    def calculate_user_match_scores(job, users):
+        """
+        Versión en lote de calculate_match_score: scores de N usuarios contra un trabajo
+        (mismo orden que ``users``)
+        """
+        return BatchMatchScorer().score_users(job, users).tolist()
+    
+    @staticmethod
+    def apply_preference_filters(jobs_query, preferences):
+        """
+        Filtra un queryset de trabajos según las preferencias de alerta del usuario
+        """
+        if preferences is None:
+            return jobs_query
         
-        # Aplicar filtros de preferencias
         if preferences.remote_only:
             jobs_query = jobs_query.filter(remote_ok=True)
         
@@ -122,10 +120,95 @@ class JobMatchingService:
                 Q(salary_min__isnull=True, salary_max__isnull=True)
             )
         
-        # Calcular score para cada trabajo
+        return jobs_query
+    
+    @staticmethod
+    def job_matches_preferences(job, preferences):
+        """
+        Equivalente en memoria de apply_preference_filters para un solo trabajo
+        """
+        if preferences is None:
+            return True
+        
+        if preferences.remote_only and not job.remote_ok:
+            return False
+        
+        if preferences.preferred_job_types and job.job_type not in preferences.preferred_job_types:
+            return False
+        
+        if preferences.preferred_locations and not job.remote_ok:
+            job_location = job.location.lower()
+            if not any(location.lower() in job_location for location in preferences.preferred_locations):
+                return False
+        
+        if preferences.min_salary:
+            if job.salary_min is None and job.salary_max is None:
+                return True
+            return any(
+                salary is not None and salary >= preferences.min_salary
+                for salary in (job.salary_min, job.salary_max)
+            )
+        
+        return True
+    
+    @staticmethod
+    def find_matching_jobs(user, min_score=60, limit=10):
+        """
+        Encuentra trabajos que coincidan con el perfil del usuario.
+        
+        Lee los scores materializados en UserJobMatch. Se calculan en vivo los umbrales
+        por debajo de MATCH_INDEX_MIN_SCORE y los usuarios que aún no tienen filas en el
+        índice (recién creados o antes de correr rebuild_job_matches).
+        """
+        from apps.users.models import JobAlertPreference
+        
+        # Obtener preferencias del usuario
+        try:
+            preferences = user.job_alert_preference
+        except JobAlertPreference.DoesNotExist:
+            # Crear preferencias por defecto
+            preferences = JobAlertPreference.objects.create(user=user)
+        
+        # Si las alertas están desactivadas, retornar lista vacía
+        if not preferences.is_enabled:
+            return []
+        
+        if min_score < MATCH_INDEX_MIN_SCORE or not UserJobMatch.objects.filter(user=user).exists():
+            return JobMatchingService._compute_matching_jobs(user, preferences, min_score, limit)
+        
+        matches = UserJobMatch.objects.filter(
+            user=user,
+            score__gte=min_score,
+            job__is_active=True
+        ).select_related('job').order_by('-score', '-job__posted_at')[:limit]
+        
+        return [
+            {
+                'job': match.job,
+                'score': match.score,
+                'matching_skills': match.matching_skills
+            }
+            for match in matches
+        ]
+    
+    @staticmethod
+    def _compute_matching_jobs(user, preferences, min_score, limit):
+        """Calcula los matches en vivo contra todo el catálogo filtrado por preferencias"""
+        jobs_query = JobMatchingService.apply_preference_filters(Job.objects.filter(is_active=True), preferences)
+        
+        # Sin habilidades en común el score no supera MAX_SCORE_WITHOUT_SKILLS, así que
+        # para umbrales mayores basta con los trabajos que comparten alguna habilidad
+        if min_score > MAX_SCORE_WITHOUT_SKILLS:
+            if not JobSkill.normalize_list(user.skills):
+                return []
+            jobs_query = jobs_query.filter(id__in=JobSkill.jobs_with_any(user.skills))
+        
+        # Calcular el score de todo el catálogo filtrado en una sola pasada
+        jobs = list(jobs_query)
+        scores = JobMatchingService.calculate_match_scores(user, jobs)
+        
         matching_jobs = []
-        for job in jobs_query[:50]:  # Limitar a 50 para no sobrecargar
-            score = JobMatchingService.calculate_match_score(job, user)
+        for job, score in zip(jobs, scores):
             if score >= min_score:
                 matching_jobs.append({
                     'job': job,
@@ -154,14 +237,10 @@ class JobMatchingService:
         return matching
     
     @staticmethod
-    def send_job_alert(user, jobs_data):
+    def build_job_alert(user, jobs_data):
         """
-        Envía una notificación al usuario sobre nuevos trabajos relevantes
+        Construye (sin guardar) la notificación de alerta para los trabajos dados
         """
-        if not jobs_data:
-            return None
-        
-        # Crear notificación en la app
         top_job = jobs_data[0]['job']
         
         if len(jobs_data) == 1:
@@ -171,7 +250,7 @@ class JobMatchingService:
             title = f"¡{len(jobs_data)} nuevas vacantes para ti!"
             message = f"Incluyendo {top_job.title} en {top_job.company_name}"
         
-        notification = Notification.objects.create(
+        return Notification(
             recipient=user,
             notification_type='new_job',
             title=title,
@@ -190,6 +269,18 @@ class JobMatchingService:
             },
             action_url=f"/jobs/{top_job.id}"
         )
+    
+    @staticmethod
+    def send_job_alert(user, jobs_data):
+        """
+        Envía una notificación al usuario sobre nuevos trabajos relevantes
+        """
+        if not jobs_data:
+            return None
+        
+        # Crear notificación en la app
+        notification = JobMatchingService.build_job_alert(user, jobs_data)
+        notification.save()
         
         # Actualizar última alerta enviada
         from apps.users.models import JobAlertPreference
@@ -261,3 +352,158 @@ class JobMatchingService:
             return JobMatchingService.send_job_alert(user, recent_matches)
         
         return None
+
+
+class JobAlertFanoutService:
+    """
+    Alertas push: cuando se publica un trabajo se buscan los usuarios candidatos
+    (índice de habilidades UserSkill + filtros de preferencias) y solo esos se puntúan
+    """
+    
+    BATCH_SIZE = 2000
+    
+    @staticmethod
+    def candidate_users(job):
+        """
+        Usuarios con alertas activas que comparten alguna habilidad con el trabajo.
+        Los filtros de preferencias que se pueden expresar en SQL se aplican aquí;
+        el resto se verifica con JobMatchingService.job_matches_preferences
+        """
+        from apps.users.models import User, UserSkill
+        
+        names = JobSkill.normalize_list(job.skills_required)
+        if not names:
+            return User.objects.none()
+        
+        users = User.objects.filter(
+            is_active=True,
+            id__in=UserSkill.objects.filter(name__in=names).values('user_id'),
+            job_alert_preference__is_enabled=True,
+            job_alert_preference__frequency__in=['instant', 'daily', 'weekly'],
+        )
+        
+        if not job.remote_ok:
+            users = users.filter(job_alert_preference__remote_only=False)
+        
+        salaries = [salary for salary in (job.salary_min, job.salary_max) if salary is not None]
+        if salaries:
+            users = users.filter(
+                Q(job_alert_preference__min_salary__isnull=True) |
+                Q(job_alert_preference__min_salary__lte=max(salaries))
+            )
+        
+        return users.select_related('job_alert_preference').order_by('pk')
+    
+    @staticmethod
+    def claim_jobs(jobs_query, now):
+        """
+        Marca con alerts_dispatched_at los trabajos de ``jobs_query`` que todavía no
+        generaron alertas y los retorna. Es la marca que comparten dispatch_job_alerts y
+        check_new_job_recommendations: cada trabajo se alerta una sola vez, por el primero
+        que lo reclame
+        """
+        with transaction.atomic():
+            # Las filas que otro proceso está reclamando se saltan; al confirmar ya estarán marcadas
+            jobs = list(
+                jobs_query.filter(alerts_dispatched_at__isnull=True).select_for_update(skip_locked=True)
+            )
+            if jobs:
+                Job.objects.filter(pk__in=[job.pk for job in jobs]).update(alerts_dispatched_at=now)
+        return jobs
+    
+    @staticmethod
+    def release_jobs(jobs):
+        """Deshace claim_jobs para que el siguiente intento vuelva a procesar los trabajos"""
+        Job.objects.filter(pk__in=[job.pk for job in jobs]).update(alerts_dispatched_at=None)
+    
+    @staticmethod
+    def dispatch_job_alerts(job):
+        """
+        Envía las alertas instantáneas de un trabajo y deja en el buffer de resumen
+        (PendingJobAlert) las de usuarios con frecuencia diaria o semanal.
+        Cada trabajo se procesa una sola vez (Job.alerts_dispatched_at).
+        """
+        now = timezone.now()
+        if not JobAlertFanoutService.claim_jobs(Job.objects.filter(pk=job.pk, is_active=True), now):
+            return {'instant': 0, 'digest': 0}
+        
+        totals = {'instant': 0, 'digest': 0}
+        try:
+            batch = []
+            for user in JobAlertFanoutService.candidate_users(job).iterator(chunk_size=JobAlertFanoutService.BATCH_SIZE):
+                batch.append(user)
+                if len(batch) == JobAlertFanoutService.BATCH_SIZE:
+                    JobAlertFanoutService._dispatch_batch(job, batch, now, totals)
+                    batch = []
+            if batch:
+                JobAlertFanoutService._dispatch_batch(job, batch, now, totals)
+        except Exception:
+            # Liberar el trabajo para que el siguiente intento lo procese de nuevo
+            JobAlertFanoutService.release_jobs([job])
+            raise
+        
+        return totals
+    
+    @staticmethod
+    def _dispatch_batch(job, users, now, totals):
+        from apps.users.models import JobAlertPreference
+        
+        scores = JobMatchingService.calculate_user_match_scores(job, users)
+        
+        notifications = []
+        pending = []
+        for user, score in zip(users, scores):
+            preferences = user.job_alert_preference
+            if score < ALERT_MIN_SCORE or not JobMatchingService.job_matches_preferences(job, preferences):
+                continue
+            
+            job_data = {
+                'job': job,
+                'score': score,
+                'matching_skills': JobMatchingService._get_matching_skills(job, user)
+            }
+            if preferences.frequency == 'instant':
+                notifications.append(JobMatchingService.build_job_alert(user, [job_data]))
+            else:
+                pending.append(PendingJobAlert(user=user, **job_data))
+        
+        if notifications:
+            Notification.objects.bulk_create(notifications, batch_size=1000)
+            JobAlertPreference.objects.filter(
+                user_id__in=[notification.recipient_id for notification in notifications]
+            ).update(last_alert_sent=now)
+        if pending:
+            PendingJobAlert.objects.bulk_create(pending, batch_size=1000, ignore_conflicts=True)
+        
+        totals['instant'] += len(notifications)
+        totals['digest'] += len(pending)
+    
+    @staticmethod
+    def send_pending_digest(user):
+        """
+        Envía en una sola notificación los trabajos acumulados en el buffer del usuario
+        y vacía el buffer
+        """
+        pending = list(
+            PendingJobAlert.objects.filter(user=user, job__is_active=True)
+            .select_related('job')
+            .order_by('-score', '-created_at')
+        )
+        
+        notification = None
+        if pending:
+            notification = JobMatchingService.send_job_alert(user, [
+                {
+                    'job': alert.job,
+                    'score': alert.score,
+                    'matching_skills': alert.matching_skills
+                }
+                for alert in pending
+            ])
+        
+        # Descartar lo enviado y los trabajos que ya no están activos
+        PendingJobAlert.objects.filter(user=user).filter(
+            Q(pk__in=[alert.pk for alert in pending]) | Q(job__is_active=False)
+        ).delete()
+        
+        return notification
@@ -0,0 +1,47 @@
+"""
+Signals for Jobs App
+"""
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from apps.users.models import User, JobAlertPreference
+from joby_api.field_tracking import enqueue_after_commit, fields_changed, loaded_value, track_fields
+from .match_index import USER_MATCH_FIELDS, JOB_MATCH_FIELDS, PREFERENCE_MATCH_FIELDS
+from .models import Job
+
+track_fields(User, USER_MATCH_FIELDS)
+track_fields(Job, JOB_MATCH_FIELDS)
+track_fields(JobAlertPreference, PREFERENCE_MATCH_FIELDS)
+
+
+@receiver(post_save, sender=Job)
+def job_saved(sender, instance, created, update_fields=None, **kwargs):
+    """
+    Rescore a job against every user when it is created or a matching field changes,
+    and fan out its alerts the first time it is published
+    """
+    from .tasks import dispatch_job_alerts, refresh_job_match_index
+    
+    if fields_changed(instance, JOB_MATCH_FIELDS, created, update_fields):
+        enqueue_after_commit(refresh_job_match_index, str(instance.pk))
+    
+    was_active = not created and loaded_value(instance, 'is_active', True)
+    if instance.is_active and not was_active and instance.alerts_dispatched_at is None:
+        enqueue_after_commit(dispatch_job_alerts, str(instance.pk))
+
+
+@receiver(post_save, sender=User)
+def refresh_matches_for_user(sender, instance, created, update_fields=None, **kwargs):
+    """Rescore a user against every job when skills, location or experience change"""
+    if fields_changed(instance, USER_MATCH_FIELDS, created, update_fields):
+        from .tasks import refresh_user_match_index
+        enqueue_after_commit(refresh_user_match_index, str(instance.pk))
+
+
+@receiver(post_save, sender=JobAlertPreference)
+def refresh_matches_for_preferences(sender, instance, created, update_fields=None, **kwargs):
+    """Rebuild the user's matches when the job filters of their alert preferences change"""
+    # Default preferences don't filter anything, so a new row changes no match
+    if not created and fields_changed(instance, PREFERENCE_MATCH_FIELDS, created, update_fields):
+        from .tasks import refresh_user_match_index
+        enqueue_after_commit(refresh_user_match_index, str(instance.user_id))
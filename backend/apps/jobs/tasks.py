@@ -0,0 +1,75 @@
+"""
+Celery tasks for jobs
+"""
+from celery import shared_task
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def flush_job_view_counts():
+    """
+    Aplica a la base de datos las vistas de trabajos acumuladas en el buffer.
+    Se ejecuta cada minuto.
+    """
+    from .view_counter import flush_job_views
+    
+    flushed = flush_job_views()
+    if flushed:
+        logger.info(f"Flushed {flushed} job views")
+    return f"Flushed {flushed} job views"
+
+
+@shared_task
+def refresh_job_match_index(job_id):
+    """
+    Recalcula los matches materializados de un trabajo contra todos los usuarios.
+    Se encola al crear o editar un trabajo.
+    """
+    from .models import Job
+    from .match_index import refresh_job_matches
+    
+    try:
+        job = Job.objects.get(pk=job_id)
+    except Job.DoesNotExist:
+        return f"Job {job_id} no longer exists"
+    
+    kept = refresh_job_matches(job)
+    return f"Stored {kept} matches for job {job_id}"
+
+
+@shared_task
+def refresh_user_match_index(user_id):
+    """
+    Recalcula los matches materializados de un usuario contra todos los trabajos activos.
+    Se encola cuando cambian sus habilidades, ubicación, experiencia o preferencias de alertas.
+    """
+    from apps.users.models import User
+    from .match_index import refresh_user_matches
+    
+    try:
+        user = User.objects.get(pk=user_id)
+    except User.DoesNotExist:
+        return f"User {user_id} no longer exists"
+    
+    kept = refresh_user_matches(user)
+    return f"Stored {kept} matches for user {user_id}"
+
+
+@shared_task
+def dispatch_job_alerts(job_id):
+    """
+    Envía las alertas de un trabajo recién publicado (o activado) a los usuarios candidatos.
+    """
+    from .models import Job
+    from .services import JobAlertFanoutService
+    
+    try:
+        job = Job.objects.get(pk=job_id)
+    except Job.DoesNotExist:
+        return f"Job {job_id} no longer exists"
+    
+    totals = JobAlertFanoutService.dispatch_job_alerts(job)
+    logger.info(f"Job {job_id}: {totals['instant']} instant alerts, {totals['digest']} digest entries")
+    return f"Sent {totals['instant']} alerts and buffered {totals['digest']} digest entries for job {job_id}"
@@ -0,0 +1,318 @@
+"""
+Tests for Jobs App
+"""
+import random
+from unittest import mock
+
+import redis
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework.test import APIClient
+
+from apps.jobs.matching import LEVELS_ORDER, MATCH_INDEX_MIN_SCORE
+from apps.jobs.models import Job, JobSkill, JobViewStat, PendingJobAlert, SavedJob, UserJobMatch
+from apps.jobs.services import JobAlertFanoutService, JobMatchingService
+from apps.jobs.view_counter import flush_job_views, get_view_buffer
+from apps.notifications.models import Notification
+from apps.users.models import JobAlertPreference, User
+from joby_api.factories import make_job, make_user
+from joby_api.testing import assert_max_queries
+
+SKILLS = ['Python', 'python', 'Django', 'SQL', 'React', 'AWS', 'Docker', 'Excel']
+LOCATIONS = [None, '', 'Bogotá, Colombia', 'Medellín, Colombia', 'Lima, Perú', 'Bogotá']
+EXPERIENCES = [None, '', 'Junior developer', '3 años en backend', 'Senior engineer', 'Tech lead', 'CTO', 'Estudiante']
+
+
+def random_user(rng):
+    return User(
+        skills=rng.sample(SKILLS, rng.randint(0, 4)),
+        location=rng.choice(LOCATIONS),
+        experience=rng.choice(EXPERIENCES),
+    )
+
+
+def random_job(rng):
+    return Job(
+        skills_required=rng.sample(SKILLS, rng.randint(0, 4)) + rng.sample(SKILLS, rng.randint(0, 1)),
+        location=rng.choice(LOCATIONS) or 'Remoto',
+        remote_ok=rng.random() < 0.3,
+        experience_level=rng.choice(LEVELS_ORDER + ['unknown']),
+    )
+
+
+class BatchMatchScorerTests(SimpleTestCase):
+    """El scorer vectorizado debe dar exactamente los mismos scores que calculate_match_score"""
+
+    def setUp(self):
+        rng = random.Random(1)
+        self.users = [random_user(rng) for _ in range(40)]
+        self.jobs = [random_job(rng) for _ in range(60)]
+
+    def test_score_jobs_matches_scalar_version(self):
+        for user in self.users:
+            expected = [JobMatchingService.calculate_match_score(job, user) for job in self.jobs]
+            self.assertEqual(JobMatchingService.calculate_match_scores(user, self.jobs), expected)
+
+    def test_score_users_matches_scalar_version(self):
+        for job in self.jobs:
+            expected = [JobMatchingService.calculate_match_score(job, user) for user in self.users]
+            self.assertEqual(JobMatchingService.calculate_user_match_scores(job, self.users), expected)
+
+    def test_empty_batches(self):
+        self.assertEqual(JobMatchingService.calculate_match_scores(self.users[0], []), [])
+        self.assertEqual(JobMatchingService.calculate_user_match_scores(self.jobs[0], []), [])
+
+
+class JobSkillIndexTests(TestCase):
+
+    def setUp(self):
+        self.poster = make_user()
+        self.client = APIClient()
+
+    def test_index_follows_skills_required(self):
+        job = make_job(self.poster, skills_required=['Python', ' python ', 'Django'])
+        self.assertEqual(set(job.skill_index.values_list('name', flat=True)), {'python', 'django'})
+
+        job.skills_required = ['Django', 'SQL']
+        job.save(update_fields=['skills_required'])
+        self.assertEqual(set(job.skill_index.values_list('name', flat=True)), {'django', 'sql'})
+
+    def test_skills_filter_is_exact_and_requires_every_skill(self):
+        java = make_job(self.poster, skills_required=['Java', 'SQL'])
+        make_job(self.poster, skills_required=['JavaScript', 'SQL'])
+        make_job(self.poster, skills_required=['Java'])
+
+        response = self.client.get('/api/jobs/', {'skills': 'java,sql'})
+
+        self.assertEqual([job['id'] for job in response.data['results']], [str(java.id)])
+
+    def test_jobs_with_any(self):
+        python = make_job(self.poster, skills_required=['Python'])
+        make_job(self.poster, skills_required=['Go'])
+        job_ids = set(JobSkill.jobs_with_any(['PYTHON', 'Rust']).values_list('job_id', flat=True))
+        self.assertEqual(job_ids, {python.id})
+
+
+class JobFullTextSearchTests(TestCase):
+
+    def setUp(self):
+        self.poster = make_user()
+        self.client = APIClient()
+
+    def search(self, q):
+        response = self.client.get('/api/jobs/', {'q': q})
+        return [job['id'] for job in response.data['results']]
+
+    def test_title_match_ranks_above_description_match(self):
+        in_description = make_job(self.poster, title='Analista', description='Trabajo con Django y Python')
+        in_title = make_job(self.poster, title='Desarrollador Django', description='APIs REST')
+        make_job(self.poster, title='Diseñador', description='Figma')
+
+        self.assertEqual(self.search('django'), [str(in_title.id), str(in_description.id)])
+
+    def test_words_match_as_prefixes_and_all_are_required(self):
+        job = make_job(self.poster, title='Ingeniero de datos', skills_required=['PostgreSQL'])
+        make_job(self.poster, title='Ingeniero frontend', skills_required=['React'])
+
+        self.assertEqual(self.search('ingen postgres'), [str(job.id)])
+
+    def test_search_vector_follows_edits(self):
+        job = make_job(self.poster, title='Contador')
+        job.title = 'Community manager'
+        job.save(update_fields=['title'])
+
+        self.assertEqual(self.search('community'), [str(job.id)])
+        self.assertEqual(self.search('contador'), [])
+
+
+class SavedFlagQueryTests(TestCase):
+    """is_saved se resuelve con una consulta por página, no una por trabajo"""
+
+    def setUp(self):
+        self.user = make_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        poster = make_user()
+        self.jobs = [make_job(poster, title=f'Job {index}') for index in range(12)]
+        for job in self.jobs[::3]:
+            SavedJob.objects.create(user=self.user, job=job)
+
+    def test_list_flags_saved_jobs(self):
+        response = self.client.get('/api/jobs/')
+        saved = {job['id'] for job in response.data['results'] if job['is_saved']}
+        self.assertEqual(saved, {str(job.id) for job in self.jobs[::3]})
+
+    def test_list_query_count_does_not_grow_with_the_page(self):
+        # Count + page + saved flags
+        with assert_max_queries(3):
+            self.client.get('/api/jobs/')
+
+    def test_my_jobs_stays_constant_and_flags_saved_jobs(self):
+        own_jobs = [make_job(self.user, title=f'Mi empleo {index}') for index in range(6)]
+        for job in own_jobs[::2]:
+            SavedJob.objects.create(user=self.user, job=job)
+
+        # Jobs + saved flags
+        with assert_max_queries(2):
+            response = self.client.get('/api/jobs/my_jobs/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), 6)
+        saved = {job['id'] for job in response.data if job['is_saved']}
+        self.assertEqual(saved, {str(job.id) for job in own_jobs[::2]})
+
+    def test_recommended_stays_constant_and_flags_saved_jobs(self):
+        python_jobs = [make_job(make_user(), title=f'Python {index}', skills_required=['Python']) for index in range(4)]
+        SavedJob.objects.create(user=self.user, job=python_jobs[1])
+        self.user.skills = ['Python']
+        self.user.save()
+
+        with assert_max_queries(2):
+            response = self.client.get('/api/jobs/recommended/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual({job['id'] for job in response.data}, {str(job.id) for job in python_jobs})
+        self.assertEqual([job['id'] for job in response.data if job['is_saved']], [str(python_jobs[1].id)])
+
+
+class JobViewCounterTests(TestCase):
+
+    def setUp(self):
+        get_view_buffer().drain()
+        self.poster = make_user()
+        self.job = make_job(self.poster)
+        self.client = APIClient()
+
+    def test_views_are_buffered_then_flushed_in_bulk(self):
+        for _ in range(3):
+            self.client.get(f'/api/jobs/{self.job.id}/')
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.views_count, 0)
+
+        self.assertEqual(flush_job_views(), 3)
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.views_count, 3)
+        self.assertEqual(JobViewStat.objects.get(job=self.job).views, 3)
+        self.assertEqual(flush_job_views(), 0)
+
+    @override_settings(JOB_VIEW_COUNTER_BACKEND='redis')
+    def test_detail_still_loads_when_the_buffer_is_down(self):
+        with mock.patch('joby_api.redis_client.get_redis', side_effect=redis.ConnectionError('down')):
+            with self.assertLogs('apps.jobs.view_counter', 'ERROR'):
+                response = self.client.get(f'/api/jobs/{self.job.id}/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['id'], str(self.job.id))
+
+    def test_view_stats_validates_days(self):
+        self.client.force_authenticate(self.poster)
+        url = f'/api/jobs/{self.job.id}/view_stats/'
+
+        self.assertEqual(self.client.get(url, {'days': 'abc'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'days': '-5'}).status_code, 200)
+        self.assertEqual(self.client.get(url, {'days': '100000'}).status_code, 200)
+
+    def test_view_stats_is_owner_only(self):
+        self.client.force_authenticate(make_user())
+        response = self.client.get(f'/api/jobs/{self.job.id}/view_stats/')
+        self.assertEqual(response.status_code, 403)
+
+
+class UserJobMatchIndexTests(TestCase):
+    """UserJobMatch guarda los mismos scores (>= MATCH_INDEX_MIN_SCORE) que el cálculo en vivo"""
+
+    def setUp(self):
+        self.poster = make_user()
+
+    def stored_scores(self, **filters):
+        return dict(UserJobMatch.objects.filter(**filters).values_list('job_id', 'score'))
+
+    def live_scores(self, user):
+        preferences = JobAlertPreference.objects.get_or_create(user=user)[0]
+        matches = JobMatchingService._compute_matching_jobs(user, preferences, MATCH_INDEX_MIN_SCORE, limit=1000)
+        return {match['job'].id: match['score'] for match in matches}
+
+    def test_new_job_is_scored_against_users(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            user = make_user(skills=['Python', 'Django'], location='Bogotá, Colombia', experience='3 años')
+            make_user(skills=['Excel'], location='Lima, Perú')
+            job = make_job(self.poster, skills_required=['Python', 'Django'], experience_level='mid')
+
+        stored = dict(UserJobMatch.objects.filter(job=job).values_list('user_id', 'score'))
+        self.assertEqual(stored, {user.id: JobMatchingService.calculate_match_score(job, user)})
+
+    def test_profile_change_rebuilds_the_user_rows(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            user = make_user(skills=['Python'], location='Bogotá, Colombia', experience='Senior')
+            for skills in (['Python'], ['Python', 'SQL'], ['React'], ['SQL']):
+                make_job(self.poster, skills_required=skills, experience_level='senior')
+        before = self.stored_scores(user=user)
+        self.assertEqual(before, self.live_scores(user))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            user.skills = ['SQL', 'React']
+            user.save()
+        self.assertNotEqual(self.stored_scores(user=user), before)
+        self.assertEqual(self.stored_scores(user=user), self.live_scores(user))
+
+    def test_deactivated_job_drops_its_rows(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            make_user(skills=['Python'], location='Bogotá, Colombia')
+            job = make_job(self.poster, skills_required=['Python'])
+        self.assertTrue(UserJobMatch.objects.filter(job=job).exists())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            job.is_active = False
+            job.save()
+        self.assertFalse(UserJobMatch.objects.filter(job=job).exists())
+
+    def test_users_missing_from_the_index_are_matched_live(self):
+        # Sin ejecutar los on_commit: el índice no llegó a llenarse
+        user = make_user(skills=['Python', 'Django'], location='Bogotá, Colombia', experience='3 años')
+        job = make_job(self.poster, skills_required=['Python', 'Django'], experience_level='mid')
+        self.assertFalse(UserJobMatch.objects.filter(user=user).exists())
+
+        matches = JobMatchingService.find_matching_jobs(user, min_score=60)
+
+        self.assertEqual([(match['job'], match['score']) for match in matches], [(job, self.live_scores(user)[job.id])])
+
+
+class JobAlertFanoutTests(TestCase):
+
+    def setUp(self):
+        self.poster = make_user()
+        self.instant = self.candidate(frequency='instant')
+        self.daily = self.candidate(frequency='daily')
+        self.remote_only = self.candidate(frequency='instant', remote_only=True)
+        self.other_skills = make_user(skills=['Contabilidad'], location='Bogotá, Colombia', experience='3 años')
+
+    def candidate(self, **preferences):
+        user = make_user(skills=['Python', 'Django'], location='Bogotá, Colombia', experience='3 años')
+        JobAlertPreference.objects.update_or_create(user=user, defaults=preferences)
+        return user
+
+    def test_publishing_a_job_alerts_only_matching_candidates(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            job = make_job(self.poster, skills_required=['Python', 'Django'], experience_level='mid')
+
+        alerted = set(Notification.objects.filter(notification_type='new_job').values_list('recipient_id', flat=True))
+        self.assertEqual(alerted, {self.instant.id})
+        self.assertEqual(
+            list(PendingJobAlert.objects.values_list('user_id', 'job_id')), [(self.daily.id, job.id)]
+        )
+        job.refresh_from_db()
+        self.assertIsNotNone(job.alerts_dispatched_at)
+
+    def test_a_job_is_dispatched_once(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            job = make_job(self.poster, skills_required=['Python', 'Django'], experience_level='mid')
+
+        self.assertEqual(JobAlertFanoutService.dispatch_job_alerts(job), {'instant': 0, 'digest': 0})
+        self.assertEqual(Notification.objects.filter(notification_type='new_job').count(), 1)
+
+    def test_digest_sends_and_empties_the_buffer(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            make_job(self.poster, skills_required=['Python', 'Django'], experience_level='mid')
+
+        notification = JobAlertFanoutService.send_pending_digest(self.daily)
+        self.assertEqual(notification.recipient, self.daily)
+        self.assertFalse(PendingJobAlert.objects.filter(user=self.daily).exists())
@@ -0,0 +1,168 @@
+"""
+Buffered (write-behind) view counter for job detail pages.
+
+Views are accumulated outside the database and flushed periodically with one
+``views_count = views_count + n`` UPDATE per distinct increment, plus per-day
+buckets in JobViewStat.
+"""
+import logging
+import threading
+import time
+import uuid
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Job, JobViewStat
+
+logger = logging.getLogger(__name__)
+
+
+class LocalViewBuffer:
+    """In-process buffer; each worker flushes its own counts (tests and single-process setups)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = Counter()
+        self._last_flush = time.monotonic()
+
+    def add(self, job_id, day):
+        with self._lock:
+            self._pending[(str(job_id), day.isoformat())] += 1
+
+    def merge(self, counts):
+        with self._lock:
+            self._pending.update(counts)
+
+    def drain(self):
+        with self._lock:
+            pending, self._pending = self._pending, Counter()
+            self._last_flush = time.monotonic()
+        return dict(pending)
+
+    def flush_due(self):
+        return time.monotonic() - self._last_flush >= settings.JOB_VIEW_FLUSH_INTERVAL_SECONDS
+
+
+class RedisViewBuffer:
+    """Buffer shared by all workers in a Redis hash, flushed by Celery"""
+
+    key = 'jobs:views:pending'
+
+    def _client(self):
+        from joby_api.redis_client import get_redis
+        return get_redis()
+
+    def add(self, job_id, day):
+        self._client().hincrby(self.key, f'{job_id}|{day.isoformat()}', 1)
+
+    def merge(self, counts):
+        pipe = self._client().pipeline()
+        for (job_id, day), views in counts.items():
+            pipe.hincrby(self.key, f'{job_id}|{day}', views)
+        pipe.execute()
+
+    def drain(self):
+        import redis
+
+        client = self._client()
+        flushing_key = f'{self.key}:flushing:{uuid.uuid4().hex}'
+        try:
+            # RENAME is atomic: views recorded from now on go to a fresh hash
+            client.rename(self.key, flushing_key)
+        except redis.ResponseError:
+            return {}  # Nothing pending
+
+        raw = client.hgetall(flushing_key)
+        client.delete(flushing_key)
+
+        pending = {}
+        for field, views in raw.items():
+            job_id, day = field.split('|')
+            pending[(job_id, day)] = int(views)
+        return pending
+
+    def flush_due(self):
+        return False  # Flushed by the periodic Celery task
+
+
+_local_buffer = LocalViewBuffer()
+
+
+def get_view_buffer():
+    """Buffer selected by settings.JOB_VIEW_COUNTER_BACKEND"""
+    if settings.JOB_VIEW_COUNTER_BACKEND == 'redis':
+        return RedisViewBuffer()
+    return _local_buffer
+
+
+def record_job_view(job):
+    """Count a detail view without writing to the database"""
+    buffer = get_view_buffer()
+    try:
+        buffer.add(job.pk, timezone.localdate())
+        if buffer.flush_due():
+            flush_job_views(buffer)
+    except Exception as e:
+        # A dropped view is better than failing the job detail page
+        logger.error(f"Could not record view for job {job.pk}: {str(e)}")
+
+
+def flush_job_views(buffer=None):
+    """
+    Apply buffered views to Job.views_count and the daily JobViewStat buckets.
+    Returns the number of views flushed.
+    """
+    buffer = buffer or get_view_buffer()
+    pending = buffer.drain()
+    if not pending:
+        return 0
+
+    try:
+        _apply_views(pending)
+    except Exception:
+        # Put the counts back so the next flush retries them
+        buffer.merge(pending)
+        raise
+
+    return sum(pending.values())
+
+
+def _apply_views(pending):
+    job_totals = Counter()
+    for (job_id, day), views in pending.items():
+        job_totals[job_id] += views
+
+    # Jobs deleted since they were viewed are dropped
+    existing = {
+        str(job_id) for job_id in Job.objects.filter(pk__in=list(job_totals)).values_list('pk', flat=True)
+    }
+
+    jobs_by_increment = defaultdict(list)
+    for job_id, views in job_totals.items():
+        if job_id in existing:
+            jobs_by_increment[views].append(job_id)
+
+    buckets_by_increment = defaultdict(list)
+    for (job_id, day), views in pending.items():
+        if job_id in existing:
+            buckets_by_increment[(day, views)].append(job_id)
+
+    with transaction.atomic():
+        for views, job_ids in jobs_by_increment.items():
+            Job.objects.filter(pk__in=job_ids).update(views_count=F('views_count') + views)
+
+        # Make sure every bucket exists, then add to all of them with F() updates
+        JobViewStat.objects.bulk_create(
+            [
+                JobViewStat(job_id=job_id, date=day, views=0)
+                for (day, _), job_ids in buckets_by_increment.items()
+                for job_id in job_ids
+            ],
+            ignore_conflicts=True
+        )
+        for (day, views), job_ids in buckets_by_increment.items():
+            JobViewStat.objects.filter(date=day, job_id__in=job_ids).update(views=F('views') + views)
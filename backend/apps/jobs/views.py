@@ -2,29 +2,40 @@ from rest_framework import viewsets, status, filters
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, IsAuthenticatedOrReadOnly
-from django.db.models import Q
+from django.utils import timezone
 from django_filters.rest_framework import DjangoFilterBackend
+from datetime import timedelta
 
-from .models import Job, SavedJob
+from .filters import JobFullTextSearchFilter
+from .view_counter import record_job_view
+from .models import Job, JobSkill, JobViewStat, SavedJob
 from .serializers import (
-    JobSerializer, JobCreateSerializer, JobListSerializer, SavedJobSerializer
+    JobSerializer, JobCreateSerializer, JobListSerializer, SavedJobSerializer,
+    get_saved_job_ids
 )
 
+# Days of history returned by view_stats
+VIEW_STATS_DEFAULT_DAYS = 30
+VIEW_STATS_MAX_DAYS = 365
+
 
 class JobViewSet(viewsets.ModelViewSet):
     """
     ViewSet for Job CRUD operations
     
-    list: Get all active jobs
-    retrieve: Get a specific job (increments view count)
+    list: Get all active jobs (?q= for ranked full-text search, ?search= for plain matching)
+    retrieve: Get a specific job (counts a view, flushed to the database in the background)
     create: Create a new job (authenticated users only)
     update/partial_update: Update a job (owner only)
     destroy: Delete a job (owner only)
     """
     
-    queryset = Job.objects.filter(is_active=True)
+    queryset = Job.objects.filter(is_active=True).select_related('posted_by')
     permission_classes = [IsAuthenticatedOrReadOnly]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    query_budget = {'default': 10, 'create': 15, 'update': 15, 'partial_update': 15, 'destroy': 15}
+    filter_backends = [
+        DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter, JobFullTextSearchFilter
+    ]
     filterset_fields = ['job_type', 'experience_level', 'remote_ok']
     search_fields = ['title', 'company_name', 'location', 'description', 'skills_required']
     ordering_fields = ['posted_at', 'views_count', 'salary_min']
@@ -37,11 +48,27 @@ class JobViewSet(viewsets.ModelViewSet):
             return JobCreateSerializer
         return JobSerializer
     
+    def get_job_list_context(self, jobs):
+        """Serializer context with the saved flags for ``jobs`` prefetched"""
+        context = self.get_serializer_context()
+        context['saved_job_ids'] = get_saved_job_ids(self.request, jobs)
+        return context
+    
+    def list(self, request, *args, **kwargs):
+        """List jobs, resolving is_saved for the whole page in one query"""
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        jobs = page if page is not None else list(queryset)
+        
+        serializer = self.get_serializer(jobs, many=True, context=self.get_job_list_context(jobs))
+        if page is not None:
+            return self.get_paginated_response(serializer.data)
+        return Response(serializer.data)
+    
     def retrieve(self, request, *args, **kwargs):
-        """Increment view count when job is retrieved"""
+        """Record a view (buffered, no database write) when job is retrieved"""
         instance = self.get_object()
-        instance.views_count += 1
-        instance.save(update_fields=['views_count'])
+        record_job_view(instance)
         serializer = self.get_serializer(instance)
         return Response(serializer.data)
     
@@ -49,12 +76,12 @@ class JobViewSet(viewsets.ModelViewSet):
         """Filter jobs based on query parameters"""
         queryset = super().get_queryset()
         
-        # Filter by skills
+        # Filter by skills (exact match through the skill index, all skills required)
         skills = self.request.query_params.get('skills', None)
         if skills:
             skill_list = skills.split(',')
-            for skill in skill_list:
-                queryset = queryset.filter(skills_required__icontains=skill.strip())
+            if JobSkill.normalize_list(skill_list):
+                queryset = queryset.filter(id__in=JobSkill.jobs_with_all(skill_list))
         
         # Filter by salary range
         min_salary = self.request.query_params.get('min_salary', None)
@@ -75,8 +102,8 @@ class JobViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'], permission_classes=[IsAuthenticated])
     def my_jobs(self, request):
         """Get jobs posted by the current user"""
-        queryset = Job.objects.filter(posted_by=request.user)
-        serializer = JobListSerializer(queryset, many=True, context={'request': request})
+        jobs = list(Job.objects.filter(posted_by=request.user).select_related('posted_by'))
+        serializer = JobListSerializer(jobs, many=True, context=self.get_job_list_context(jobs))
         return Response(serializer.data)
     
     @action(detail=False, methods=['get'], permission_classes=[IsAuthenticated])
@@ -91,16 +118,39 @@ class JobViewSet(viewsets.ModelViewSet):
             # If no skills, return recent jobs
             queryset = self.get_queryset()[:10]
         else:
-            # Filter jobs that match user skills
-            query = Q()
-            for skill in user_skills:
-                query |= Q(skills_required__icontains=skill)
-            
-            queryset = self.get_queryset().filter(query).distinct()[:20]
+            # Filter jobs that share at least one skill with the user
+            queryset = self.get_queryset().filter(
+                id__in=JobSkill.jobs_with_any(user_skills)
+            )[:20]
         
-        serializer = JobListSerializer(queryset, many=True, context={'request': request})
+        jobs = list(queryset)
+        serializer = JobListSerializer(jobs, many=True, context=self.get_job_list_context(jobs))
         return Response(serializer.data)
     
+    @action(detail=True, methods=['get'], permission_classes=[IsAuthenticated])
+    def view_stats(self, request, pk=None):
+        """Get daily views for a job (owner only)"""
+        job = self.get_object()
+        if job.posted_by != request.user:
+            return Response(
+                {'error': 'Only the job poster can see view statistics'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        try:
+            days = int(request.query_params.get('days', VIEW_STATS_DEFAULT_DAYS))
+        except ValueError:
+            return Response({'error': 'days must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+        days = min(max(days, 1), VIEW_STATS_MAX_DAYS)
+        since = timezone.localdate() - timedelta(days=days - 1)
+        stats = JobViewStat.objects.filter(job=job, date__gte=since).values('date', 'views')
+        
+        return Response({
+            'job_id': str(job.id),
+            'views_count': job.views_count,
+            'daily': list(stats)
+        })
+    
     @action(detail=True, methods=['post'], permission_classes=[IsAuthenticated])
     def save(self, request, pk=None):
         """Save a job to user's saved jobs"""
@@ -152,6 +202,20 @@ class SavedJobViewSet(viewsets.ReadOnlyModelViewSet):
     
     serializer_class = SavedJobSerializer
     permission_classes = [IsAuthenticated]
+    query_budget = 5
     
     def get_queryset(self):
-        return SavedJob.objects.filter(user=self.request.user)
+        return SavedJob.objects.filter(user=self.request.user).select_related('job__posted_by')
+    
+    def list(self, request, *args, **kwargs):
+        """List saved jobs; every nested job is saved by definition"""
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        saved_jobs = page if page is not None else list(queryset)
+        
+        context = self.get_serializer_context()
+        context['saved_job_ids'] = {saved_job.job_id for saved_job in saved_jobs}
+        serializer = self.get_serializer(saved_jobs, many=True, context=context)
+        if page is not None:
+            return self.get_paginated_response(serializer.data)
+        return Response(serializer.data)
@@ -89,7 +89,6 @@ class NotificationService:
     def send_application_status_notification(application):
         """Send notification when application status changes"""
         user = application.applicant
-        job = application.job
         
         status_messages = {
             'reviewed': 'Your application is being reviewed',
@@ -104,11 +103,11 @@ class NotificationService:
         return NotificationService.create_notification(
             recipient=user,
             notification_type='application_status',
-            title=f'Application Update: {job.title}',
+            title=f'Application Update: {application.job_title}',
             message=message,
             data={
                 'application_id': str(application.id),
-                'job_id': str(job.id),
+                'job_id': str(application.job_id),
                 'status': application.status
             },
             action_url=f'/applications/{application.id}'
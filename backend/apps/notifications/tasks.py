@@ -6,121 +6,200 @@ from django.utils import timezone
 from django.db.models import Q
 from datetime import timedelta
 import logging
+import time
 
 logger = logging.getLogger(__name__)
 
 
+STREAK_REMINDER_BATCH_SIZE = 1000
+
+
+def _streak_reminder(user_id, current_streak):
+    """Notificación in-app de recordatorio de racha (sin guardar)"""
+    from apps.notifications.models import Notification
+    
+    return Notification(
+        recipient_id=user_id,
+        notification_type='reminder',
+        title='¡No olvides tu reto del día! 🔥',
+        message=f'Tienes una racha de {current_streak} días. ¡No la pierdas! Completa tu reto diario ahora.',
+        data={
+            'current_streak': current_streak,
+            'type': 'daily_streak_reminder'
+        },
+        action_url='/streak'
+    )
+
+
 @shared_task
 def send_streak_reminders():
     """
     Envía recordatorios a usuarios que no han completado el reto del día.
     Se ejecuta diariamente a las 8:00 PM.
+    
+    Una sola consulta selecciona las rachas sin actividad hoy de usuarios activos
+    con recordatorios activados; las notificaciones se crean con bulk_create por lotes.
     """
-    from apps.users.models import User
     from apps.streaks.models import Streak
-    from apps.notifications.models import Notification, NotificationPreference
+    from apps.notifications.models import Notification
     
+    started = time.monotonic()
     today = timezone.now().date()
     
-    # Obtener usuarios activos que tienen preferencias de recordatorios activadas
-    users_to_notify = User.objects.filter(
-        is_active=True,
-        notification_preferences__push_reminders=True
-    ).select_related('streak', 'notification_preferences')
+    # Rachas sin actividad hoy, con las preferencias unidas en la misma consulta
+    pending_streaks = Streak.objects.filter(
+        Q(last_activity_date__isnull=True) | Q(last_activity_date__lt=today),
+        user__is_active=True,
+        user__notification_preferences__push_reminders=True
+    ).values_list('user_id', 'current_streak')
     
     notifications_sent = 0
+    batch = []
+    for user_id, current_streak in pending_streaks.iterator(chunk_size=STREAK_REMINDER_BATCH_SIZE):
+        batch.append(_streak_reminder(user_id, current_streak))
+        if len(batch) == STREAK_REMINDER_BATCH_SIZE:
+            Notification.objects.bulk_create(batch)
+            notifications_sent += len(batch)
+            batch = []
+    if batch:
+        Notification.objects.bulk_create(batch)
+        notifications_sent += len(batch)
     
-    for user in users_to_notify:
-        try:
-            # Verificar si el usuario ya completó el reto hoy
-            streak = user.streak
-            
-            # Si no hay actividad hoy, enviar recordatorio
-            if not streak.last_activity_date or streak.last_activity_date < today:
-                # Crear notificación in-app
-                Notification.objects.create(
-                    recipient=user,
-                    notification_type='reminder',
-                    title='¡No olvides tu reto del día! 🔥',
-                    message=f'Tienes una racha de {streak.current_streak} días. ¡No la pierdas! Completa tu reto diario ahora.',
-                    data={
-                        'current_streak': streak.current_streak,
-                        'type': 'daily_streak_reminder'
-                    },
-                    action_url='/streak'
-                )
-                
-                # TODO: Enviar push notification si hay token FCM disponible
-                # send_push_notification.delay(user.id, 'daily_streak_reminder')
-                
-                notifications_sent += 1
-                logger.info(f"Streak reminder sent to {user.email}")
-                
-        except Exception as e:
-            logger.error(f"Error sending streak reminder to {user.email}: {str(e)}")
+    # TODO: Enviar push notification si hay token FCM disponible
+    # send_push_notification.delay(user.id, 'daily_streak_reminder')
     
-    logger.info(f"Streak reminders task completed. {notifications_sent} notifications sent.")
+    elapsed = time.monotonic() - started
+    logger.info(f"Streak reminders task completed. {notifications_sent} notifications sent in {elapsed:.2f}s.")
     return f"Sent {notifications_sent} streak reminders"
 
 
+NEW_JOB_RECOMMENDATION_BATCH_SIZE = 2000
+
+
+def _new_job_recommendation(user_id, matches):
+    """Notificación in-app personalizada con los trabajos nuevos que coinciden (sin guardar)"""
+    from apps.notifications.models import Notification
+    
+    job_count = len(matches)
+    top_job, top_score = matches[0]
+    plural = 's' if job_count > 1 else ''
+    
+    if job_count == 1:
+        message = f'{top_job.title} en {top_job.company_name} coincide {top_score}% con tu perfil.'
+    else:
+        message = f'{top_job.title} en {top_job.company_name} ({top_score}% match) y {job_count - 1} más coinciden con tu perfil.'
+    
+    return Notification(
+        recipient_id=user_id,
+        notification_type='new_job',
+        title=f'¡{job_count} nuevo{plural} trabajo{plural} para ti! 💼',
+        message=message,
+        data={
+            'job_count': job_count,
+            'jobs': [
+                {
+                    'id': str(job.id),
+                    'title': job.title,
+                    'company': job.company_name,
+                    'score': score
+                }
+                for job, score in matches[:5]  # Máximo 5 trabajos en la notificación
+            ],
+            'type': 'new_jobs_available'
+        },
+        action_url=f'/jobs/{top_job.id}' if job_count == 1 else '/jobs'
+    )
+
+
+def _send_new_job_recommendations(new_jobs, users):
+    """Puntúa un lote de usuarios contra los trabajos nuevos y crea sus notificaciones en bloque"""
+    from apps.jobs.matching import ALERT_MIN_SCORE
+    from apps.jobs.services import JobMatchingService
+    from apps.notifications.models import Notification
+    
+    matches_by_user = {user.id: [] for user in users}
+    for job in new_jobs:
+        scores = JobMatchingService.calculate_user_match_scores(job, users)
+        for user, score in zip(users, scores):
+            if score >= ALERT_MIN_SCORE:
+                matches_by_user[user.id].append((job, score))
+    
+    notifications = []
+    for user in users:
+        matches = matches_by_user[user.id]
+        # TODO: Enviar push notification si push_new_jobs está activo
+        if matches and user.notification_preferences.inapp_new_jobs:
+            matches.sort(key=lambda match: match[1], reverse=True)
+            notifications.append(_new_job_recommendation(user.id, matches))
+    
+    Notification.objects.bulk_create(notifications, batch_size=1000)
+    return len(notifications)
+
+
 @shared_task
 def check_new_job_recommendations():
     """
     Verifica nuevos trabajos que coincidan con los perfiles de usuarios
     y envía notificaciones.
     Se ejecuta cada 6 horas.
+    
+    Los trabajos nuevos se cargan una sola vez y se puntúan en lote contra los usuarios
+    que comparten alguna habilidad con ellos (con ALERT_MIN_SCORE por encima del máximo
+    sin habilidades, el resto no puede coincidir).
+    
+    Solo se consideran los trabajos que el fan-out de alertas (dispatch_job_alerts) no
+    procesó todavía, y se marcan igual que él con alerts_dispatched_at, así un usuario
+    no recibe dos alertas del mismo trabajo.
     """
-    from apps.users.models import User
-    from apps.jobs.models import Job
-    from apps.notifications.models import Notification, NotificationPreference
+    from apps.users.models import User, UserSkill
+    from apps.jobs.models import Job, JobSkill
+    from apps.jobs.services import JobAlertFanoutService
     
-    # Obtener trabajos publicados en las últimas 6 horas
-    six_hours_ago = timezone.now() - timedelta(hours=6)
-    new_jobs = Job.objects.filter(
-        posted_date__gte=six_hours_ago,
-        status='open'
+    # Obtener trabajos publicados en las últimas 6 horas que nadie alertó todavía
+    now = timezone.now()
+    six_hours_ago = now - timedelta(hours=6)
+    new_jobs = JobAlertFanoutService.claim_jobs(
+        Job.objects.filter(posted_at__gte=six_hours_ago, is_active=True),
+        now
     )
     
-    if not new_jobs.exists():
-        logger.info("No new jobs found in the last 6 hours.")
+    if not new_jobs:
+        logger.info("No new jobs without alerts found in the last 6 hours.")
         return "No new jobs to notify"
     
-    # Obtener usuarios activos con notificaciones de nuevos trabajos activadas
+    skill_names = set()
+    for job in new_jobs:
+        skill_names |= JobSkill.normalize_list(job.skills_required)
+    
+    # Usuarios activos con notificaciones de nuevos trabajos activadas y alguna habilidad en común
     users_to_notify = User.objects.filter(
+        Q(notification_preferences__push_new_jobs=True) | Q(notification_preferences__inapp_new_jobs=True),
         is_active=True,
-        notification_preferences__push_new_jobs=True
-    ).select_related('notification_preferences')
+        id__in=UserSkill.objects.filter(name__in=skill_names).values('user_id')
+    ).only(
+        'id', 'skills', 'location', 'experience', 'notification_preferences__inapp_new_jobs'
+    ).select_related('notification_preferences').order_by('pk')
     
     notifications_sent = 0
+    batch = []
+    try:
+        if skill_names:
+            for user in users_to_notify.iterator(chunk_size=NEW_JOB_RECOMMENDATION_BATCH_SIZE):
+                batch.append(user)
+                if len(batch) == NEW_JOB_RECOMMENDATION_BATCH_SIZE:
+                    notifications_sent += _send_new_job_recommendations(new_jobs, batch)
+                    batch = []
+            if batch:
+                notifications_sent += _send_new_job_recommendations(new_jobs, batch)
+    except Exception:
+        # Liberar los trabajos para que la próxima ejecución los procese de nuevo
+        JobAlertFanoutService.release_jobs(new_jobs)
+        raise
     
-    for user in users_to_notify:
-        try:
-            # TODO: Implementar lógica de matching basada en skills del usuario
-            # Por ahora, notificar sobre los trabajos más recientes
-            
-            job_count = new_jobs.count()
-            
-            if job_count > 0:
-                # Crear notificación in-app
-                Notification.objects.create(
-                    recipient=user,
-                    notification_type='new_job',
-                    title=f'¡{job_count} nuevo{"s" if job_count > 1 else ""} trabajo{"s" if job_count > 1 else ""}! 💼',
-                    message=f'Hay {job_count} nuevo{"s" if job_count > 1 else ""} trabajo{"s" if job_count > 1 else ""} que podrían interesarte.',
-                    data={
-                        'job_count': job_count,
-                        'type': 'new_jobs_available'
-                    },
-                    action_url='/jobs'
-                )
-                
-                notifications_sent += 1
-                logger.info(f"New job notification sent to {user.email}")
-                
-        except Exception as e:
-            logger.error(f"Error sending job notification to {user.email}: {str(e)}")
-    
-    logger.info(f"New job notifications task completed. {notifications_sent} notifications sent.")
+    logger.info(
+        f"New job notifications task completed. {len(new_jobs)} new jobs, "
+        f"{notifications_sent} notifications sent."
+    )
     return f"Sent {notifications_sent} new job notifications"
 
 
@@ -163,6 +242,17 @@ def send_achievement_notification(user_id, achievement_id):
         return f"Error: {str(e)}"
 
 
+APPLICATION_STATUS_MESSAGES = {
+    'pending': 'Tu aplicación está siendo revisada',
+    'reviewing': 'Tu aplicación está en proceso de revisión',
+    'interview': '¡Felicidades! Has sido seleccionado para una entrevista',
+    'accepted': '¡Excelente noticia! Tu aplicación fue aceptada',
+    'rejected': 'Gracias por aplicar. Lamentablemente no fuiste seleccionado esta vez',
+}
+
+DEFAULT_APPLICATION_STATUS_MESSAGE = 'El estado de tu aplicación ha cambiado'
+
+
 @shared_task
 def send_application_status_notification(user_id, application_id, new_status):
     """
@@ -174,28 +264,20 @@ def send_application_status_notification(user_id, application_id, new_status):
     
     try:
         user = User.objects.get(id=user_id)
-        application = Application.objects.select_related('job').get(id=application_id)
+        application = Application.objects.get(id=application_id)
         
-        status_messages = {
-            'pending': 'Tu aplicación está siendo revisada',
-            'reviewing': 'Tu aplicación está en proceso de revisión',
-            'interview': '¡Felicidades! Has sido seleccionado para una entrevista',
-            'accepted': '¡Excelente noticia! Tu aplicación fue aceptada',
-            'rejected': 'Gracias por aplicar. Lamentablemente no fuiste seleccionado esta vez',
-        }
-        
-        message = status_messages.get(new_status, 'El estado de tu aplicación ha cambiado')
+        message = APPLICATION_STATUS_MESSAGES.get(new_status, DEFAULT_APPLICATION_STATUS_MESSAGE)
         
         # Crear notificación in-app
         Notification.objects.create(
             recipient=user,
             notification_type='application_status',
-            title=f'Actualización: {application.job.title}',
+            title=f'Actualización: {application.job_title}',
             message=message,
             data={
                 'application_id': str(application.id),
-                'job_id': str(application.job.id),
-                'job_title': application.job.title,
+                'job_id': str(application.job_id),
+                'job_title': application.job_title,
                 'new_status': new_status,
                 'type': 'application_status_update'
             },
@@ -213,6 +295,51 @@ def send_application_status_notification(user_id, application_id, new_status):
         return f"Error: {str(e)}"
 
 
+@shared_task
+def send_application_status_notifications(change_ids):
+    """
+    Crea en bloque las notificaciones de un lote de cambios de estado
+    (ApplicationStatusChange), p. ej. al rechazar todas las aplicaciones restantes.
+    """
+    from apps.applications.models import ApplicationStatusChange
+    from apps.notifications.models import Notification, NotificationPreference
+    
+    changes = list(
+        ApplicationStatusChange.objects.filter(id__in=change_ids).select_related('application')
+    )
+    applicant_ids = {change.application.applicant_id for change in changes}
+    opted_out = set(
+        NotificationPreference.objects.filter(
+            user_id__in=applicant_ids,
+            inapp_application_updates=False
+        ).values_list('user_id', flat=True)
+    )
+    
+    # TODO: Enviar push notification si push_application_updates está activo
+    notifications = [
+        Notification(
+            recipient_id=change.application.applicant_id,
+            notification_type='application_status',
+            title=f'Actualización: {change.application.job_title}',
+            message=APPLICATION_STATUS_MESSAGES.get(change.to_status, DEFAULT_APPLICATION_STATUS_MESSAGE),
+            data={
+                'application_id': str(change.application_id),
+                'job_id': str(change.application.job_id),
+                'job_title': change.application.job_title,
+                'new_status': change.to_status,
+                'type': 'application_status_update'
+            },
+            action_url=f'/applications/{change.application_id}'
+        )
+        for change in changes
+        if change.application.applicant_id not in opted_out
+    ]
+    Notification.objects.bulk_create(notifications, batch_size=1000)
+    
+    logger.info(f"Sent {len(notifications)} application status notifications")
+    return f"Sent {len(notifications)} application status notifications"
+
+
 @shared_task
 def send_streak_milestone_notification(user_id, streak_days):
     """
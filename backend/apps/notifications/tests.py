@@ -0,0 +1,113 @@
+"""
+Tests for Notifications App
+"""
+from datetime import timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+
+from apps.applications.models import Application
+from apps.jobs.services import JobAlertFanoutService
+from apps.notifications.models import Notification, NotificationPreference
+from apps.notifications.services import NotificationService
+from apps.notifications.tasks import check_new_job_recommendations, send_streak_reminders
+from apps.streaks.models import Streak
+from apps.users.models import JobAlertPreference
+from joby_api.factories import make_job, make_user
+from joby_api.testing import assert_max_queries
+
+
+class StreakReminderTests(TestCase):
+
+    def make_streak(self, last_activity_date, push_reminders=True, is_active=True):
+        user = make_user(is_active=is_active)
+        NotificationPreference.objects.create(user=user, push_reminders=push_reminders)
+        Streak.objects.create(user=user, current_streak=4, last_activity_date=last_activity_date)
+        return user
+
+    def test_reminds_only_users_without_activity_today(self):
+        today = timezone.now().date()
+        pending = self.make_streak(today - timedelta(days=1))
+        never = self.make_streak(None)
+        self.make_streak(today)
+        self.make_streak(today - timedelta(days=1), push_reminders=False)
+        self.make_streak(today - timedelta(days=1), is_active=False)
+
+        send_streak_reminders()
+
+        reminded = set(Notification.objects.filter(notification_type='reminder').values_list('recipient_id', flat=True))
+        self.assertEqual(reminded, {pending.id, never.id})
+
+    def test_query_count_does_not_grow_with_users(self):
+        yesterday = timezone.now().date() - timedelta(days=1)
+        for _ in range(15):
+            self.make_streak(yesterday)
+
+        # One SELECT and one bulk INSERT
+        with assert_max_queries(2):
+            send_streak_reminders()
+        self.assertEqual(Notification.objects.filter(notification_type='reminder').count(), 15)
+
+
+class NewJobRecommendationTests(TestCase):
+
+    def setUp(self):
+        self.poster = make_user()
+        self.user = make_user(skills=['Python', 'Django'], location='Bogotá, Colombia', experience='3 años')
+        NotificationPreference.objects.create(user=self.user)
+        JobAlertPreference.objects.filter(user=self.user).update(frequency='instant')
+
+    def new_job_alerts(self):
+        return Notification.objects.filter(recipient=self.user, notification_type='new_job').count()
+
+    def test_recommends_jobs_not_alerted_yet_and_marks_them(self):
+        # Sin ejecutar los on_commit: el fan-out de alertas no llegó a correr
+        job = make_job(self.poster, skills_required=['Python', 'Django'])
+
+        check_new_job_recommendations()
+
+        self.assertEqual(self.new_job_alerts(), 1)
+        job.refresh_from_db()
+        self.assertIsNotNone(job.alerts_dispatched_at)
+        self.assertEqual(JobAlertFanoutService.dispatch_job_alerts(job), {'instant': 0, 'digest': 0})
+        self.assertEqual(self.new_job_alerts(), 1)
+
+    def test_skips_jobs_already_alerted_by_the_fanout(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            make_job(self.poster, skills_required=['Python', 'Django'])
+        self.assertEqual(self.new_job_alerts(), 1)
+
+        check_new_job_recommendations()
+
+        self.assertEqual(self.new_job_alerts(), 1)
+
+    def test_ignores_jobs_without_shared_skills(self):
+        make_job(self.poster, skills_required=['Contabilidad'])
+        check_new_job_recommendations()
+        self.assertEqual(self.new_job_alerts(), 0)
+
+
+class NotificationServiceTests(TestCase):
+
+    def setUp(self):
+        self.poster = make_user()
+        self.user = make_user()
+        self.job = make_job(self.poster, title='Data Engineer', company_name='Globex')
+
+    def test_new_job_notification_points_at_the_job(self):
+        notification = NotificationService.send_new_job_notification(self.user, self.job)
+
+        self.assertEqual(notification.data, {'job_id': str(self.job.id), 'company': 'Globex'})
+        self.assertEqual(notification.action_url, f'/jobs/{self.job.id}')
+
+    def test_status_notification_reads_the_snapshot(self):
+        application = Application.objects.create(job=self.job, applicant=self.user, status='interview')
+        job_id = self.job.id
+        self.job.delete()
+        application.refresh_from_db()
+
+        notification = NotificationService.send_application_status_notification(application)
+
+        self.assertEqual(notification.title, 'Application Update: Data Engineer')
+        self.assertEqual(notification.data['application_id'], str(application.id))
+        self.assertNotEqual(notification.data['job_id'], str(job_id))
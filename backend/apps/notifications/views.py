@@ -16,6 +16,7 @@ class NotificationViewSet(viewsets.ModelViewSet):
     
     serializer_class = NotificationSerializer
     permission_classes = [IsAuthenticated]
+    query_budget = 5
     
     def get_queryset(self):
         return Notification.objects.filter(recipient=self.request.user)
@@ -83,6 +84,7 @@ class PushNotificationTokenViewSet(viewsets.ModelViewSet):
     
     serializer_class = PushNotificationTokenSerializer
     permission_classes = [IsAuthenticated]
+    query_budget = 5
     
     def get_queryset(self):
         return PushNotificationToken.objects.filter(user=self.request.user)
@@ -124,6 +126,7 @@ class NotificationPreferenceViewSet(viewsets.ModelViewSet):
     
     serializer_class = NotificationPreferenceSerializer
     permission_classes = [IsAuthenticated]
+    query_budget = 5
     
     def get_queryset(self):
         return NotificationPreference.objects.filter(user=self.request.user)
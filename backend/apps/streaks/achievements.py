@@ -0,0 +1,169 @@
+"""
+Achievement rule engine.
+
+Active achievements are kept in memory grouped by requirement_type, with their
+thresholds sorted, so checking a counter is a bisect instead of a scan over
+every achievement.
+"""
+import time
+from bisect import bisect_right
+
+from django.db import transaction
+
+from apps.users.models_referral import PointsTransaction
+from apps.users.points import record_transactions
+from .models import Achievement, UserAchievement
+
+# requirement_type -> Streak field it is compared against ('total_points' uses User.points)
+STREAK_COUNTERS = {
+    'streak_days': 'current_streak',
+    'longest_streak': 'longest_streak',
+    'total_logins': 'total_logins',
+    'total_applications': 'total_applications',
+    'total_profile_updates': 'total_profile_updates',
+    'total_jobs_saved': 'total_jobs_saved',
+    'total_jobs_viewed': 'total_jobs_viewed',
+}
+POINTS_REQUIREMENT = 'total_points'
+
+# Activity recorded by StreakService.record_activity -> requirement_type of the counter it bumps
+ACTIVITY_REQUIREMENTS = {
+    'login': 'total_logins',
+    'application': 'total_applications',
+    'profile_update': 'total_profile_updates',
+    'job_saved': 'total_jobs_saved',
+    'job_viewed': 'total_jobs_viewed',
+}
+STREAK_REQUIREMENTS = ('streak_days', 'longest_streak')
+
+# Other processes pick up admin changes to achievements after this many seconds
+ACHIEVEMENT_RULES_TTL = 300
+
+
+class AchievementRules:
+    """Active achievements grouped by requirement_type, sorted by requirement_value"""
+
+    def __init__(self, achievements):
+        grouped = {}
+        for achievement in sorted(achievements, key=lambda a: a.requirement_value):
+            grouped.setdefault(achievement.requirement_type, []).append(achievement)
+        self._achievements = grouped
+        self._thresholds = {
+            requirement_type: [a.requirement_value for a in group]
+            for requirement_type, group in grouped.items()
+        }
+
+    def requirement_types(self):
+        return list(self._achievements)
+
+    def reached(self, requirement_type, value):
+        """Achievements of the given type whose threshold is <= value"""
+        thresholds = self._thresholds.get(requirement_type)
+        if not thresholds:
+            return []
+        return self._achievements[requirement_type][:bisect_right(thresholds, value)]
+
+
+_rules_cache = {'rules': None, 'loaded_at': 0.0}
+
+
+def get_achievement_rules():
+    """Cached rule table, reloaded every ACHIEVEMENT_RULES_TTL seconds or when invalidated"""
+    rules = _rules_cache['rules']
+    if rules is None or time.monotonic() - _rules_cache['loaded_at'] > ACHIEVEMENT_RULES_TTL:
+        rules = AchievementRules(Achievement.objects.filter(is_active=True))
+        _rules_cache['rules'] = rules
+        _rules_cache['loaded_at'] = time.monotonic()
+    return rules
+
+
+def invalidate_achievement_rules():
+    _rules_cache['rules'] = None
+
+
+def _counter_value(requirement_type, user, streak):
+    if requirement_type == POINTS_REQUIREMENT:
+        return user.points
+    field = STREAK_COUNTERS.get(requirement_type)
+    return getattr(streak, field) if field else None
+
+
+def evaluate_achievements(user, streak, requirement_types=None):
+    """
+    Grant every achievement reached by the given requirement types (all of them
+    when None). Unlocks, bonus points and their history are written in one
+    transaction; bonus points that reach 'total_points' thresholds are granted in
+    the same pass instead of recursing. Returns the newly earned achievements.
+    """
+    from apps.users.models import User
+
+    rules = get_achievement_rules()
+    if requirement_types is None:
+        requirement_types = rules.requirement_types()
+
+    requirement_types = set(requirement_types)
+    candidates = []
+    for requirement_type in requirement_types:
+        value = _counter_value(requirement_type, user, streak)
+        if value is not None:
+            candidates.extend(rules.reached(requirement_type, value))
+    if not candidates:
+        return []
+
+    with transaction.atomic():
+        # Lock the user so concurrent checks can't grant the same bonus twice
+        points = User.objects.select_for_update().filter(pk=user.pk).values_list('points', flat=True).get()
+        earned_ids = set(UserAchievement.objects.filter(user=user).values_list('achievement_id', flat=True))
+
+        # Points thresholds are checked against the locked value, not the caller's copy
+        candidates = [a for a in candidates if a.requirement_type != POINTS_REQUIREMENT]
+        if POINTS_REQUIREMENT in requirement_types:
+            candidates.extend(rules.reached(POINTS_REQUIREMENT, points))
+
+        new_achievements = []
+        bonus_total = 0
+        while candidates:
+            unlocked = list({
+                achievement.id: achievement for achievement in candidates if achievement.id not in earned_ids
+            }.values())
+            if not unlocked:
+                break
+            earned_ids.update(achievement.id for achievement in unlocked)
+            new_achievements.extend(unlocked)
+
+            bonus = sum(achievement.points_reward for achievement in unlocked if achievement.points_reward > 0)
+            if not bonus:
+                break
+            bonus_total += bonus
+            candidates = rules.reached(POINTS_REQUIREMENT, points + bonus_total)
+
+        if not new_achievements:
+            return []
+
+        UserAchievement.objects.bulk_create([
+            UserAchievement(user=user, achievement=achievement) for achievement in new_achievements
+        ])
+
+        if bonus_total:
+            record_transactions(user, [
+                PointsTransaction(
+                    transaction_type='achievement',
+                    points=achievement.points_reward,
+                    description=f"Achievement unlocked: {achievement.name}"
+                )
+                for achievement in new_achievements
+                if achievement.points_reward > 0
+            ])
+        else:
+            user.points = points
+
+        transaction.on_commit(lambda: _notify_unlocked(user, new_achievements))
+
+    return new_achievements
+
+
+def _notify_unlocked(user, achievements):
+    from apps.notifications.tasks import send_achievement_notification
+
+    for achievement in achievements:
+        send_achievement_notification.delay(str(user.id), str(achievement.id))
@@ -0,0 +1,167 @@
+"""
+Batched activity ingestion.
+
+Clients upload timestamped activity events (ActivityEvent) in batches. A worker
+folds all pending events of a user into the Streak counters, the progress of
+active challenges and the achievements in a single transaction, instead of one
+request and several writes per action.
+"""
+import datetime
+from collections import Counter
+
+from django.db import transaction
+from django.utils import timezone
+
+from apps.users.models_referral import PointsTransaction
+from apps.users.points import record_transactions
+from .achievements import ACTIVITY_REQUIREMENTS, POINTS_REQUIREMENT, STREAK_COUNTERS, STREAK_REQUIREMENTS, evaluate_achievements
+from .challenges import ACTIVITY_TARGET_ACTIONS, notify_completed_challenges
+from .models import ActivityEvent, Streak, UserChallenge
+
+LOGIN_BONUS_POINTS = 5
+STREAK_MILESTONES = (7, 14, 30, 60, 90, 100)
+
+# Processed events are kept this long (useful to debug client uploads), then deleted
+ACTIVITY_EVENT_RETENTION_DAYS = 30
+
+# Uploads can't carry events older than this, so a client can't backfill streak days
+ACTIVITY_EVENT_MAX_AGE_HOURS = 48
+
+
+def activity_day(occurred_at):
+    """Streak day of an event; same calendar as timezone.now().date() in check_and_update_streak"""
+    return occurred_at.astimezone(datetime.timezone.utc).date()
+
+
+def last_processed_at(user):
+    """occurred_at of the latest event of ``user`` already folded, or None"""
+    return ActivityEvent.objects.filter(user=user, processed_at__isnull=False).order_by(
+        '-occurred_at'
+    ).values_list('occurred_at', flat=True).first()
+
+
+def fold_activity_events(user):
+    """
+    Apply every pending event of ``user`` in occurred_at order. Returns the
+    number of events processed.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        # The streak row lock serializes workers folding the same user
+        streak, created = Streak.objects.select_for_update().get_or_create(user=user)
+        events = list(
+            ActivityEvent.objects.filter(user=user, processed_at__isnull=True).order_by('occurred_at', 'received_at')
+        )
+        if not events:
+            return 0
+
+        counters = Counter()
+        milestones = []
+        login_bonuses = 0
+        streak_updated = False
+        actions = []  # (target_action, occurred_at)
+        for event in events:
+            previous = streak.current_streak
+            if streak.check_and_update_streak(save=False, today=activity_day(event.occurred_at)):
+                streak_updated = True
+                if event.activity_type == 'login':
+                    login_bonuses += 1
+                if streak.current_streak > previous and streak.current_streak in STREAK_MILESTONES:
+                    milestones.append(streak.current_streak)
+                actions.append(('maintain_streak', event.occurred_at))
+            counters[STREAK_COUNTERS[ACTIVITY_REQUIREMENTS[event.activity_type]]] += 1
+            target_action = ACTIVITY_TARGET_ACTIONS.get(event.activity_type)
+            if target_action:
+                actions.append((target_action, event.occurred_at))
+
+        for field, count in counters.items():
+            setattr(streak, field, getattr(streak, field) + count)
+        streak.save()
+
+        history = [
+            PointsTransaction(transaction_type='login', points=LOGIN_BONUS_POINTS, description='Daily login bonus')
+            for _ in range(login_bonuses)
+        ]
+        completed = _advance_challenges(user, actions, now)
+        history.extend(
+            PointsTransaction(
+                transaction_type='challenge_complete',
+                points=user_challenge.points_earned,
+                description=f"Reto completado: {user_challenge.challenge.title}"
+            )
+            for user_challenge in completed
+        )
+
+        changed = {ACTIVITY_REQUIREMENTS[activity_type] for activity_type in {e.activity_type for e in events}}
+        if streak_updated:
+            changed.update(STREAK_REQUIREMENTS)
+        if history:
+            record_transactions(user, history)
+            changed.add(POINTS_REQUIREMENT)
+        evaluate_achievements(user, streak, changed)
+
+        ActivityEvent.objects.filter(pk__in=[event.pk for event in events]).update(processed_at=now)
+
+        transaction.on_commit(lambda: _notify(user, milestones, completed))
+
+    return len(events)
+
+
+def _advance_challenges(user, actions, now):
+    """Add the events to the user's active challenges; returns the ones completed"""
+    if not actions:
+        return []
+
+    user_challenges = list(
+        UserChallenge.objects.select_related('challenge').filter(
+            user=user,
+            status='active',
+            target_action__in={target_action for target_action, _ in actions}
+        )
+    )
+    completed = []
+    for user_challenge in user_challenges:
+        # Only events inside the challenge window count
+        increment = sum(
+            1 for target_action, occurred_at in actions
+            if target_action == user_challenge.target_action
+            and occurred_at >= user_challenge.started_at
+            and (user_challenge.expires_at is None or occurred_at <= user_challenge.expires_at)
+        )
+        user_challenge.current_progress += increment
+        if user_challenge.is_completed:
+            user_challenge.status = 'completed'
+            user_challenge.completed_at = now
+            user_challenge.points_earned = user_challenge.calculate_reward()
+            completed.append(user_challenge)
+
+    UserChallenge.objects.bulk_update(
+        user_challenges, ['current_progress', 'status', 'completed_at', 'points_earned']
+    )
+    return completed
+
+
+def _notify(user, milestones, completed):
+    from apps.notifications.tasks import send_streak_milestone_notification
+
+    for milestone in milestones:
+        send_streak_milestone_notification.delay(str(user.id), milestone)
+    notify_completed_challenges(user, completed)
+
+
+def process_pending_activity_events():
+    """Fold the pending events of every user and purge old processed ones. Returns (users, events)"""
+    from django.contrib.auth import get_user_model
+
+    user_ids = (
+        ActivityEvent.objects.filter(processed_at__isnull=True).values_list('user_id', flat=True).distinct()
+    )
+    users = 0
+    events = 0
+    for user in get_user_model().objects.filter(pk__in=list(user_ids)).iterator():
+        events += fold_activity_events(user)
+        users += 1
+
+    cutoff = timezone.now() - datetime.timedelta(days=ACTIVITY_EVENT_RETENTION_DAYS)
+    ActivityEvent.objects.filter(processed_at__lt=cutoff).delete()
+    return users, events
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Streak, Achievement, UserAchievement, PointsHistory, Leaderboard, Challenge, UserChallenge
+from .models import Streak, Achievement, UserAchievement, Leaderboard, Challenge, UserChallenge
 
 
 @admin.register(Streak)
@@ -26,14 +26,6 @@ class UserAchievementAdmin(admin.ModelAdmin):
     readonly_fields = ['id', 'earned_at']
 
 
-@admin.register(PointsHistory)
-class PointsHistoryAdmin(admin.ModelAdmin):
-    list_display = ['user', 'action', 'points', 'description', 'created_at']
-    list_filter = ['action', 'created_at']
-    search_fields = ['user__email', 'user__name', 'description']
-    readonly_fields = ['id', 'created_at']
-
-
 @admin.register(Leaderboard)
 class LeaderboardAdmin(admin.ModelAdmin):
     list_display = ['user', 'period', 'rank', 'points', 'period_start', 'period_end']
@@ -6,3 +6,6 @@ class StreaksConfig(AppConfig):
     name = 'apps.streaks'
     label = 'streaks'
     verbose_name = 'Streaks & Gamification'
+    
+    def ready(self):
+        import apps.streaks.signals  # noqa
@@ -0,0 +1,91 @@
+"""
+Server-side challenge progress.
+
+Domain events (applications, saved jobs, profile updates, course enrollments...)
+are dispatched here with their Challenge.target_action. The user's active
+challenges for that action are advanced with one UPDATE, using the
+(user, status, target_action) index on UserChallenge.
+"""
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from apps.users.models_referral import PointsTransaction
+from apps.users.points import record_transactions
+from .achievements import POINTS_REQUIREMENT, evaluate_achievements
+from .models import UserChallenge
+
+# target_action values advanced by the backend; clients can't push progress for them
+SERVER_TRACKED_ACTIONS = (
+    'apply_to_jobs',
+    'save_jobs',
+    'update_profile',
+    'enroll_courses',
+    'connect_mentors',
+    'maintain_streak',
+    'view_jobs',
+)
+
+# activity_type -> Challenge.target_action it counts towards, both for single reports
+# (StreakService.record_activity) and uploaded batches (activity.py). Applications and
+# profile updates are counted when they are saved, not from client reports
+ACTIVITY_TARGET_ACTIONS = {
+    'job_viewed': 'view_jobs',
+}
+
+
+def advance_challenges(user, target_action, increment=1):
+    """Advance every active, unexpired challenge of ``user`` for ``target_action``. Returns the completed ones"""
+    now = timezone.now()
+    active = UserChallenge.objects.filter(user=user, status='active', target_action=target_action).filter(
+        Q(expires_at__isnull=True) | Q(expires_at__gt=now)
+    )
+    return advance_user_challenges(user, active, increment)
+
+
+def advance_user_challenges(user, queryset, increment=1):
+    """Add ``increment`` to the active challenges in ``queryset`` and complete the ones that reach their target"""
+    queryset = queryset.filter(status='active')
+    with transaction.atomic():
+        if not queryset.update(current_progress=F('current_progress') + increment):
+            return []
+        # The UPDATE above holds the row locks, so no other request can complete these twice
+        reached = list(
+            queryset.filter(current_progress__gte=F('challenge__target_count')).select_related('challenge')
+        )
+        return complete_user_challenges(user, reached)
+
+
+def complete_user_challenges(user, user_challenges):
+    """Mark the challenges completed and award their points in one transaction"""
+    if not user_challenges:
+        return []
+
+    now = timezone.now()
+    with transaction.atomic():
+        for user_challenge in user_challenges:
+            user_challenge.status = 'completed'
+            user_challenge.completed_at = now
+            user_challenge.points_earned = user_challenge.calculate_reward()
+        UserChallenge.objects.bulk_update(user_challenges, ['status', 'completed_at', 'points_earned'])
+
+        record_transactions(user, [
+            PointsTransaction(
+                transaction_type='challenge_complete',
+                points=user_challenge.points_earned,
+                description=f"Reto completado: {user_challenge.challenge.title}"
+            )
+            for user_challenge in user_challenges
+        ])
+        evaluate_achievements(user, None, [POINTS_REQUIREMENT])
+
+        transaction.on_commit(lambda: notify_completed_challenges(user, user_challenges))
+
+    return user_challenges
+
+
+def notify_completed_challenges(user, user_challenges):
+    from apps.notifications.tasks import send_challenge_completion_notification
+
+    for user_challenge in user_challenges:
+        send_challenge_completion_notification.delay(str(user.id), str(user_challenge.id))
@@ -0,0 +1,275 @@
+"""
+All-time points leaderboard kept in a sorted structure.
+
+With the 'redis' backend the ranking lives in a sorted set shared by all workers;
+the 'local' backend keeps a sorted list per process (tests, development). Both
+serve top-N, rank and "users around me" without scanning the users table.
+
+Ranks use competition ranking like the previous SQL version: 1 + the number of
+users with strictly more points.
+"""
+import logging
+import threading
+import uuid
+from bisect import bisect_left, insort
+
+from django.conf import settings
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+REBUILD_BATCH_SIZE = 5000
+
+# Only one worker rebuilds a missing ranking; the lock expires if it dies midway
+REBUILD_LOCK_SECONDS = 300
+
+
+def _load_points():
+    """(user_id, points) for every user, from the database"""
+    from apps.users.models import User
+
+    return (
+        (str(user_id), points)
+        for user_id, points in User.objects.order_by().values_list('id', 'points').iterator(chunk_size=REBUILD_BATCH_SIZE)
+    )
+
+
+class LocalLeaderboard:
+    """In-process ranking: a list of (-points, user_id) kept sorted"""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._entries = []
+        self._points = {}
+        self._loaded = False
+
+    def _ensure_loaded(self):
+        if not self._loaded:
+            self.rebuild(_load_points())
+
+    def _remove(self, user_id):
+        points = self._points.pop(user_id, None)
+        if points is not None:
+            del self._entries[bisect_left(self._entries, (-points, user_id))]
+
+    def set(self, user_id, points):
+        with self._lock:
+            if not self._loaded:
+                return  # Loaded from the database on first read
+            self._remove(str(user_id))
+            self._points[str(user_id)] = points
+            insort(self._entries, (-points, str(user_id)))
+
+    def incr(self, user_id, delta, points=None):
+        with self._lock:
+            if not self._loaded:
+                return
+            current = self._points.get(str(user_id))
+            if current is None:
+                self.set(user_id, points if points is not None else delta)
+            else:
+                self.set(user_id, current + delta)
+
+    def remove(self, user_id):
+        with self._lock:
+            if self._loaded:
+                self._remove(str(user_id))
+
+    def rebuild(self, rows):
+        entries = sorted((-points, user_id) for user_id, points in rows)
+        with self._lock:
+            self._entries = entries
+            self._points = {user_id: -negative for negative, user_id in entries}
+            self._loaded = True
+        return len(entries)
+
+    def count(self):
+        with self._lock:
+            self._ensure_loaded()
+            return len(self._entries)
+
+    def rank(self, user_id):
+        with self._lock:
+            self._ensure_loaded()
+            points = self._points.get(str(user_id))
+            if points is None:
+                return None
+            return bisect_left(self._entries, (-points,)) + 1
+
+    def range(self, start, stop):
+        """(user_id, points) at positions start..stop (inclusive, 0-based, best first)"""
+        with self._lock:
+            self._ensure_loaded()
+            return [(user_id, -negative) for negative, user_id in self._entries[max(start, 0):stop + 1]]
+
+    def position(self, user_id):
+        with self._lock:
+            self._ensure_loaded()
+            points = self._points.get(str(user_id))
+            if points is None:
+                return None
+            return bisect_left(self._entries, (-points, str(user_id)))
+
+
+class RedisLeaderboard:
+    """
+    Ranking shared by all workers in a Redis sorted set. Like the local backend it
+    is built from the database on the first read that finds it missing (empty
+    Redis, flushed key); until then writes are skipped.
+    """
+
+    key = 'leaderboard:points'
+    lock_key = 'leaderboard:points:rebuilding'
+
+    def _client(self):
+        from joby_api.redis_client import get_redis
+        return get_redis()
+
+    def _ensure_loaded(self, client):
+        if client.exists(self.key):
+            return
+        if client.set(self.lock_key, 1, nx=True, ex=REBUILD_LOCK_SECONDS):
+            try:
+                self.rebuild(_load_points())
+            finally:
+                client.delete(self.lock_key)
+
+    def set(self, user_id, points):
+        client = self._client()
+        if client.exists(self.key):
+            client.zadd(self.key, {str(user_id): points})
+
+    def incr(self, user_id, delta, points=None):
+        client = self._client()
+        if not client.exists(self.key):
+            return
+        # ZINCRBY on a missing member would store only the delta: members already
+        # ranked move by ``delta``, a missing one gets the whole balance
+        if client.zadd(self.key, {str(user_id): delta}, xx=True, incr=True) is None and points is not None:
+            client.zadd(self.key, {str(user_id): points}, nx=True)
+
+    def remove(self, user_id):
+        self._client().zrem(self.key, str(user_id))
+
+    def rebuild(self, rows):
+        client = self._client()
+        building_key = f'{self.key}:building:{uuid.uuid4().hex}'
+        total = 0
+        batch = {}
+        for user_id, points in rows:
+            batch[user_id] = points
+            if len(batch) == REBUILD_BATCH_SIZE:
+                client.zadd(building_key, batch)
+                total += len(batch)
+                batch = {}
+        if batch:
+            client.zadd(building_key, batch)
+            total += len(batch)
+
+        if total:
+            # RENAME is atomic: readers switch from the old ranking to the new one at once
+            client.rename(building_key, self.key)
+        else:
+            client.delete(self.key)
+        return total
+
+    def count(self):
+        client = self._client()
+        self._ensure_loaded(client)
+        return client.zcard(self.key)
+
+    def rank(self, user_id):
+        client = self._client()
+        self._ensure_loaded(client)
+        points = client.zscore(self.key, str(user_id))
+        if points is None:
+            return None
+        return client.zcount(self.key, f'({points}', '+inf') + 1
+
+    def range(self, start, stop):
+        client = self._client()
+        self._ensure_loaded(client)
+        rows = client.zrevrange(self.key, max(start, 0), stop, withscores=True)
+        return [(user_id, int(points)) for user_id, points in rows]
+
+    def position(self, user_id):
+        client = self._client()
+        self._ensure_loaded(client)
+        return client.zrevrank(self.key, str(user_id))
+
+
+_local_leaderboard = LocalLeaderboard()
+
+
+def get_leaderboard():
+    """Leaderboard selected by settings.LEADERBOARD_BACKEND"""
+    if settings.LEADERBOARD_BACKEND == 'redis':
+        return RedisLeaderboard()
+    return _local_leaderboard
+
+
+def _with_ranks(leaderboard, rows, start):
+    """Attach competition ranks to the (user_id, points) rows found at positions start, start + 1..."""
+    entries = []
+    for index, (user_id, points) in enumerate(rows):
+        if not index:
+            rank = leaderboard.rank(user_id) if start else 1
+        elif points == entries[-1]['points']:
+            rank = entries[-1]['rank']
+        else:
+            # Everyone ranked above this position has more points
+            rank = start + index + 1
+        entries.append({'rank': rank, 'user_id': user_id, 'points': points})
+    return entries
+
+
+def top(limit):
+    """Best ``limit`` users as [{'rank', 'user_id', 'points'}]"""
+    leaderboard = get_leaderboard()
+    return _with_ranks(leaderboard, leaderboard.range(0, limit - 1), 0)
+
+
+def around(user_id, radius):
+    """The user plus up to ``radius`` users above and below, in the same format as top()"""
+    leaderboard = get_leaderboard()
+    position = leaderboard.position(user_id)
+    if position is None:
+        return []
+    start = max(position - radius, 0)
+    return _with_ranks(leaderboard, leaderboard.range(start, position + radius), start)
+
+
+def record_points(user_id, points=None, delta=None):
+    """
+    Update the ranking once the current transaction commits, with the new total
+    (``points``) or an increment (``delta``, safe when commits land out of order).
+    With both, ``points`` is used for users not ranked yet.
+    The leaderboard is rebuilt from the database, so failures are only logged.
+    """
+    def apply():
+        leaderboard = get_leaderboard()
+        try:
+            if delta is not None:
+                leaderboard.incr(user_id, delta, points)
+            else:
+                leaderboard.set(user_id, points)
+        except Exception as e:
+            logger.error(f"Could not update leaderboard for {user_id}: {str(e)}")
+    transaction.on_commit(apply)
+
+
+def remove_user(user_id):
+    def apply():
+        try:
+            get_leaderboard().remove(user_id)
+        except Exception as e:
+            logger.error(f"Could not remove {user_id} from leaderboard: {str(e)}")
+    transaction.on_commit(apply)
+
+
+def rebuild_leaderboard():
+    """
+    Replace the ranking with the points stored in the database. Returns the number
+    of users. Increments applied while it runs may be lost until the next rebuild.
+    """
+    return get_leaderboard().rebuild(_load_points())
@@ -0,0 +1,14 @@
+"""
+Management command para reconstruir el leaderboard de puntos desde la base de datos
+"""
+from django.core.management.base import BaseCommand
+from apps.streaks.leaderboard import rebuild_leaderboard
+
+
+class Command(BaseCommand):
+    help = 'Reconstruye el ranking de puntos (leaderboard) a partir de User.points'
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.SUCCESS('Reconstruyendo leaderboard...'))
+        total = rebuild_leaderboard()
+        self.stdout.write(self.style.SUCCESS(f'✓ {total} usuarios en el leaderboard'))
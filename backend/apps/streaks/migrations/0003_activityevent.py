@@ -0,0 +1,75 @@
+# Generated by Django 4.2.9 on 2026-10-17 22:14
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("streaks", "0002_challenge_alter_pointshistory_action_userchallenge"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ActivityEvent",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "activity_type",
+                    models.CharField(
+                        choices=[
+                            ("login", "Login"),
+                            ("application", "Job Application"),
+                            ("profile_update", "Profile Update"),
+                            ("job_saved", "Job Saved"),
+                            ("job_viewed", "Job Viewed"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                ("occurred_at", models.DateTimeField()),
+                (
+                    "client_event_id",
+                    models.CharField(blank=True, default="", max_length=64),
+                ),
+                ("received_at", models.DateTimeField(auto_now_add=True)),
+                ("processed_at", models.DateTimeField(blank=True, null=True)),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="activity_events",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["occurred_at"],
+                "indexes": [
+                    models.Index(
+                        condition=models.Q(("processed_at__isnull", True)),
+                        fields=["user", "occurred_at"],
+                        name="streaks_activity_pending_idx",
+                    )
+                ],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="activityevent",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("client_event_id", ""), _negated=True),
+                fields=("user", "client_event_id"),
+                name="streaks_activity_event_client_id_uniq",
+            ),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 4.2.9 on 2026-10-17 22:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("streaks", "0003_activityevent"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="activityevent",
+            index=models.Index(
+                condition=models.Q(("processed_at__isnull", False)),
+                fields=["user", "-occurred_at"],
+                name="streaks_activity_done_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 4.2.9 on 2026-10-17 22:16
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def backfill_target_action(apps, schema_editor):
+    """Copy challenge.target_action to the existing user challenges"""
+    Challenge = apps.get_model("streaks", "Challenge")
+    UserChallenge = apps.get_model("streaks", "UserChallenge")
+
+    UserChallenge.objects.update(
+        target_action=Subquery(
+            Challenge.objects.filter(pk=OuterRef("challenge_id")).values(
+                "target_action"
+            )[:1]
+        )
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("streaks", "0004_activityevent_done_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="userchallenge",
+            name="target_action",
+            field=models.CharField(blank=True, editable=False, max_length=50),
+        ),
+        migrations.AddIndex(
+            model_name="userchallenge",
+            index=models.Index(
+                fields=["user", "status", "target_action"],
+                name="user_challe_user_id_27eeb6_idx",
+            ),
+        ),
+        migrations.RunPython(backfill_target_action, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 4.2.9 on 2026-10-17 22:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("streaks", "0005_userchallenge_target_action"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="LeaderboardCursor",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("source", models.CharField(max_length=50, unique=True)),
+                ("last_created_at", models.DateTimeField(blank=True, null=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name="leaderboard",
+            index=models.Index(
+                fields=["period", "period_start", "rank"],
+                name="streaks_lea_period_2ece9b_idx",
+            ),
+        ),
+    ]
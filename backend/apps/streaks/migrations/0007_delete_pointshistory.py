@@ -0,0 +1,23 @@
+# Generated by Django 4.2.9 on 2026-10-17 22:21
+
+from django.db import migrations
+
+
+def drop_points_history_cursor(apps, schema_editor):
+    """PointsHistory rows now live in the PointsTransaction ledger"""
+    LeaderboardCursor = apps.get_model("streaks", "LeaderboardCursor")
+    LeaderboardCursor.objects.filter(source="points_history").delete()
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("streaks", "0006_leaderboardcursor"),
+        ("users", "0010_points_ledger"),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_points_history_cursor, migrations.RunPython.noop),
+        migrations.DeleteModel(
+            name="PointsHistory",
+        ),
+    ]
@@ -29,9 +29,12 @@ class Streak(models.Model):
     def __str__(self):
         return f"{self.user.name} - {self.current_streak} day streak"
     
-    def check_and_update_streak(self):
-        """Check if streak should be updated or reset"""
-        today = timezone.now().date()
+    def check_and_update_streak(self, save=True, today=None):
+        """
+        Check if streak should be updated or reset (``save=False`` only updates the instance).
+        ``today`` is the day of the activity, for events recorded after the fact.
+        """
+        today = today or timezone.now().date()
         
         if not self.last_activity_date:
             # First activity
@@ -39,13 +42,14 @@ class Streak(models.Model):
             self.last_activity_date = today
             if self.current_streak > self.longest_streak:
                 self.longest_streak = self.current_streak
-            self.save()
+            if save:
+                self.save()
             return True
         
         days_diff = (today - self.last_activity_date).days
         
-        if days_diff == 0:
-            # Same day, no change
+        if days_diff <= 0:
+            # Same day (or an older event), no change
             return False
         elif days_diff == 1:
             # Consecutive day, increment streak
@@ -53,13 +57,15 @@ class Streak(models.Model):
             self.last_activity_date = today
             if self.current_streak > self.longest_streak:
                 self.longest_streak = self.current_streak
-            self.save()
+            if save:
+                self.save()
             return True
         else:
             # Streak broken, reset to 1
             self.current_streak = 1
             self.last_activity_date = today
-            self.save()
+            if save:
+                self.save()
             return True
 
 
@@ -113,37 +119,54 @@ class UserAchievement(models.Model):
         return f"{self.user.name} earned {self.achievement.name}"
 
 
-class PointsHistory(models.Model):
-    """Track all points earned/spent by users"""
-    
-    ACTION_CHOICES = [
-        ('login', 'Daily Login'),
+class ActivityEvent(models.Model):
+    """
+    Activity reported by the client, folded into streaks, challenges and
+    achievements by a background worker (see apps/streaks/activity.py)
+    """
+    
+    ACTIVITY_TYPE_CHOICES = [
+        ('login', 'Login'),
         ('application', 'Job Application'),
         ('profile_update', 'Profile Update'),
-        ('streak_milestone', 'Streak Milestone'),
-        ('achievement', 'Achievement Earned'),
         ('job_saved', 'Job Saved'),
         ('job_viewed', 'Job Viewed'),
-        ('referral', 'Referral'),
-        ('bonus', 'Bonus'),
-        ('challenge_completed', 'Challenge Completed'),
     ]
     
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
-    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='points_history')
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='activity_events')
+    activity_type = models.CharField(max_length=20, choices=ACTIVITY_TYPE_CHOICES)
+    occurred_at = models.DateTimeField()
     
-    action = models.CharField(max_length=20, choices=ACTION_CHOICES)
-    points = models.IntegerField()
-    description = models.CharField(max_length=255)
+    # Optional client-generated id so retried uploads are not counted twice
+    client_event_id = models.CharField(max_length=64, blank=True, default='')
     
-    created_at = models.DateTimeField(auto_now_add=True)
+    received_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
     
     class Meta:
-        ordering = ['-created_at']
-        verbose_name_plural = 'Points History'
+        ordering = ['occurred_at']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'client_event_id'],
+                condition=~models.Q(client_event_id=''),
+                name='streaks_activity_event_client_id_uniq'
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', 'occurred_at'],
+                condition=models.Q(processed_at__isnull=True),
+                name='streaks_activity_pending_idx'
+            ),
+            models.Index(
+                fields=['user', '-occurred_at'],
+                condition=models.Q(processed_at__isnull=False),
+                name='streaks_activity_done_idx'
+            ),
+        ]
     
     def __str__(self):
-        return f"{self.user.name} - {self.action}: {self.points} pts"
+        return f"{self.user_id} - {self.activity_type} at {self.occurred_at}"
 
 
 class Leaderboard(models.Model):
@@ -171,11 +194,26 @@ class Leaderboard(models.Model):
     class Meta:
         unique_together = ['user', 'period', 'period_start']
         ordering = ['period', 'rank']
+        indexes = [
+            models.Index(fields=['period', 'period_start', 'rank']),
+        ]
     
     def __str__(self):
         return f"#{self.rank} {self.user.name} - {self.period}"
 
 
+class LeaderboardCursor(models.Model):
+    """How far each points ledger has been folded into the Leaderboard periods"""
+    
+    source = models.CharField(max_length=50, unique=True)
+    last_created_at = models.DateTimeField(null=True, blank=True)
+    
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"{self.source} up to {self.last_created_at}"
+
+
 class Challenge(models.Model):
     """Retos diarios y semanales para usuarios"""
     
@@ -263,6 +301,9 @@ class UserChallenge(models.Model):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='user_challenges')
     challenge = models.ForeignKey(Challenge, on_delete=models.CASCADE, related_name='user_progress')
     
+    # Copy of challenge.target_action, so active challenges can be found by action with one index
+    target_action = models.CharField(max_length=50, blank=True, editable=False)
+    
     # Progress tracking
     current_progress = models.IntegerField(default=0, verbose_name='Progreso actual')
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='active', verbose_name='Estado')
@@ -283,11 +324,17 @@ class UserChallenge(models.Model):
         verbose_name_plural = 'Retos de Usuarios'
         indexes = [
             models.Index(fields=['user', 'status', '-started_at']),
+            models.Index(fields=['user', 'status', 'target_action']),
         ]
     
     def __str__(self):
         return f"{self.user.name} - {self.challenge.title} ({self.status})"
     
+    def save(self, *args, **kwargs):
+        if not self.target_action:
+            self.target_action = self.challenge.target_action
+        super().save(*args, **kwargs)
+    
     @property
     def progress_percentage(self):
         """Calculate progress percentage"""
@@ -301,43 +348,27 @@ class UserChallenge(models.Model):
         return self.current_progress >= self.challenge.target_count
     
     def update_progress(self, increment=1):
-        """Update challenge progress"""
-        self.current_progress += increment
+        """Update challenge progress; returns the points earned if it got completed"""
+        from apps.streaks.challenges import advance_user_challenges
         
-        # Check if completed
-        if self.is_completed and self.status != 'completed':
-            self.complete_challenge()
-        else:
-            self.save()
+        completed = advance_user_challenges(
+            self.user, UserChallenge.objects.filter(pk=self.pk), increment
+        )
+        self.refresh_from_db(fields=['current_progress', 'status', 'completed_at', 'points_earned'])
+        return self.points_earned if completed else None
+    
+    def calculate_reward(self):
+        """Points for completing the challenge, with bonus multiplier"""
+        base_points = self.challenge.points_reward
+        bonus_points = int(base_points * float(self.challenge.bonus_multiplier - 1))
+        return base_points + bonus_points
     
     def complete_challenge(self):
         """Mark challenge as completed and award points"""
-        from apps.streaks.services import StreakService
+        from apps.streaks.challenges import complete_user_challenges
         
         if self.status == 'completed':
             return  # Already completed
         
-        self.status = 'completed'
-        self.completed_at = timezone.now()
-        
-        # Calculate points with bonus multiplier
-        base_points = self.challenge.points_reward
-        bonus_points = int(base_points * float(self.challenge.bonus_multiplier - 1))
-        total_points = base_points + bonus_points
-        
-        self.points_earned = total_points
-        self.save()
-        
-        # Award points to user
-        StreakService.award_points(
-            self.user,
-            'challenge_completed',
-            total_points,
-            f"Reto completado: {self.challenge.title}"
-        )
-        
-        # Send notification
-        from apps.notifications.tasks import send_challenge_completion_notification
-        send_challenge_completion_notification.delay(str(self.user.id), str(self.id))
-        
-        return total_points
+        complete_user_challenges(self.user, [self])
+        return self.points_earned
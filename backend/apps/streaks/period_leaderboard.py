@@ -0,0 +1,145 @@
+"""
+Daily, weekly and monthly leaderboards materialized in the Leaderboard table.
+
+A periodic task folds the points earned since the last run (PointsTransaction
+rows) into per-period running totals, then rewrites the rank of the rows whose
+position changed. The period endpoints only read Leaderboard.
+
+Only earned points count (positive rows); redemptions don't lower a period total.
+"""
+import datetime
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import Leaderboard, LeaderboardCursor
+
+PERIODS = ('daily', 'weekly', 'monthly')
+
+# Rows newer than this are left for the next run, so transactions that are still
+# open when the task runs are not skipped by the cursor
+AGGREGATION_LAG = datetime.timedelta(minutes=1)
+
+BATCH_SIZE = 1000
+
+
+def _sources():
+    from apps.users.models_referral import PointsTransaction
+
+    return {
+        'points_transactions': PointsTransaction,
+    }
+
+
+def period_bounds(period, day):
+    """(period_start, period_end) of the period containing ``day``"""
+    if period == 'daily':
+        return day, day
+    if period == 'weekly':
+        start = day - datetime.timedelta(days=day.weekday())
+        return start, start + datetime.timedelta(days=6)
+    start = day.replace(day=1)
+    next_month = (start + datetime.timedelta(days=32)).replace(day=1)
+    return start, next_month - datetime.timedelta(days=1)
+
+
+def aggregate_period_leaderboards(now=None):
+    """Fold new points into the current periods and re-rank them. Returns the number of totals changed"""
+    now = now or timezone.now()
+    until = now - AGGREGATION_LAG
+    today = timezone.localdate(now)
+
+    # On the first run only the periods still open matter
+    earliest = min(period_bounds(period, today)[0] for period in PERIODS)
+    default_since = timezone.make_aware(datetime.datetime.combine(earliest, datetime.time.min))
+
+    sources = _sources()
+    for source in sources:
+        LeaderboardCursor.objects.get_or_create(source=source)
+
+    with transaction.atomic():
+        # Locking the cursors keeps two runs from folding the same rows
+        cursors = LeaderboardCursor.objects.select_for_update().filter(source__in=list(sources))
+
+        totals = defaultdict(dict)  # (period, period_start) -> {user_id: points}
+        for cursor in cursors:
+            since = cursor.last_created_at or default_since
+            if since >= until:
+                continue
+            earned = (
+                sources[cursor.source].objects
+                .filter(created_at__gt=since, created_at__lte=until, points__gt=0)
+                .annotate(day=TruncDate('created_at'))
+                .values('user_id', 'day')
+                .annotate(total=Sum('points'))
+                .order_by()
+            )
+            for row in earned:
+                for period in PERIODS:
+                    key = (period, period_bounds(period, row['day'])[0])
+                    user_totals = totals[key]
+                    user_totals[row['user_id']] = user_totals.get(row['user_id'], 0) + row['total']
+
+            cursor.last_created_at = until
+            cursor.save(update_fields=['last_created_at', 'updated_at'])
+
+        changed = 0
+        for (period, period_start), user_totals in totals.items():
+            changed += _add_totals(period, period_start, user_totals, now)
+            _rerank(period, period_start, now)
+
+    return changed
+
+
+def _add_totals(period, period_start, user_totals, now):
+    existing = {
+        entry.user_id: entry
+        for entry in Leaderboard.objects.filter(
+            period=period, period_start=period_start, user_id__in=list(user_totals)
+        )
+    }
+
+    updated = []
+    created = []
+    period_end = period_bounds(period, period_start)[1]
+    for user_id, points in user_totals.items():
+        entry = existing.get(user_id)
+        if entry is None:
+            created.append(Leaderboard(
+                user_id=user_id,
+                period=period,
+                period_start=period_start,
+                period_end=period_end,
+                points=points,
+                rank=0  # Set by _rerank
+            ))
+        else:
+            entry.points += points
+            entry.updated_at = now
+            updated.append(entry)
+
+    Leaderboard.objects.bulk_update(updated, ['points', 'updated_at'], batch_size=BATCH_SIZE)
+    Leaderboard.objects.bulk_create(created, batch_size=BATCH_SIZE)
+    return len(updated) + len(created)
+
+
+def _rerank(period, period_start, now):
+    """Competition ranking by points; only rows whose rank changed are written"""
+    rows = Leaderboard.objects.filter(period=period, period_start=period_start).order_by('-points').values_list(
+        'id', 'points', 'rank'
+    )
+
+    changed = []
+    rank = 0
+    previous_points = None
+    for position, (entry_id, points, current_rank) in enumerate(rows.iterator(chunk_size=BATCH_SIZE), start=1):
+        if points != previous_points:
+            rank = position
+            previous_points = points
+        if rank != current_rank:
+            changed.append(Leaderboard(id=entry_id, rank=rank, updated_at=now))
+
+    Leaderboard.objects.bulk_update(changed, ['rank', 'updated_at'], batch_size=BATCH_SIZE)
@@ -1,5 +1,12 @@
+from datetime import timedelta
+
+from django.utils import timezone
 from rest_framework import serializers
-from .models import Streak, Achievement, UserAchievement, PointsHistory, Leaderboard, Challenge, UserChallenge
+from apps.users.models_referral import PointsTransaction
+from .activity import ACTIVITY_EVENT_MAX_AGE_HOURS, last_processed_at
+from .models import (
+    Streak, Achievement, UserAchievement, Leaderboard, Challenge, UserChallenge, ActivityEvent
+)
 
 
 class StreakSerializer(serializers.ModelSerializer):
@@ -35,10 +42,12 @@ class AchievementSerializer(serializers.ModelSerializer):
         """Check if current user has earned this achievement"""
         request = self.context.get('request')
         if request and request.user.is_authenticated:
-            return UserAchievement.objects.filter(
-                user=request.user,
-                achievement=obj
-            ).exists()
+            # One query for the whole list instead of one per achievement
+            if not hasattr(self, '_earned_ids'):
+                self._earned_ids = set(
+                    UserAchievement.objects.filter(user=request.user).values_list('achievement_id', flat=True)
+                )
+            return obj.id in self._earned_ids
         return False
 
 
@@ -54,10 +63,12 @@ class UserAchievementSerializer(serializers.ModelSerializer):
 
 
 class PointsHistorySerializer(serializers.ModelSerializer):
-    """Serializer for PointsHistory model"""
+    """Serializer for the points ledger (PointsTransaction) in the points history format"""
+    
+    action = serializers.CharField(source='transaction_type', read_only=True)
     
     class Meta:
-        model = PointsHistory
+        model = PointsTransaction
         fields = ['id', 'user', 'action', 'points', 'description', 'created_at']
         read_only_fields = ['id', 'user', 'created_at']
 
@@ -109,24 +120,27 @@ class ChallengeSerializer(serializers.ModelSerializer):
         """Get current user's progress on this challenge if exists"""
         request = self.context.get('request')
         if request and request.user.is_authenticated:
-            try:
-                user_challenge = UserChallenge.objects.filter(
-                    user=request.user,
-                    challenge=obj,
-                    status='active'
-                ).order_by('-started_at').first()
-                
-                if user_challenge:
-                    return {
-                        'id': str(user_challenge.id),
-                        'current_progress': user_challenge.current_progress,
-                        'progress_percentage': user_challenge.progress_percentage,
-                        'status': user_challenge.status,
-                        'started_at': user_challenge.started_at,
-                    }
-            except UserChallenge.DoesNotExist:
-                pass
+            user_challenge = self._active_user_challenges(request.user).get(obj.id)
+            if user_challenge:
+                return {
+                    'id': str(user_challenge.id),
+                    'current_progress': user_challenge.current_progress,
+                    'progress_percentage': user_challenge.progress_percentage,
+                    'status': user_challenge.status,
+                    'started_at': user_challenge.started_at,
+                }
         return None
+    
+    def _active_user_challenges(self, user):
+        """Latest active UserChallenge per challenge, loaded once for the whole list"""
+        if not hasattr(self, '_active_by_challenge'):
+            self._active_by_challenge = {}
+            # Oldest first, so the most recent one per challenge is the one kept; the
+            # challenge is joined because progress_percentage reads its target_count
+            active = UserChallenge.objects.filter(user=user, status='active').select_related('challenge')
+            for user_challenge in active.order_by('started_at'):
+                self._active_by_challenge[user_challenge.challenge_id] = user_challenge
+        return self._active_by_challenge
 
 
 class UserChallengeSerializer(serializers.ModelSerializer):
@@ -151,3 +165,41 @@ class ChallengeProgressSerializer(serializers.Serializer):
     
     challenge_id = serializers.UUIDField(required=True)
     increment = serializers.IntegerField(default=1, min_value=1)
+
+
+class ActivityEventSerializer(serializers.ModelSerializer):
+    """Serializer for one activity event reported by the client"""
+    
+    class Meta:
+        model = ActivityEvent
+        fields = ['activity_type', 'occurred_at', 'client_event_id']
+    
+    def validate_occurred_at(self, value):
+        # Allow some clock skew, but not events from the future
+        now = timezone.now()
+        if value > now + timedelta(minutes=5):
+            raise serializers.ValidationError('La fecha del evento no puede estar en el futuro')
+        if value < now - timedelta(hours=ACTIVITY_EVENT_MAX_AGE_HOURS):
+            raise serializers.ValidationError(
+                f'La fecha del evento no puede tener más de {ACTIVITY_EVENT_MAX_AGE_HOURS} horas'
+            )
+        return value
+
+
+class ActivityEventBatchSerializer(serializers.Serializer):
+    """Serializer for a batch of activity events"""
+    
+    MAX_EVENTS = 100
+    
+    events = ActivityEventSerializer(many=True, allow_empty=False, max_length=MAX_EVENTS)
+    
+    def validate_events(self, events):
+        # Nothing can be slipped in before what was already folded into the streak
+        request = self.context.get('request')
+        if request is not None:
+            cutoff = last_processed_at(request.user)
+            if cutoff and any(event['occurred_at'] < cutoff for event in events):
+                raise serializers.ValidationError(
+                    'Los eventos no pueden ser anteriores a la última actividad procesada'
+                )
+        return events
@@ -1,36 +1,75 @@
+from django.db import transaction
 from django.utils import timezone
-from .models import Streak, Achievement, UserAchievement, PointsHistory
+from apps.users.counters import increment_returning
+from apps.users.models_referral import PointsTransaction
+from apps.users import points as points_ledger
+from .challenges import ACTIVITY_TARGET_ACTIONS, advance_challenges
+from .models import Streak, Achievement, UserAchievement
+from .achievements import (
+    ACTIVITY_REQUIREMENTS, POINTS_REQUIREMENT, STREAK_COUNTERS, STREAK_REQUIREMENTS, evaluate_achievements
+)
 
 
 class StreakService:
     """Service for managing user streaks and points"""
     
+    STREAK_FIELDS = [
+        'current_streak', 'longest_streak', 'last_activity_date',
+        'total_logins', 'total_applications', 'total_profile_updates',
+        'total_jobs_saved', 'total_jobs_viewed',
+    ]
+    
     @staticmethod
     def record_activity(user, activity_type='login'):
         """Record user activity and update streak"""
         from apps.notifications.tasks import send_streak_milestone_notification
         
-        streak, created = Streak.objects.get_or_create(user=user)
-        
-        # Get current streak before update
-        old_streak = streak.current_streak
-        
-        # Update streak
-        streak_updated = streak.check_and_update_streak()
-        
-        # Update activity counters
-        if activity_type == 'login':
-            streak.total_logins += 1
-        elif activity_type == 'application':
-            streak.total_applications += 1
-        elif activity_type == 'profile_update':
-            streak.total_profile_updates += 1
-        elif activity_type == 'job_saved':
-            streak.total_jobs_saved += 1
-        elif activity_type == 'job_viewed':
-            streak.total_jobs_viewed += 1
-        
-        streak.save()
+        requirement_type = ACTIVITY_REQUIREMENTS.get(activity_type)
+        counter = STREAK_COUNTERS.get(requirement_type)
+        now = timezone.now()
+        
+        # Fast path: already active today, so only the activity counter changes (one UPDATE)
+        row = increment_returning(
+            Streak,
+            {'user': user.pk, 'last_activity_date': now.date()},
+            {counter: 1} if counter else {},
+            values={'updated_at': now},
+            returning=StreakService.STREAK_FIELDS
+        )
+        if row is not None:
+            streak = Streak(user=user, **row)
+            streak_updated = False
+            old_streak = streak.current_streak
+        else:
+            # First activity of the day: lock the row and update streak and counter in one write
+            with transaction.atomic():
+                streak, created = Streak.objects.select_for_update().get_or_create(user=user)
+                
+                # Get current streak before update
+                old_streak = streak.current_streak
+                
+                # Update streak
+                streak_updated = streak.check_and_update_streak(save=False)
+                
+                # Update activity counters
+                if counter:
+                    setattr(streak, counter, getattr(streak, counter) + 1)
+                
+                streak.save(update_fields=StreakService.STREAK_FIELDS + ['updated_at'])
+        
+        # A new streak day counts towards 'maintain_streak' challenges
+        if streak_updated:
+            advance_challenges(user, 'maintain_streak')
+        target_action = ACTIVITY_TARGET_ACTIONS.get(activity_type)
+        if target_action:
+            advance_challenges(user, target_action)
+        
+        # Check only the achievements whose counters changed
+        changed = [requirement_type] if requirement_type else []
+        if streak_updated:
+            changed.extend(STREAK_REQUIREMENTS)
+        if changed:
+            StreakService.check_achievements(user, changed, streak=streak)
         
         # Check if user reached a milestone (7, 14, 30, 60, 90, 100 days)
         if streak_updated and streak.current_streak > old_streak:
@@ -47,81 +86,27 @@ class StreakService:
         if not description:
             description = f"Earned {points} points for {action}"
         
-        # Update user points
-        user.points += points
-        user.save(update_fields=['points'])
-        
-        # Record in history
-        PointsHistory.objects.create(
-            user=user,
-            action=action,
-            points=points,
-            description=description
-        )
+        # Update user points and record the movement in the ledger
+        points_ledger.award_points(user, action, points, description)
         
-        # Check for achievements
-        StreakService.check_achievements(user)
+        # Check for achievements unlocked by the new total
+        StreakService.check_achievements(user, [POINTS_REQUIREMENT])
         
         return user.points
     
     @staticmethod
-    def check_achievements(user):
-        """Check if user has earned any new achievements"""
-        try:
-            streak = Streak.objects.get(user=user)
-        except Streak.DoesNotExist:
-            return []
-        
-        new_achievements = []
-        
-        # Get all active achievements
-        achievements = Achievement.objects.filter(is_active=True)
-        
-        # Get already earned achievements
-        earned_ids = UserAchievement.objects.filter(user=user).values_list('achievement_id', flat=True)
-        
-        for achievement in achievements:
-            if achievement.id in earned_ids:
-                continue
-            
-            # Check if user meets criteria
-            earned = False
-            
-            if achievement.requirement_type == 'streak_days':
-                earned = streak.current_streak >= achievement.requirement_value
-            elif achievement.requirement_type == 'longest_streak':
-                earned = streak.longest_streak >= achievement.requirement_value
-            elif achievement.requirement_type == 'total_applications':
-                earned = streak.total_applications >= achievement.requirement_value
-            elif achievement.requirement_type == 'total_logins':
-                earned = streak.total_logins >= achievement.requirement_value
-            elif achievement.requirement_type == 'total_points':
-                earned = user.points >= achievement.requirement_value
-            
-            if earned:
-                from apps.notifications.tasks import send_achievement_notification
-                
-                # Award achievement
-                UserAchievement.objects.create(
-                    user=user,
-                    achievement=achievement
-                )
-                
-                # Award bonus points
-                if achievement.points_reward > 0:
-                    StreakService.award_points(
-                        user,
-                        'achievement',
-                        achievement.points_reward,
-                        f"Achievement unlocked: {achievement.name}"
-                    )
-                
-                # Send achievement notification asynchronously
-                send_achievement_notification.delay(str(user.id), str(achievement.id))
-                
-                new_achievements.append(achievement)
-        
-        return new_achievements
+    def check_achievements(user, requirement_types=None, streak=None):
+        """
+        Check if user has earned any new achievements.
+        Only the rules of ``requirement_types`` are evaluated (all when None).
+        """
+        if streak is None:
+            try:
+                streak = Streak.objects.get(user=user)
+            except Streak.DoesNotExist:
+                return []
+        
+        return evaluate_achievements(user, streak, requirement_types)
     
     @staticmethod
     def get_user_stats(user):
@@ -132,7 +117,7 @@ class StreakService:
             streak = Streak.objects.create(user=user)
         
         achievements = UserAchievement.objects.filter(user=user)
-        recent_points = PointsHistory.objects.filter(user=user)[:10]
+        recent_points = PointsTransaction.objects.filter(user=user)[:10]
         
         return {
             'streak': {
@@ -151,7 +136,7 @@ class StreakService:
                 'total': user.points,
                 'recent_history': [
                     {
-                        'action': p.action,
+                        'action': p.transaction_type,
                         'points': p.points,
                         'description': p.description,
                         'date': p.created_at
@@ -0,0 +1,75 @@
+"""
+Signals for Streaks App
+"""
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from apps.applications.models import Application
+from apps.jobs.models import SavedJob
+from apps.users.models import User
+from apps.users.models_courses import UserCourse
+from apps.users.models_mentorship import MentorshipRequest
+from .models import Achievement, Challenge, UserChallenge
+from .achievements import invalidate_achievement_rules
+from .challenges import advance_challenges
+from .leaderboard import record_points, remove_user
+
+
+@receiver(post_save, sender=Achievement)
+@receiver(post_delete, sender=Achievement)
+def reload_achievement_rules(sender, **kwargs):
+    """
+    Drop the cached rule table when an achievement changes
+    """
+    invalidate_achievement_rules()
+
+
+@receiver(post_save, sender=Challenge)
+def sync_user_challenge_actions(sender, instance, created, **kwargs):
+    """
+    Keep the target_action copied on active UserChallenges in step with an
+    edited challenge, so progress keeps reaching them
+    """
+    if created:
+        return
+    UserChallenge.objects.filter(challenge=instance, status='active').exclude(
+        target_action=instance.target_action
+    ).update(target_action=instance.target_action)
+
+
+@receiver(post_save, sender=User)
+def sync_leaderboard_points(sender, instance, created, update_fields=None, **kwargs):
+    """
+    Mirror saved points in the leaderboard (increments made through
+    apps.users.counters update it directly)
+    """
+    if created or update_fields is None or 'points' in update_fields:
+        record_points(instance.pk, points=instance.points)
+
+
+@receiver(post_delete, sender=User)
+def remove_from_leaderboard(sender, instance, **kwargs):
+    remove_user(instance.pk)
+
+
+# Domain events that advance challenges: model -> (user field, Challenge.target_action)
+CHALLENGE_EVENTS = {
+    Application: ('applicant', 'apply_to_jobs'),
+    SavedJob: ('user', 'save_jobs'),
+    UserCourse: ('user', 'enroll_courses'),
+    MentorshipRequest: ('from_user', 'connect_mentors'),
+}
+
+
+@receiver(post_save, sender=Application)
+@receiver(post_save, sender=SavedJob)
+@receiver(post_save, sender=UserCourse)
+@receiver(post_save, sender=MentorshipRequest)
+def advance_challenges_on_create(sender, instance, created, **kwargs):
+    """
+    Advance the user's active challenges when an application, saved job,
+    course enrollment or mentorship request is created
+    """
+    if not created:
+        return
+    user_field, target_action = CHALLENGE_EVENTS[sender]
+    advance_challenges(getattr(instance, user_field), target_action)
@@ -0,0 +1,63 @@
+"""
+Celery tasks for streaks
+"""
+from celery import shared_task
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def process_activity_events(user_id):
+    """
+    Aplica a la racha, los retos y los logros los eventos de actividad pendientes de un usuario.
+    Se encola al recibir un lote de eventos.
+    """
+    from apps.users.models import User
+    from .activity import fold_activity_events
+    
+    try:
+        user = User.objects.get(pk=user_id)
+    except User.DoesNotExist:
+        return f"User {user_id} no longer exists"
+    
+    processed = fold_activity_events(user)
+    return f"Processed {processed} activity events for user {user_id}"
+
+
+@shared_task
+def rebuild_points_leaderboard():
+    """
+    Reconcilia el leaderboard de puntos con User.points.
+    Se ejecuta una vez al día.
+    """
+    from .leaderboard import rebuild_leaderboard
+    
+    total = rebuild_leaderboard()
+    return f"Leaderboard rebuilt with {total} users"
+
+
+@shared_task
+def aggregate_period_leaderboards():
+    """
+    Suma los puntos nuevos a los leaderboards diario, semanal y mensual y actualiza los rankings.
+    Se ejecuta cada 5 minutos.
+    """
+    from .period_leaderboard import aggregate_period_leaderboards as aggregate
+    
+    changed = aggregate()
+    return f"Updated {changed} leaderboard totals"
+
+
+@shared_task
+def process_pending_activity_events():
+    """
+    Procesa los eventos de actividad cuyo task se perdió y borra los eventos antiguos.
+    Se ejecuta cada minuto.
+    """
+    from .activity import process_pending_activity_events as process_pending
+    
+    users, events = process_pending()
+    if events:
+        logger.info(f"Processed {events} pending activity events for {users} users")
+    return f"Processed {events} activity events for {users} users"
@@ -0,0 +1,353 @@
+"""
+Tests for Streaks App
+"""
+from datetime import timedelta
+from unittest import mock
+
+import fakeredis
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.jobs.models import SavedJob
+from apps.streaks import leaderboard
+from apps.streaks.achievements import AchievementRules, invalidate_achievement_rules
+from apps.streaks.models import (
+    Achievement, ActivityEvent, Challenge, Leaderboard, Streak, UserAchievement, UserChallenge
+)
+from apps.streaks.period_leaderboard import PERIODS, aggregate_period_leaderboards
+from apps.streaks.services import StreakService
+from apps.users.counters import add_points
+from apps.users.models_referral import PointsTransaction
+from apps.users.points import award_points, spend
+from joby_api.factories import make_job, make_user
+from joby_api.testing import assert_no_repeated_queries, assert_view_within_budget
+
+
+def make_achievement(requirement_type, requirement_value, points_reward=0, **kwargs):
+    kwargs.setdefault('name', f'{requirement_type} {requirement_value}')
+    kwargs.setdefault('description', 'Logro de prueba')
+    kwargs.setdefault('achievement_type', 'milestone')
+    return Achievement.objects.create(
+        requirement_type=requirement_type,
+        requirement_value=requirement_value,
+        points_reward=points_reward,
+        **kwargs
+    )
+
+
+class AchievementRulesTests(TestCase):
+
+    def setUp(self):
+        # The rule table is cached per process and test rollbacks don't send signals
+        invalidate_achievement_rules()
+        self.addCleanup(invalidate_achievement_rules)
+        self.user = make_user()
+
+    def earned(self):
+        return set(UserAchievement.objects.filter(user=self.user).values_list('achievement__name', flat=True))
+
+    def test_reached_returns_every_threshold_up_to_the_value(self):
+        rules = AchievementRules([
+            Achievement(name='a', requirement_type='total_logins', requirement_value=value)
+            for value in (10, 1, 5)
+        ] + [Achievement(name='b', requirement_type='streak_days', requirement_value=3)])
+
+        self.assertEqual([a.requirement_value for a in rules.reached('total_logins', 5)], [1, 5])
+        self.assertEqual(rules.reached('total_logins', 0), [])
+        self.assertEqual(rules.reached('total_applications', 100), [])
+
+    def test_activity_unlocks_only_its_own_counter_achievements(self):
+        make_achievement('total_applications', 1, name='Primera postulación')
+        make_achievement('total_applications', 2, name='Segunda postulación')
+        make_achievement('total_jobs_saved', 1, name='Primer guardado')
+
+        StreakService.record_activity(self.user, 'application')
+
+        self.assertEqual(self.earned(), {'Primera postulación'})
+
+    def test_bonus_points_unlock_points_achievements_in_the_same_pass(self):
+        make_achievement('total_logins', 1, points_reward=50, name='Bienvenida')
+        make_achievement('total_points', 50, points_reward=25, name='50 puntos')
+        make_achievement('total_points', 75, name='75 puntos')
+        make_achievement('total_points', 100, name='100 puntos')
+
+        StreakService.record_activity(self.user, 'login')
+
+        self.assertEqual(self.earned(), {'Bienvenida', '50 puntos', '75 puntos'})
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.points, 75)
+        self.assertEqual(PointsTransaction.objects.filter(user=self.user, transaction_type='achievement').count(), 2)
+
+    def test_achievements_are_granted_once(self):
+        make_achievement('total_logins', 1, points_reward=10)
+        streak = Streak.objects.create(user=self.user, total_logins=3)
+
+        self.assertEqual(len(StreakService.check_achievements(self.user, streak=streak)), 1)
+        self.assertEqual(StreakService.check_achievements(self.user, streak=streak), [])
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.points, 10)
+
+    def test_new_achievements_are_picked_up_without_waiting_for_the_cache(self):
+        streak = Streak.objects.create(user=self.user, total_logins=3)
+        self.assertEqual(StreakService.check_achievements(self.user, streak=streak), [])
+
+        make_achievement('total_logins', 3)
+        self.assertEqual(len(StreakService.check_achievements(self.user, streak=streak)), 1)
+
+
+class ActivityEventUploadTests(TestCase):
+    url = '/api/streaks/streaks/record_activities/'
+
+    def setUp(self):
+        invalidate_achievement_rules()
+        self.addCleanup(invalidate_achievement_rules)
+        self.user = make_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def upload(self, *occurred_at):
+        events = [{'activity_type': 'login', 'occurred_at': value.isoformat()} for value in occurred_at]
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(self.url, {'events': events}, format='json')
+
+    def test_recent_events_are_folded_into_the_streak(self):
+        response = self.upload(timezone.now() - timedelta(hours=1))
+
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(Streak.objects.get(user=self.user).total_logins, 1)
+        self.assertFalse(ActivityEvent.objects.filter(user=self.user, processed_at__isnull=True).exists())
+
+    def test_rejects_events_older_than_the_max_age(self):
+        response = self.upload(timezone.now() - timedelta(days=3))
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(ActivityEvent.objects.filter(user=self.user).exists())
+
+    def test_rejects_events_before_the_last_processed_one(self):
+        now = timezone.now()
+        self.assertEqual(self.upload(now - timedelta(hours=2)).status_code, 202)
+
+        response = self.upload(now - timedelta(hours=1), now - timedelta(hours=3))
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(ActivityEvent.objects.filter(user=self.user).count(), 1)
+        self.assertEqual(self.upload(now - timedelta(hours=1)).status_code, 202)
+
+
+class ViewJobsChallengeTests(TestCase):
+
+    def setUp(self):
+        invalidate_achievement_rules()
+        self.addCleanup(invalidate_achievement_rules)
+        self.user = make_user()
+        self.challenge = Challenge.objects.create(
+            title='Explora 2 empleos',
+            description='Mira 2 ofertas',
+            challenge_type='daily',
+            category='exploration',
+            target_action='view_jobs',
+            target_count=2,
+            points_reward=10
+        )
+        self.user_challenge = UserChallenge.objects.create(user=self.user, challenge=self.challenge)
+
+    def test_job_view_reports_advance_the_challenge(self):
+        StreakService.record_activity(self.user, 'job_viewed')
+        self.user_challenge.refresh_from_db()
+        self.assertEqual((self.user_challenge.current_progress, self.user_challenge.status), (1, 'active'))
+
+        StreakService.record_activity(self.user, 'job_viewed')
+        self.user_challenge.refresh_from_db()
+        self.assertEqual(self.user_challenge.status, 'completed')
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.points, self.user_challenge.points_earned)
+
+    def test_other_activities_do_not_count_as_job_views(self):
+        StreakService.record_activity(self.user, 'login')
+        self.user_challenge.refresh_from_db()
+        self.assertEqual(self.user_challenge.current_progress, 0)
+
+    def test_editing_the_challenge_action_moves_active_user_challenges(self):
+        self.challenge.target_action = 'save_jobs'
+        self.challenge.save()
+
+        StreakService.record_activity(self.user, 'job_viewed')
+        self.user_challenge.refresh_from_db()
+        self.assertEqual((self.user_challenge.target_action, self.user_challenge.current_progress), ('save_jobs', 0))
+
+        SavedJob.objects.create(user=self.user, job=make_job(make_user()))
+        self.user_challenge.refresh_from_db()
+        self.assertEqual(self.user_challenge.current_progress, 1)
+
+
+class PointsLeaderboardTests(TestCase):
+
+    def setUp(self):
+        # Fresh ranking per test: it is loaded lazily from the database on first read
+        patcher = mock.patch.object(leaderboard, '_local_leaderboard', leaderboard.LocalLeaderboard())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.users = {points: make_user(points=points) for points in (50, 30, 10)}
+        self.tied = make_user(points=30)
+        self.client = APIClient()
+        self.client.force_authenticate(self.users[10])
+
+    def test_top_uses_competition_ranking(self):
+        ranking = [(entry['rank'], entry['points']) for entry in leaderboard.top(3)]
+        self.assertEqual(ranking, [(1, 50), (2, 30), (2, 30)])
+        self.assertEqual(leaderboard.get_leaderboard().rank(self.users[10].pk), 4)
+
+    def test_around_starts_at_the_right_rank(self):
+        around = leaderboard.around(str(self.users[10].pk), 1)
+        self.assertEqual([(entry['rank'], entry['points']) for entry in around], [(2, 30), (4, 10)])
+
+    def test_point_changes_reach_the_ranking_on_commit(self):
+        leaderboard.top(1)
+        with self.captureOnCommitCallbacks(execute=True):
+            add_points(self.users[10], 25)
+
+        response = self.client.get('/api/streaks/leaderboard/my_rank/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data['rank'], response.data['total_users']), (2, 4))
+        top = self.client.get('/api/streaks/leaderboard/top_users/', {'limit': 2}).data['leaderboard']
+        self.assertEqual([entry['user_email'] for entry in top], [self.users[50].email, self.users[10].email])
+
+    def test_limit_and_radius_are_clamped(self):
+        for limit in ('0', '-1'):
+            top = self.client.get('/api/streaks/leaderboard/top_users/', {'limit': limit}).data['leaderboard']
+            self.assertEqual([entry['points'] for entry in top], [50])
+        around = self.client.get('/api/streaks/leaderboard/around_me/', {'radius': '-3'}).data['leaderboard']
+        self.assertEqual([entry['points'] for entry in around], [10])
+
+        self.assertEqual(self.client.get('/api/streaks/leaderboard/top_users/', {'limit': 'abc'}).status_code, 400)
+        self.assertEqual(self.client.get('/api/streaks/leaderboard/around_me/', {'radius': 'abc'}).status_code, 400)
+
+
+@override_settings(LEADERBOARD_BACKEND='redis')
+class RedisLeaderboardTests(TestCase):
+
+    def setUp(self):
+        patcher = mock.patch('joby_api.redis_client.get_redis', return_value=fakeredis.FakeRedis(decode_responses=True))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.users = {points: make_user(points=points) for points in (50, 30, 10)}
+
+    def test_missing_ranking_is_loaded_from_the_database(self):
+        self.assertEqual([entry['points'] for entry in leaderboard.top(3)], [50, 30, 10])
+
+    def test_increments_of_users_missing_from_the_ranking_store_the_balance(self):
+        leaderboard.top(1)
+        newcomer = make_user(points=100)
+        leaderboard.get_leaderboard().remove(newcomer.pk)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            add_points(newcomer, 20)
+            add_points(newcomer, 25)
+        with self.captureOnCommitCallbacks(execute=True):
+            add_points(self.users[10], 5)
+
+        ranking = {entry['user_id']: entry['points'] for entry in leaderboard.top(10)}
+        self.assertEqual((ranking[str(newcomer.pk)], ranking[str(self.users[10].pk)]), (145, 15))
+
+
+class PeriodLeaderboardTests(TestCase):
+
+    def setUp(self):
+        self.first, self.second, self.third = make_user(), make_user(), make_user()
+
+    def aggregate(self):
+        # Past the aggregation lag, so the rows just created are folded
+        return aggregate_period_leaderboards(now=timezone.now() + timedelta(minutes=5))
+
+    def ranking(self, period='daily'):
+        return list(
+            Leaderboard.objects.filter(period=period).order_by('rank', 'user__email').values_list('user_id', 'points', 'rank')
+        )
+
+    def test_ranks_every_period_with_earned_points_only(self):
+        award_points(self.first, 'bonus', 30, 'Bonus')
+        award_points(self.second, 'bonus', 30, 'Bonus')
+        award_points(self.third, 'bonus', 40, 'Bonus')
+        spend(self.third, 'redeem', 30, 'Canje')
+
+        self.aggregate()
+
+        for period in PERIODS:
+            ranking = self.ranking(period)
+            self.assertEqual(ranking[0], (self.third.id, 40, 1))
+            self.assertEqual({row[1:] for row in ranking[1:]}, {(30, 2)})
+
+    def test_later_runs_only_fold_new_points(self):
+        award_points(self.first, 'bonus', 10, 'Bonus')
+        award_points(self.second, 'bonus', 20, 'Bonus')
+        # Earned before the lag: the run folds them and leaves the cursor before the next row
+        PointsTransaction.objects.update(created_at=timezone.now() - timedelta(minutes=5))
+        self.assertEqual(aggregate_period_leaderboards(), 6)
+
+        award_points(self.first, 'bonus', 15, 'Bonus')
+        self.assertEqual(self.aggregate(), 3)
+        self.assertEqual(self.aggregate(), 0)
+
+        self.assertEqual(self.ranking(), [(self.first.id, 25, 1), (self.second.id, 20, 2)])
+
+    def test_period_endpoint_reads_the_current_period(self):
+        award_points(self.first, 'bonus', 10, 'Bonus')
+        award_points(self.second, 'bonus', 20, 'Bonus')
+        self.aggregate()
+        client = APIClient()
+        client.force_authenticate(self.first)
+
+        top = client.get('/api/streaks/leaderboard/top_users/', {'period': 'weekly'}).data['leaderboard']
+        mine = client.get('/api/streaks/leaderboard/my_rank/', {'period': 'weekly'}).data
+
+        self.assertEqual([entry['points'] for entry in top], [20, 10])
+        self.assertEqual((mine['rank'], mine['total_users'], mine['points']), (2, 2, 10))
+        self.assertEqual(client.get('/api/streaks/leaderboard/top_users/', {'period': 'yearly'}).status_code, 400)
+
+
+class StreakEndpointQueryBudgetTests(TestCase):
+    """List endpoints stay within their budget and don't query per row"""
+
+    def setUp(self):
+        self.user = make_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        for index in range(8):
+            achievement = make_achievement('total_logins', index + 1)
+            if index % 2:
+                UserAchievement.objects.create(user=self.user, achievement=achievement)
+            challenge = Challenge.objects.create(
+                title=f'Reto {index}',
+                description='Reto de prueba',
+                challenge_type='daily',
+                category='profile',
+                target_action='custom',
+                target_count=5
+            )
+            UserChallenge.objects.create(user=self.user, challenge=challenge, current_progress=index % 5)
+        for _ in range(8):
+            award_points(make_user(), 'bonus', 10, 'Bonus')
+        PointsTransaction.objects.update(created_at=timezone.now() - timedelta(minutes=5))
+        aggregate_period_leaderboards()
+
+    def check(self, path):
+        with assert_no_repeated_queries():
+            response = assert_view_within_budget(self.client, 'get', path)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_achievements(self):
+        rows = self.check('/api/streaks/achievements/').data['results']
+        self.assertEqual(sum(1 for row in rows if row['is_earned']), 4)
+
+    def test_challenges(self):
+        self.check('/api/streaks/challenges/')
+        self.check('/api/streaks/user-challenges/')
+        self.check('/api/streaks/user-challenges/active/')
+
+    def test_leaderboards(self):
+        self.check('/api/streaks/leaderboard/')
+        self.check('/api/streaks/leaderboard/top_users/?period=daily')
+        self.check('/api/streaks/leaderboard/top_users/')
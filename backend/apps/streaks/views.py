@@ -1,17 +1,37 @@
+import logging
+from uuid import UUID
+
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
+from django.db import transaction
 from django.db.models import Sum, Count, Q
 from django.utils import timezone
 
-from .models import Streak, Achievement, UserAchievement, PointsHistory, Leaderboard, Challenge, UserChallenge
+from .models import (
+    Streak, Achievement, UserAchievement, Leaderboard, Challenge, UserChallenge, ActivityEvent
+)
 from .serializers import (
     StreakSerializer, AchievementSerializer, UserAchievementSerializer,
     PointsHistorySerializer, LeaderboardSerializer, UserStatsSerializer,
-    ChallengeSerializer, UserChallengeSerializer, ChallengeProgressSerializer
+    ChallengeSerializer, UserChallengeSerializer, ChallengeProgressSerializer,
+    ActivityEventBatchSerializer
 )
+from apps.users.models_referral import PointsTransaction
+from apps.users.points import points_summary
 from .services import StreakService
+from . import leaderboard
+from .period_leaderboard import PERIODS, period_bounds
+from .challenges import SERVER_TRACKED_ACTIONS
+
+# Bounds for the leaderboard query parameters
+LEADERBOARD_DEFAULT_LIMIT = 10
+LEADERBOARD_MAX_LIMIT = 100
+AROUND_ME_DEFAULT_RADIUS = 5
+AROUND_ME_MAX_RADIUS = 50
+
+logger = logging.getLogger(__name__)
 
 
 class StreakViewSet(viewsets.ReadOnlyModelViewSet):
@@ -19,6 +39,7 @@ class StreakViewSet(viewsets.ReadOnlyModelViewSet):
     
     serializer_class = StreakSerializer
     permission_classes = [IsAuthenticated]
+    query_budget = {'default': 5, 'record_activity': 15, 'record_activities': 25}
     
     def get_queryset(self):
         return Streak.objects.filter(user=self.request.user)
@@ -54,6 +75,42 @@ class StreakViewSet(viewsets.ReadOnlyModelViewSet):
             'streak_updated': streak_updated,
             'message': 'Activity recorded successfully'
         })
+    
+    @action(detail=False, methods=['post'])
+    def record_activities(self, request):
+        """
+        Record a batch of timestamped activity events. They are stored and folded
+        into the streak, challenges and achievements in the background.
+        """
+        serializer = ActivityEventBatchSerializer(data=request.data, context={'request': request})
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        events = [
+            ActivityEvent(user=request.user, **event)
+            for event in serializer.validated_data['events']
+        ]
+        with transaction.atomic():
+            # Events already uploaded with the same client_event_id are ignored
+            ActivityEvent.objects.bulk_create(events, ignore_conflicts=True)
+            transaction.on_commit(lambda: self._process_activity_events(request.user))
+        
+        return Response({
+            'received': len(events),
+            'message': 'Activity queued successfully'
+        }, status=status.HTTP_202_ACCEPTED)
+    
+    @staticmethod
+    def _process_activity_events(user):
+        from .activity import fold_activity_events
+        from .tasks import process_activity_events
+        
+        try:
+            process_activity_events.delay(str(user.id))
+        except Exception as e:
+            # No broker available: fold the batch in the request instead of losing it
+            logger.error(f"Could not queue activity events for {user.id}: {str(e)}")
+            fold_activity_events(user)
 
 
 class AchievementViewSet(viewsets.ReadOnlyModelViewSet):
@@ -61,6 +118,7 @@ class AchievementViewSet(viewsets.ReadOnlyModelViewSet):
     
     serializer_class = AchievementSerializer
     permission_classes = [IsAuthenticated]
+    query_budget = {'default': 5, 'check_progress': 20}
     queryset = Achievement.objects.filter(is_active=True)
     
     @action(detail=False, methods=['get'])
@@ -106,30 +164,15 @@ class PointsHistoryViewSet(viewsets.ReadOnlyModelViewSet):
     
     serializer_class = PointsHistorySerializer
     permission_classes = [IsAuthenticated]
+    query_budget = 5
     
     def get_queryset(self):
-        return PointsHistory.objects.filter(user=self.request.user)
+        return PointsTransaction.objects.filter(user=self.request.user)
     
     @action(detail=False, methods=['get'])
     def summary(self, request):
         """Get points summary"""
-        total_earned = PointsHistory.objects.filter(
-            user=request.user,
-            points__gt=0
-        ).aggregate(total=Sum('points'))['total'] or 0
-        
-        by_action = PointsHistory.objects.filter(
-            user=request.user
-        ).values('action').annotate(
-            total=Sum('points'),
-            count=Count('id')
-        ).order_by('-total')
-        
-        return Response({
-            'total_points': request.user.points,
-            'total_earned': total_earned,
-            'by_action': list(by_action)
-        })
+        return Response(points_summary(request.user))
 
 
 class LeaderboardViewSet(viewsets.ReadOnlyModelViewSet):
@@ -137,36 +180,33 @@ class LeaderboardViewSet(viewsets.ReadOnlyModelViewSet):
     
     serializer_class = LeaderboardSerializer
     permission_classes = [IsAuthenticated]
-    queryset = Leaderboard.objects.all()
+    queryset = Leaderboard.objects.select_related('user')
+    query_budget = 8
     
     @action(detail=False, methods=['get'])
     def top_users(self, request):
         """Get top users by points"""
         period = request.query_params.get('period', 'all_time')
-        limit = int(request.query_params.get('limit', 10))
+        try:
+            limit = int(request.query_params.get('limit', LEADERBOARD_DEFAULT_LIMIT))
+        except ValueError:
+            return Response({'error': 'limit debe ser un entero'}, status=status.HTTP_400_BAD_REQUEST)
+        # limit <= 0 would read the whole sorted set (ZREVRANGE 0 -1)
+        limit = min(max(limit, 1), LEADERBOARD_MAX_LIMIT)
+        
+        if period != 'all_time' and period not in PERIODS:
+            return Response({'error': 'Periodo inválido'}, status=status.HTTP_400_BAD_REQUEST)
         
         if period == 'all_time':
-            # Get top users by total points
-            from apps.users.models import User
-            top_users = User.objects.order_by('-points')[:limit]
-            
-            leaderboard_data = [
-                {
-                    'rank': idx + 1,
-                    'user_name': user.name,
-                    'user_email': user.email,
-                    'points': user.points,
-                    'current_streak': getattr(user.streak, 'current_streak', 0) if hasattr(user, 'streak') else 0
-                }
-                for idx, user in enumerate(top_users)
-            ]
+            # Get top users by total points from the sorted leaderboard
+            leaderboard_data = self._with_users(leaderboard.top(limit))
         else:
-            # Get from Leaderboard cache
-            today = timezone.now().date()
+            # Get from Leaderboard rows of the current period
+            period_start = period_bounds(period, timezone.localdate())[0]
             entries = Leaderboard.objects.filter(
                 period=period,
-                period_end__gte=today
-            ).order_by('rank')[:limit]
+                period_start=period_start
+            ).select_related('user').order_by('rank')[:limit]
             
             leaderboard_data = LeaderboardSerializer(entries, many=True).data
         
@@ -179,26 +219,72 @@ class LeaderboardViewSet(viewsets.ReadOnlyModelViewSet):
     def my_rank(self, request):
         """Get current user's ranking"""
         user = request.user
+        period = request.query_params.get('period', 'all_time')
         
-        # Get user's rank (all time)
-        from apps.users.models import User
-        higher_rank_count = User.objects.filter(points__gt=user.points).count()
-        rank = higher_rank_count + 1
-        
-        total_users = User.objects.count()
+        if period == 'all_time':
+            # Get user's rank (all time)
+            rank = leaderboard.get_leaderboard().rank(user.pk)
+            total_users = leaderboard.get_leaderboard().count()
+            points = user.points
+        elif period in PERIODS:
+            # Users ranked in the current period
+            period_start = period_bounds(period, timezone.localdate())[0]
+            entries = Leaderboard.objects.filter(period=period, period_start=period_start)
+            entry = entries.filter(user=user).first()
+            rank = entry.rank if entry else None
+            total_users = entries.count()
+            points = entry.points if entry else 0
+        else:
+            return Response({'error': 'Periodo inválido'}, status=status.HTTP_400_BAD_REQUEST)
         
         return Response({
+            'period': period,
             'rank': rank,
             'total_users': total_users,
-            'points': user.points,
-            'percentile': round((1 - rank / total_users) * 100, 2) if total_users > 0 else 0
+            'points': points,
+            'percentile': round((1 - rank / total_users) * 100, 2) if rank and total_users > 0 else 0
         })
+    
+    @action(detail=False, methods=['get'])
+    def around_me(self, request):
+        """Get the users ranked right above and below the current user"""
+        try:
+            radius = int(request.query_params.get('radius', AROUND_ME_DEFAULT_RADIUS))
+        except ValueError:
+            return Response({'error': 'radius debe ser un entero'}, status=status.HTTP_400_BAD_REQUEST)
+        radius = min(max(radius, 0), AROUND_ME_MAX_RADIUS)
+        
+        return Response({
+            'period': 'all_time',
+            'leaderboard': self._with_users(leaderboard.around(request.user.pk, radius))
+        })
+    
+    @staticmethod
+    def _with_users(entries):
+        """Add name, email and streak to leaderboard entries with one query"""
+        from apps.users.models import User
+        users = User.objects.select_related('streak').in_bulk([entry['user_id'] for entry in entries])
+        
+        leaderboard_data = []
+        for entry in entries:
+            user = users.get(UUID(entry['user_id']))
+            if user is None:
+                continue  # Deleted since the last leaderboard update
+            leaderboard_data.append({
+                'rank': entry['rank'],
+                'user_name': user.name,
+                'user_email': user.email,
+                'points': entry['points'],
+                'current_streak': getattr(user.streak, 'current_streak', 0) if hasattr(user, 'streak') else 0
+            })
+        return leaderboard_data
 
 
 class StatsViewSet(viewsets.ViewSet):
     """ViewSet for comprehensive user statistics"""
     
     permission_classes = [IsAuthenticated]
+    query_budget = 10
     
     @action(detail=False, methods=['get'])
     def me(self, request):
@@ -213,6 +299,7 @@ class ChallengeViewSet(viewsets.ReadOnlyModelViewSet):
     
     serializer_class = ChallengeSerializer
     permission_classes = [IsAuthenticated]
+    query_budget = 6
     
     def get_queryset(self):
         """Get available challenges"""
@@ -322,9 +409,10 @@ class UserChallengeViewSet(viewsets.ReadOnlyModelViewSet):
     
     serializer_class = UserChallengeSerializer
     permission_classes = [IsAuthenticated]
+    query_budget = {'default': 6, 'update_progress': 15}
     
     def get_queryset(self):
-        return UserChallenge.objects.filter(user=self.request.user)
+        return UserChallenge.objects.filter(user=self.request.user).select_related('challenge')
     
     @action(detail=False, methods=['get'])
     def active(self, request):
@@ -332,7 +420,7 @@ class UserChallengeViewSet(viewsets.ReadOnlyModelViewSet):
         active_challenges = UserChallenge.objects.filter(
             user=request.user,
             status='active'
-        )
+        ).select_related('challenge')
         
         serializer = self.get_serializer(active_challenges, many=True)
         return Response(serializer.data)
@@ -343,7 +431,7 @@ class UserChallengeViewSet(viewsets.ReadOnlyModelViewSet):
         completed = UserChallenge.objects.filter(
             user=request.user,
             status='completed'
-        )
+        ).select_related('challenge')
         
         serializer = self.get_serializer(completed, many=True)
         return Response(serializer.data)
@@ -369,6 +457,12 @@ class UserChallengeViewSet(viewsets.ReadOnlyModelViewSet):
                 'error': 'No tienes este reto activo'
             }, status=status.HTTP_404_NOT_FOUND)
         
+        # Progress for these actions is recorded by the backend when they happen
+        if user_challenge.target_action in SERVER_TRACKED_ACTIONS:
+            return Response({
+                'error': 'El progreso de este reto se actualiza automáticamente'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
         # Update progress
         points_earned = user_challenge.update_progress(increment)
         
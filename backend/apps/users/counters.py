@@ -0,0 +1,115 @@
+"""
+Atomic counters for points, streaks, referral totals and mentee slots.
+
+Every helper issues a single ``col = col + n`` UPDATE, so concurrent requests
+never overwrite each other's increments. On PostgreSQL the new values come back
+in the same statement (UPDATE ... RETURNING).
+"""
+from django.db import connection, transaction
+from django.db.models import F
+
+
+def increment_returning(model, filters, increments, values=None, returning=(), at_least=None):
+    """
+    Add ``increments`` ({field: delta}) and set ``values`` ({field: value}) on the
+    rows matching ``filters`` ({field: value}, equality only) and ``at_least``
+    ({field: minimum}, checked before the update).
+
+    Returns a dict with the new value of every incremented field plus the
+    ``returning`` fields for the first matching row, or None if no row matched.
+    """
+    values = values or {}
+    at_least = at_least or {}
+    fields = list(increments) + [field for field in returning if field not in increments]
+
+    if connection.vendor == 'postgresql':
+        meta = model._meta
+
+        def column(name):
+            return connection.ops.quote_name(meta.get_field(name).column)
+
+        assignments = [f'{column(name)} = {column(name)} + %s' for name in increments]
+        assignments += [f'{column(name)} = %s' for name in values]
+        conditions = [f'{column(name)} = %s' for name in filters]
+        conditions += [f'{column(name)} >= %s' for name in at_least]
+        params = list(increments.values())
+        params += [meta.get_field(name).get_db_prep_save(value, connection) for name, value in values.items()]
+        params += [meta.get_field(name).get_db_prep_value(value, connection) for name, value in filters.items()]
+        params += list(at_least.values())
+        sql = (
+            f'UPDATE {connection.ops.quote_name(meta.db_table)} SET {", ".join(assignments)} '
+            f'WHERE {" AND ".join(conditions)} RETURNING {", ".join(column(name) for name in fields)}'
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            row = cursor.fetchone()
+        return dict(zip(fields, row)) if row else None
+
+    # Other databases: the same UPDATE, then read the row back in the same transaction
+    with transaction.atomic():
+        queryset = model.objects.filter(**filters, **{f'{name}__gte': value for name, value in at_least.items()})
+        updated = queryset.update(**{name: F(name) + delta for name, delta in increments.items()}, **values)
+        if not updated:
+            return None
+        return model.objects.filter(**filters).values(*fields).first()
+
+
+def add_points(user, points):
+    """Atomically add (or subtract) points to the user; returns and stores the new balance"""
+    from apps.users.models import User
+
+    from apps.streaks.leaderboard import record_points
+
+    row = increment_returning(User, {'id': user.pk}, {'points': points})
+    user.points = row['points']
+    record_points(user.pk, points=user.points, delta=points)
+    return user.points
+
+
+def spend_points(user, points):
+    """
+    Atomically subtract points only if the balance covers them. Returns and stores
+    the new balance, or None (nothing changed) if there were not enough points.
+    """
+    from apps.users.models import User
+    from apps.streaks.leaderboard import record_points
+
+    row = increment_returning(User, {'id': user.pk}, {'points': -points}, at_least={'points': points})
+    if row is None:
+        return None
+    user.points = row['points']
+    record_points(user.pk, points=user.points, delta=-points)
+    return user.points
+
+
+def add_referral_points(referral_code_id, points):
+    """Atomically add to ReferralCode.total_points_earned"""
+    from apps.users.models_referral import ReferralCode
+
+    ReferralCode.objects.filter(pk=referral_code_id).update(total_points_earned=F('total_points_earned') + points)
+
+
+def claim_mentee_slot(mentor_id):
+    """
+    Atomically take one mentee slot of the mentor's SuccessStory, only if they are
+    still mentoring and below max_mentees. Returns False if there was no free slot.
+    """
+    from apps.users.models_mentorship import SuccessStory
+
+    return bool(
+        SuccessStory.objects.filter(
+            user_id=mentor_id,
+            is_willing_to_mentor=True,
+            is_active=True,
+            active_mentees__lt=F('max_mentees')
+        ).update(active_mentees=F('active_mentees') + 1)
+    )
+
+
+def release_mentee_slot(mentor_id):
+    """Atomically give back a mentee slot (an accepted request was removed)"""
+    from apps.users.models_mentorship import SuccessStory
+
+    SuccessStory.objects.filter(user_id=mentor_id, active_mentees__gt=0).update(
+        active_mentees=F('active_mentees') - 1
+    )
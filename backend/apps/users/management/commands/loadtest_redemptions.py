@@ -0,0 +1,146 @@
+"""
+Management command para probar canjes concurrentes de recompensas contra la base de datos local
+"""
+import threading
+import time
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count, Sum
+
+from apps.users.models import User
+from apps.users.models_referral import PointsTransaction, Reward, RewardRedemption
+from apps.users.rewards import RedemptionError, redeem_reward
+
+
+class Command(BaseCommand):
+    help = (
+        'Lanza canjes concurrentes de una recompensa limitada y verifica que no se '
+        'sobrevenda el stock ni se gasten puntos de más'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=50, help='Usuarios de prueba')
+        parser.add_argument('--attempts', type=int, default=3, help='Intentos de canje por usuario')
+        parser.add_argument('--threads', type=int, default=16, help='Hilos concurrentes')
+        parser.add_argument('--stock', type=int, default=20, help='Unidades disponibles de la recompensa')
+        parser.add_argument('--cost', type=int, default=10, help='Puntos por canje')
+        parser.add_argument('--points', type=int, default=25, help='Puntos iniciales de cada usuario')
+        parser.add_argument('--max-per-user', type=int, default=2, help='Máximo de canjes por usuario')
+        parser.add_argument('--keep', action='store_true', help='No borrar los datos de prueba')
+        parser.add_argument('--force', action='store_true', help='Ejecutar aunque DEBUG sea False')
+
+    def handle(self, *args, **options):
+        if not settings.DEBUG and not options['force']:
+            raise CommandError('Este comando crea y borra datos; úsalo solo en desarrollo (o con --force)')
+
+        run_id = uuid.uuid4().hex[:8]
+        reward = Reward.objects.create(
+            name=f'Load test {run_id}',
+            description='Recompensa creada por loadtest_redemptions',
+            reward_type='badge',
+            points_required=options['cost'],
+            max_redemptions_per_user=options['max_per_user'],
+            total_available=options['stock']
+        )
+        users = User.objects.bulk_create([
+            User(
+                username=f'loadtest-{run_id}-{index}',
+                email=f'loadtest-{run_id}-{index}@loadtest.local',
+                name=f'Load Test {index}',
+                points=options['points']
+            )
+            for index in range(options['users'])
+        ])
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Lanzando {len(users) * options['attempts']} canjes con {options['threads']} hilos..."
+        ))
+        try:
+            outcomes, elapsed = self._run(users, reward, options)
+            self._report(users, reward, options, outcomes, elapsed)
+        finally:
+            if not options['keep']:
+                User.objects.filter(pk__in=[user.pk for user in users]).delete()
+                reward.delete()
+
+    def _run(self, users, reward, options):
+        outcomes = Counter()
+        lock = threading.Lock()
+        jobs = [user.pk for user in users for _ in range(options['attempts'])]
+        barrier = threading.Barrier(min(options['threads'], len(jobs)))
+
+        def redeem(user_id):
+            try:
+                user = User.objects.get(pk=user_id)
+                try:
+                    redeem_reward(user, Reward.objects.get(pk=reward.pk))
+                    outcome = 'ok'
+                except RedemptionError as e:
+                    outcome = e.message
+                except Exception as e:
+                    outcome = f'error: {e.__class__.__name__}'
+                with lock:
+                    outcomes[outcome] += 1
+            finally:
+                connection.close()
+
+        def start(user_id):
+            # The first wave starts at the same time to maximize contention
+            try:
+                barrier.wait(timeout=5)
+            except threading.BrokenBarrierError:
+                pass
+            redeem(user_id)
+
+        started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=options['threads']) as executor:
+            list(executor.map(start, jobs))
+        return outcomes, time.monotonic() - started
+
+    def _report(self, users, reward, options, outcomes, elapsed):
+        reward.refresh_from_db()
+        user_ids = [user.pk for user in users]
+        redemptions = RewardRedemption.objects.filter(reward=reward)
+        per_user = redemptions.values('user').annotate(total=Count('id'))
+        ledger = dict(
+            PointsTransaction.objects.filter(user_id__in=user_ids, transaction_type='redeem')
+            .values_list('user_id')
+            .annotate(total=Sum('points'))
+        )
+        balances = dict(User.objects.filter(pk__in=user_ids).values_list('pk', 'points'))
+        redeemed_by_user = dict(redemptions.values_list('user').annotate(total=Count('id')))
+
+        total_attempts = sum(outcomes.values())
+        self.stdout.write(
+            f'{total_attempts} intentos en {elapsed:.2f}s ({total_attempts / elapsed:.0f} canjes/s)'
+        )
+        for outcome, count in outcomes.most_common():
+            self.stdout.write(f'  {outcome}: {count}')
+
+        problems = []
+        if redemptions.count() != reward.redeemed_count:
+            problems.append(f'redeemed_count={reward.redeemed_count} pero hay {redemptions.count()} canjes')
+        if reward.redeemed_count > reward.total_available:
+            problems.append(f'Sobreventa: {reward.redeemed_count} canjes de {reward.total_available} disponibles')
+        if any(row['total'] > reward.max_redemptions_per_user for row in per_user):
+            problems.append('Algún usuario superó max_redemptions_per_user')
+        for user_id, points in balances.items():
+            spent = redeemed_by_user.get(user_id, 0) * reward.points_required
+            if points < 0:
+                problems.append(f'Saldo negativo para {user_id}: {points}')
+            elif points != options['points'] - spent or -ledger.get(user_id, 0) != spent:
+                problems.append(f'Saldo o ledger inconsistente para {user_id}')
+
+        if problems:
+            for problem in problems:
+                self.stdout.write(self.style.ERROR(f'✗ {problem}'))
+            raise CommandError(f'{len(problems)} inconsistencias encontradas')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ {reward.redeemed_count}/{reward.total_available} unidades canjeadas, sin sobreventa ni doble gasto'
+        ))
@@ -0,0 +1,32 @@
+"""
+Management command para reconstruir la matriz de similitud con mentores (ProfileMatch)
+"""
+from django.core.management.base import BaseCommand
+from apps.users.models import User
+from apps.users.mentor_matching import refresh_user_row
+
+
+class Command(BaseCommand):
+    help = 'Recalcula los matches con mentores de todos los usuarios (o de uno con --email)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--email',
+            type=str,
+            help='Email del usuario específico',
+        )
+
+    def handle(self, *args, **options):
+        users = User.objects.order_by('pk')
+        if options.get('email'):
+            users = users.filter(email=options['email'])
+
+        self.stdout.write(self.style.SUCCESS('Reconstruyendo matches con mentores...'))
+
+        total_users = 0
+        total_matches = 0
+        for user in users.only('id', 'skills', 'location', 'experience').iterator(chunk_size=500):
+            total_matches += refresh_user_row(user)
+            total_users += 1
+
+        self.stdout.write(self.style.SUCCESS(f'✓ {total_matches} matches guardados para {total_users} usuarios'))
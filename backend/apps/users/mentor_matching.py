@@ -0,0 +1,229 @@
+"""
+Precomputed ProfileMatch rows for find_mentors.
+
+ProfileMatch is a user x mentor similarity matrix kept up to date in the
+background: when a user's skills, location or experience change their row (as a
+seeker) and their column (as a mentor) are recomputed, and when a SuccessStory
+starts or stops being available for mentoring its column is rebuilt or dropped.
+Columns are split into chunks of seekers so each Celery job stays small.
+
+Scores are computed with NumPy, with the same results as
+views_mentorship.calculate_profile_similarity. Only matches that can be shown
+(MIN_SIMILARITY_SCORE or more) are stored, so find_mentors only reads the top rows
+through the (user, -similarity_score) index.
+"""
+import numpy as np
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+
+from apps.jobs.matching import SkillMatrix, SkillVocabulary
+from .models_mentorship import ProfileMatch
+
+# Only matches scoring at least this are stored and shown
+MIN_SIMILARITY_SCORE = 5
+
+MAX_MATCHES = 20
+
+# User and SuccessStory fields that change the matrix
+USER_MATCH_FIELDS = ('skills', 'location', 'experience')
+STORY_MATCH_FIELDS = ('is_willing_to_mentor', 'is_active')
+
+MENTOR_BATCH_SIZE = 2000
+SEEKER_CHUNK_SIZE = 2000
+
+# Same keywords and order as calculate_profile_similarity; 0 means no level detected
+EXPERIENCE_LEVELS = {
+    'junior': 1,
+    'mid': 2,
+    'senior': 3,
+    'lead': 4,
+}
+
+# Experience points by level difference; a difference of 2 adds 10 twice in
+# calculate_profile_similarity and is kept that way
+EXPERIENCE_POINTS_BY_DIFF = np.array([20, 15, 20, 0], dtype=np.float64)
+
+MENTOR_FIELDS = ('id', 'skills', 'location', 'experience')
+
+
+def willing_mentors(exclude_user=None):
+    """Users with an active success story who are willing to mentor"""
+    mentors = get_user_model().objects.filter(
+        success_story__is_willing_to_mentor=True,
+        success_story__is_active=True
+    )
+    if exclude_user is not None:
+        mentors = mentors.exclude(id=exclude_user.id)
+    return mentors
+
+
+def experience_level(experience):
+    if not experience:
+        return 0
+    text = experience.lower()
+    return next((value for keyword, value in EXPERIENCE_LEVELS.items() if keyword in text), 0)
+
+
+def _skill_set(skills):
+    return {skill.lower() for skill in (skills or [])}
+
+
+def score_profiles(user, others):
+    """
+    Similarity scores (0-100) of ``user`` against each of ``others``, in the same
+    order. The score is symmetric, so it serves both rows and columns.
+    """
+    others = list(others)
+    if not others:
+        return np.zeros(0, dtype=np.int64)
+
+    vocabulary = SkillVocabulary()
+    # Jaccard works on sets, so each row holds the unique lowercase skills
+    matrix = SkillMatrix([list(_skill_set(other.skills)) for other in others], vocabulary)
+    user_skills = _skill_set(user.skills)
+    intersection = matrix.overlap_counts(vocabulary.mask_for(user_skills))
+
+    skill_scores = np.zeros(len(others), dtype=np.float64)
+    if user_skills:
+        has_skills = matrix.lengths > 0
+        union = len(user_skills) + matrix.lengths[has_skills] - intersection[has_skills]
+        skill_scores[has_skills] = (intersection[has_skills] / union) * 100 * 0.6
+
+    user_location = (user.location or '').lower()
+    location_scores = np.fromiter(
+        (20.0 if user_location and other.location and other.location.lower() == user_location else 0.0
+         for other in others),
+        dtype=np.float64,
+        count=len(others),
+    )
+
+    experience_scores = np.zeros(len(others), dtype=np.float64)
+    user_level = experience_level(user.experience)
+    if user_level:
+        levels = np.fromiter(
+            (experience_level(other.experience) for other in others), dtype=np.int64, count=len(others)
+        )
+        known = levels > 0
+        experience_scores[known] = EXPERIENCE_POINTS_BY_DIFF[np.abs(levels[known] - user_level)]
+
+    total = skill_scores + location_scores + experience_scores
+    return np.minimum(np.rint(total), 100).astype(np.int64)
+
+
+def _build_match(user, mentor, score):
+    user_skills = _skill_set(user.skills)
+    matching_skills = list(user_skills.intersection(_skill_set(mentor.skills)))
+    skill_overlap = (len(matching_skills) / len(user_skills)) * 100 if user_skills else 0
+    return ProfileMatch(
+        user=user,
+        matched_user=mentor,
+        similarity_score=score,
+        matching_skills=matching_skills,
+        skill_overlap_percentage=round(skill_overlap, 2),
+        same_location=bool(user.location and mentor.location and user.location.lower() == mentor.location.lower())
+    )
+
+
+def upsert_matches(matches):
+    """Insert the matches, or overwrite the (user, matched_user) pairs already stored"""
+    if matches:
+        ProfileMatch.objects.bulk_create(
+            matches,
+            batch_size=1000,
+            update_conflicts=True,
+            unique_fields=['user', 'matched_user'],
+            update_fields=[
+                'similarity_score', 'matching_skills', 'skill_overlap_percentage',
+                'same_location', 'calculated_at',
+            ]
+        )
+
+
+def is_willing_mentor(user):
+    return willing_mentors().filter(pk=user.pk).exists()
+
+
+def refresh_user_row(user):
+    """Recompute the matches of ``user`` against every willing mentor. Returns the number of rows kept"""
+    started_at = timezone.now()
+    mentors = willing_mentors(exclude_user=user).only(*MENTOR_FIELDS).order_by('pk')
+
+    kept = 0
+    batch = []
+    for mentor in mentors.iterator(chunk_size=MENTOR_BATCH_SIZE):
+        batch.append(mentor)
+        if len(batch) == MENTOR_BATCH_SIZE:
+            kept += _refresh_row_batch(user, batch)
+            batch = []
+    if batch:
+        kept += _refresh_row_batch(user, batch)
+
+    # Rows not refreshed above fell below the threshold or are no longer mentors
+    ProfileMatch.objects.filter(user=user, calculated_at__lt=started_at).delete()
+    return kept
+
+
+def _refresh_row_batch(user, mentors):
+    scores = score_profiles(user, mentors).tolist()
+    rows = [
+        _build_match(user, mentor, score)
+        for mentor, score in zip(mentors, scores)
+        if score >= MIN_SIMILARITY_SCORE
+    ]
+    upsert_matches(rows)
+    return len(rows)
+
+
+def seeker_chunks(mentor, chunk_size=SEEKER_CHUNK_SIZE):
+    """IDs of every other user, in keyset-paginated chunks, to split a column into jobs"""
+    user_ids = get_user_model().objects.exclude(pk=mentor.pk).order_by('pk').values_list('pk', flat=True)
+    last_id = None
+    while True:
+        page = user_ids if last_id is None else user_ids.filter(pk__gt=last_id)
+        chunk = list(page[:chunk_size])
+        if not chunk:
+            return
+        yield chunk
+        last_id = chunk[-1]
+
+
+def drop_mentor_column(mentor):
+    """Remove every match pointing at ``mentor`` (no longer mentoring)"""
+    return ProfileMatch.objects.filter(matched_user=mentor).delete()[0]
+
+
+def refresh_mentor_column_chunk(mentor, user_ids):
+    """Recompute the matches of the users in ``user_ids`` against ``mentor``. Returns the number of rows kept"""
+    started_at = timezone.now()
+    if not is_willing_mentor(mentor):
+        ProfileMatch.objects.filter(matched_user=mentor, user_id__in=user_ids).delete()
+        return 0
+
+    seekers = list(get_user_model().objects.filter(pk__in=user_ids).exclude(pk=mentor.pk).only(*MENTOR_FIELDS))
+    scores = score_profiles(mentor, seekers).tolist()
+    rows = [
+        _build_match(seeker, mentor, score)
+        for seeker, score in zip(seekers, scores)
+        if score >= MIN_SIMILARITY_SCORE
+    ]
+    upsert_matches(rows)
+    ProfileMatch.objects.filter(
+        matched_user=mentor, user_id__in=user_ids, calculated_at__lt=started_at
+    ).delete()
+    return len(rows)
+
+
+def top_matches(user, limit=MAX_MATCHES):
+    """Best stored matches of ``user`` among the current willing mentors"""
+    return (
+        ProfileMatch.objects
+        .filter(
+            user=user,
+            similarity_score__gte=MIN_SIMILARITY_SCORE,
+            matched_user__success_story__is_willing_to_mentor=True,
+            matched_user__success_story__is_active=True
+        )
+        .exclude(matched_user=user)
+        .select_related('matched_user__success_story')
+        .order_by('-similarity_score')[:limit]
+    )
@@ -0,0 +1,67 @@
+# Generated by Django 4.2.9 on 2026-10-17 21:54
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def backfill_user_skills(apps, schema_editor):
+    """Build the skill index for users created before it existed"""
+    User = apps.get_model("users", "User")
+    UserSkill = apps.get_model("users", "UserSkill")
+
+    batch = []
+    for user_id, skills in User.objects.values_list("id", "skills").iterator():
+        names = {
+            skill.strip().lower()[:100]
+            for skill in skills or []
+            if isinstance(skill, str) and skill.strip()
+        }
+        batch.extend(UserSkill(user_id=user_id, name=name) for name in names)
+        if len(batch) >= 1000:
+            UserSkill.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    if batch:
+        UserSkill.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("users", "0007_reward_user_points_rewardredemption_referralcode_and_more"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="UserSkill",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=100)),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="skill_index",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "user_skills",
+                "indexes": [
+                    models.Index(
+                        fields=["name", "user"], name="user_skills_name_1d9599_idx"
+                    )
+                ],
+                "unique_together": {("user", "name")},
+            },
+        ),
+        migrations.RunPython(backfill_user_skills, migrations.RunPython.noop),
+    ]
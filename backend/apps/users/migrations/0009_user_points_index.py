@@ -0,0 +1,16 @@
+# Generated by Django 4.2.9 on 2026-10-17 22:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("users", "0008_userskill"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="user",
+            index=models.Index(fields=["-points"], name="users_points_f0ea89_idx"),
+        ),
+    ]
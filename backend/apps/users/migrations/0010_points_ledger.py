@@ -0,0 +1,157 @@
+# Generated by Django 4.2.9 on 2026-10-17 22:21
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Case, Count, F, Sum, When
+import django.db.models.deletion
+
+
+def merge_points_history(apps, schema_editor):
+    """Copy streaks.PointsHistory into the ledger (keeping created_at) and build the rollups"""
+    PointsHistory = apps.get_model("streaks", "PointsHistory")
+    PointsTransaction = apps.get_model("users", "PointsTransaction")
+    PointsActionRollup = apps.get_model("users", "PointsActionRollup")
+
+    quote = schema_editor.quote_name
+    schema_editor.execute(
+        f"INSERT INTO {quote(PointsTransaction._meta.db_table)} "
+        f"(user_id, transaction_type, points, description, created_at) "
+        f"SELECT user_id, CASE WHEN action = 'challenge_completed' THEN 'challenge_complete' ELSE action END, "
+        f"points, description, created_at FROM {quote(PointsHistory._meta.db_table)}"
+    )
+
+    totals = (
+        PointsTransaction.objects.values("user_id", "transaction_type")
+        .annotate(
+            earned=Sum(Case(When(points__gt=0, then=F("points")), default=0)),
+            spent=Sum(Case(When(points__lt=0, then=-F("points")), default=0)),
+            count=Count("id"),
+        )
+        .order_by()
+    )
+    batch = []
+    for row in totals.iterator():
+        batch.append(PointsActionRollup(**row))
+        if len(batch) >= 1000:
+            PointsActionRollup.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        PointsActionRollup.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("users", "0009_user_points_index"),
+        ("streaks", "0006_leaderboardcursor"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PointsActionRollup",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "transaction_type",
+                    models.CharField(
+                        choices=[
+                            ("referral_register", "Referido Registrado"),
+                            ("referral_profile", "Referido Completó Perfil"),
+                            ("referral_employed", "Referido Consiguió Empleo"),
+                            ("welcome_bonus", "Bono de Bienvenida"),
+                            ("challenge_complete", "Reto Completado"),
+                            ("streak_bonus", "Bonus de Racha"),
+                            ("course_complete", "Curso Completado"),
+                            ("redeem", "Canje de Puntos"),
+                            ("admin_adjustment", "Ajuste Administrativo"),
+                            ("login", "Ingreso Diario"),
+                            ("application", "Postulación"),
+                            ("profile_update", "Perfil Actualizado"),
+                            ("streak_milestone", "Hito de Racha"),
+                            ("achievement", "Logro Obtenido"),
+                            ("job_saved", "Empleo Guardado"),
+                            ("job_viewed", "Empleo Visto"),
+                            ("referral", "Referido"),
+                            ("bonus", "Bonus"),
+                        ],
+                        max_length=30,
+                    ),
+                ),
+                (
+                    "earned",
+                    models.IntegerField(default=0, verbose_name="Puntos ganados"),
+                ),
+                (
+                    "spent",
+                    models.IntegerField(default=0, verbose_name="Puntos gastados"),
+                ),
+                ("count", models.IntegerField(default=0, verbose_name="Transacciones")),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "verbose_name": "Resumen de Puntos",
+                "verbose_name_plural": "Resúmenes de Puntos",
+                "db_table": "points_action_rollups",
+            },
+        ),
+        migrations.AlterField(
+            model_name="pointstransaction",
+            name="transaction_type",
+            field=models.CharField(
+                choices=[
+                    ("referral_register", "Referido Registrado"),
+                    ("referral_profile", "Referido Completó Perfil"),
+                    ("referral_employed", "Referido Consiguió Empleo"),
+                    ("welcome_bonus", "Bono de Bienvenida"),
+                    ("challenge_complete", "Reto Completado"),
+                    ("streak_bonus", "Bonus de Racha"),
+                    ("course_complete", "Curso Completado"),
+                    ("redeem", "Canje de Puntos"),
+                    ("admin_adjustment", "Ajuste Administrativo"),
+                    ("login", "Ingreso Diario"),
+                    ("application", "Postulación"),
+                    ("profile_update", "Perfil Actualizado"),
+                    ("streak_milestone", "Hito de Racha"),
+                    ("achievement", "Logro Obtenido"),
+                    ("job_saved", "Empleo Guardado"),
+                    ("job_viewed", "Empleo Visto"),
+                    ("referral", "Referido"),
+                    ("bonus", "Bonus"),
+                ],
+                max_length=30,
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="pointstransaction",
+            index=models.Index(
+                fields=["user", "-created_at"], name="points_tran_user_id_c020a4_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="pointstransaction",
+            index=models.Index(
+                fields=["created_at"], name="points_tran_created_6e4529_idx"
+            ),
+        ),
+        migrations.AddField(
+            model_name="pointsactionrollup",
+            name="user",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="points_rollups",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.AlterUniqueTogether(
+            name="pointsactionrollup",
+            unique_together={("user", "transaction_type")},
+        ),
+        migrations.RunPython(merge_points_history, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 4.2.9 on 2026-10-17 22:23
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_redeemed_count(apps, schema_editor):
+    """Count the redemptions made before redeemed_count existed"""
+    Reward = apps.get_model("users", "Reward")
+    RewardRedemption = apps.get_model("users", "RewardRedemption")
+
+    redemptions = (
+        RewardRedemption.objects.filter(reward=OuterRef("pk"))
+        .order_by()
+        .values("reward")
+        .annotate(total=Count("id"))
+        .values("total")
+    )
+    Reward.objects.update(redeemed_count=Coalesce(Subquery(redemptions), 0))
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("users", "0010_points_ledger"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="reward",
+            name="redeemed_count",
+            field=models.IntegerField(
+                default=0, editable=False, verbose_name="Total Canjeado"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="rewardredemption",
+            index=models.Index(
+                fields=["user", "reward"], name="reward_rede_user_id_14988f_idx"
+            ),
+        ),
+        migrations.RunPython(backfill_redeemed_count, migrations.RunPython.noop),
+    ]
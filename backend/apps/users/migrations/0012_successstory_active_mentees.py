@@ -0,0 +1,39 @@
+# Generated by Django 4.2.9 on 2026-10-17 22:30
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_active_mentees(apps, schema_editor):
+    """Count the requests accepted before active_mentees existed"""
+    SuccessStory = apps.get_model("users", "SuccessStory")
+    MentorshipRequest = apps.get_model("users", "MentorshipRequest")
+
+    accepted = (
+        MentorshipRequest.objects.filter(to_user=OuterRef("user"), status="accepted")
+        .order_by()
+        .values("to_user")
+        .annotate(total=Count("id"))
+        .values("total")
+    )
+    SuccessStory.objects.update(active_mentees=Coalesce(Subquery(accepted), 0))
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("users", "0011_reward_redeemed_count"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="successstory",
+            name="active_mentees",
+            field=models.IntegerField(
+                default=0,
+                editable=False,
+                help_text="Solicitudes aceptadas; se actualiza al aceptar o borrar una solicitud",
+            ),
+        ),
+        migrations.RunPython(backfill_active_mentees, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,115 @@
+# Generated by Django 4.2.9 on 2026-10-17 23:33
+
+from django.db import migrations, models
+from django.db.models import Case, Count, F, Sum, When
+
+# Types the course views recorded before they were added to TRANSACTION_TYPES
+RENAMED_TYPES = {
+    "course_enrolled": "course_enroll",
+    "course_completed": "course_complete",
+}
+
+
+def rename_course_transactions(apps, schema_editor):
+    """Move stored course transactions to the listed types and rebuild their rollups"""
+    PointsTransaction = apps.get_model("users", "PointsTransaction")
+    PointsActionRollup = apps.get_model("users", "PointsActionRollup")
+
+    user_ids = list(
+        PointsTransaction.objects.filter(transaction_type__in=list(RENAMED_TYPES))
+        .values_list("user_id", flat=True)
+        .distinct()
+    )
+    if not user_ids:
+        return
+
+    for old, new in RENAMED_TYPES.items():
+        PointsTransaction.objects.filter(transaction_type=old).update(
+            transaction_type=new
+        )
+
+    types = list(RENAMED_TYPES) + list(RENAMED_TYPES.values())
+    PointsActionRollup.objects.filter(
+        user_id__in=user_ids, transaction_type__in=types
+    ).delete()
+    totals = (
+        PointsTransaction.objects.filter(
+            user_id__in=user_ids, transaction_type__in=types
+        )
+        .values("user_id", "transaction_type")
+        .annotate(
+            earned=Sum(Case(When(points__gt=0, then=F("points")), default=0)),
+            spent=Sum(Case(When(points__lt=0, then=-F("points")), default=0)),
+            count=Count("id"),
+        )
+        .order_by()
+    )
+    PointsActionRollup.objects.bulk_create(
+        [PointsActionRollup(**row) for row in totals], batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("users", "0012_successstory_active_mentees"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="pointsactionrollup",
+            name="transaction_type",
+            field=models.CharField(
+                choices=[
+                    ("referral_register", "Referido Registrado"),
+                    ("referral_profile", "Referido Completó Perfil"),
+                    ("referral_employed", "Referido Consiguió Empleo"),
+                    ("welcome_bonus", "Bono de Bienvenida"),
+                    ("challenge_complete", "Reto Completado"),
+                    ("streak_bonus", "Bonus de Racha"),
+                    ("course_enroll", "Inscripción a Curso"),
+                    ("course_complete", "Curso Completado"),
+                    ("redeem", "Canje de Puntos"),
+                    ("admin_adjustment", "Ajuste Administrativo"),
+                    ("login", "Ingreso Diario"),
+                    ("application", "Postulación"),
+                    ("profile_update", "Perfil Actualizado"),
+                    ("streak_milestone", "Hito de Racha"),
+                    ("achievement", "Logro Obtenido"),
+                    ("job_saved", "Empleo Guardado"),
+                    ("job_viewed", "Empleo Visto"),
+                    ("referral", "Referido"),
+                    ("bonus", "Bonus"),
+                ],
+                max_length=30,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="pointstransaction",
+            name="transaction_type",
+            field=models.CharField(
+                choices=[
+                    ("referral_register", "Referido Registrado"),
+                    ("referral_profile", "Referido Completó Perfil"),
+                    ("referral_employed", "Referido Consiguió Empleo"),
+                    ("welcome_bonus", "Bono de Bienvenida"),
+                    ("challenge_complete", "Reto Completado"),
+                    ("streak_bonus", "Bonus de Racha"),
+                    ("course_enroll", "Inscripción a Curso"),
+                    ("course_complete", "Curso Completado"),
+                    ("redeem", "Canje de Puntos"),
+                    ("admin_adjustment", "Ajuste Administrativo"),
+                    ("login", "Ingreso Diario"),
+                    ("application", "Postulación"),
+                    ("profile_update", "Perfil Actualizado"),
+                    ("streak_milestone", "Hito de Racha"),
+                    ("achievement", "Logro Obtenido"),
+                    ("job_saved", "Empleo Guardado"),
+                    ("job_viewed", "Empleo Visto"),
+                    ("referral", "Referido"),
+                    ("bonus", "Bonus"),
+                ],
+                max_length=30,
+            ),
+        ),
+        migrations.RunPython(rename_course_transactions, migrations.RunPython.noop),
+    ]
@@ -46,10 +46,39 @@ class User(AbstractUser):
         verbose_name = 'User'
         verbose_name_plural = 'Users'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-points']),
+        ]
     
     def __str__(self):
         return f"{self.name} ({self.email})"
     
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        
+        # Keep the skill index in sync unless this save didn't touch skills
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'skills' in update_fields:
+            self.sync_skill_index()
+    
+    def sync_skill_index(self):
+        """Rewrite the UserSkill rows so they match skills"""
+        from apps.jobs.models import JobSkill
+        
+        names = JobSkill.normalize_list(self.skills)
+        existing = set(self.skill_index.values_list('name', flat=True))
+        
+        stale = existing - names
+        if stale:
+            self.skill_index.filter(name__in=stale).delete()
+        
+        missing = names - existing
+        if missing:
+            UserSkill.objects.bulk_create(
+                [UserSkill(user=self, name=name) for name in missing],
+                ignore_conflicts=True
+            )
+    
     @property
     def profile_completion_percentage(self):
         """Calculate profile completion percentage"""
@@ -74,6 +103,23 @@ class User(AbstractUser):
         return self.name.split()[0] if self.name else self.username
 
 
+class UserSkill(models.Model):
+    """Normalized skill index for users (one row per user and skill), used to find job candidates"""
+    
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='skill_index')
+    name = models.CharField(max_length=100)
+    
+    class Meta:
+        db_table = 'user_skills'
+        unique_together = ['user', 'name']
+        indexes = [
+            models.Index(fields=['name', 'user']),
+        ]
+    
+    def __str__(self):
+        return f"{self.name} ({self.user_id})"
+
+
 class MotivationalMessage(models.Model):
     """Mensajes motivacionales para mostrar en la app"""
     
@@ -167,7 +213,7 @@ from .models_courses import Company, Course, UserCourse
 from .models_mentorship import SuccessStory, ProfileMatch, MentorshipRequest
 
 __all__ = [
-    'User', 'MotivationalMessage', 'JobAlertPreference',
+    'User', 'UserSkill', 'MotivationalMessage', 'JobAlertPreference',
     'Company', 'Course', 'UserCourse',
     'SuccessStory', 'ProfileMatch', 'MentorshipRequest'
 ]
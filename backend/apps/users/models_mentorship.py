@@ -39,6 +39,11 @@ class SuccessStory(models.Model):
     # Mentorship availability
     is_willing_to_mentor = models.BooleanField(default=False)
     max_mentees = models.IntegerField(default=3)
+    active_mentees = models.IntegerField(
+        default=0,
+        editable=False,
+        help_text="Solicitudes aceptadas; se actualiza al aceptar o borrar una solicitud"
+    )
     
     # Story details
     success_description = models.TextField(
@@ -63,12 +68,24 @@ class SuccessStory(models.Model):
     def __str__(self):
         return f"{self.user.name} - {self.position} at {self.company}"
     
+    def save(self, *args, **kwargs):
+        # active_mentees only changes through F() updates (claim/release_mentee_slot);
+        # saving an existing story must not write back a stale count
+        if not self._state.adding and not kwargs.get('force_insert'):
+            update_fields = kwargs.get('update_fields')
+            if update_fields is None:
+                deferred = self.get_deferred_fields()
+                update_fields = [
+                    field.name for field in self._meta.concrete_fields
+                    if not field.primary_key and field.attname not in deferred
+                ]
+            kwargs['update_fields'] = [name for name in update_fields if name != 'active_mentees']
+        super().save(*args, **kwargs)
+    
     @property
     def current_mentees_count(self):
-        """Count active mentees"""
-        return self.user.mentorship_requests_received.filter(
-            status='accepted'
-        ).count()
+        """Count active mentees (denormalized, no query)"""
+        return self.active_mentees
     
     @property
     def can_accept_mentees(self):
@@ -110,7 +110,10 @@ class Referral(models.Model):
 
 
 class PointsTransaction(models.Model):
-    """Track all points movements"""
+    """
+    Track all points movements (append-only ledger). Written through
+    apps.users.points together with User.points and PointsActionRollup.
+    """
     
     TRANSACTION_TYPES = [
         ('referral_register', 'Referido Registrado'),
@@ -119,9 +122,19 @@ class PointsTransaction(models.Model):
         ('welcome_bonus', 'Bono de Bienvenida'),
         ('challenge_complete', 'Reto Completado'),
         ('streak_bonus', 'Bonus de Racha'),
+        ('course_enroll', 'Inscripción a Curso'),
         ('course_complete', 'Curso Completado'),
         ('redeem', 'Canje de Puntos'),
         ('admin_adjustment', 'Ajuste Administrativo'),
+        ('login', 'Ingreso Diario'),
+        ('application', 'Postulación'),
+        ('profile_update', 'Perfil Actualizado'),
+        ('streak_milestone', 'Hito de Racha'),
+        ('achievement', 'Logro Obtenido'),
+        ('job_saved', 'Empleo Guardado'),
+        ('job_viewed', 'Empleo Visto'),
+        ('referral', 'Referido'),
+        ('bonus', 'Bonus'),
     ]
     
     user = models.ForeignKey(
@@ -165,11 +178,43 @@ class PointsTransaction(models.Model):
         verbose_name = 'Transacción de Puntos'
         verbose_name_plural = 'Transacciones de Puntos'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', '-created_at']),
+            models.Index(fields=['created_at']),
+        ]
     
     def __str__(self):
         return f"{self.user.name} - {self.points} pts ({self.transaction_type})"
 
 
+class PointsActionRollup(models.Model):
+    """Running totals of PointsTransaction per user and transaction type"""
+    
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='points_rollups'
+    )
+    transaction_type = models.CharField(
+        max_length=30,
+        choices=PointsTransaction.TRANSACTION_TYPES
+    )
+    earned = models.IntegerField(default=0, verbose_name='Puntos ganados')
+    spent = models.IntegerField(default=0, verbose_name='Puntos gastados')
+    count = models.IntegerField(default=0, verbose_name='Transacciones')
+    
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'points_action_rollups'
+        unique_together = ['user', 'transaction_type']
+        verbose_name = 'Resumen de Puntos'
+        verbose_name_plural = 'Resúmenes de Puntos'
+    
+    def __str__(self):
+        return f"{self.user.name} - {self.transaction_type}: +{self.earned} / -{self.spent}"
+
+
 class Reward(models.Model):
     """Available rewards that can be redeemed with points"""
     
@@ -198,6 +243,13 @@ class Reward(models.Model):
         verbose_name='Total Disponible'
     )
     
+    # Denormalized count of redemptions, claimed with a conditional UPDATE (see apps/users/rewards.py)
+    redeemed_count = models.IntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Total Canjeado'
+    )
+    
     created_at = models.DateTimeField(auto_now_add=True)
     
     class Meta:
@@ -232,6 +284,9 @@ class RewardRedemption(models.Model):
         verbose_name = 'Canje de Recompensa'
         verbose_name_plural = 'Canjes de Recompensas'
         ordering = ['-redeemed_at']
+        indexes = [
+            models.Index(fields=['user', 'reward']),
+        ]
     
     def __str__(self):
         return f"{self.user.name} - {self.reward.name}"
@@ -0,0 +1,117 @@
+"""
+Points ledger.
+
+Every change to User.points goes through here: the balance is moved with one
+atomic UPDATE, the movements are appended to PointsTransaction and the per-type
+totals in PointsActionRollup are incremented, all in the same transaction. Balance,
+history and summaries are then plain reads of User.points, an indexed page of
+PointsTransaction and a handful of rollup rows.
+"""
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .counters import add_points, add_referral_points, spend_points
+from .models_referral import PointsTransaction, PointsActionRollup
+
+
+def award_points(user, transaction_type, points, description, related_user=None, related_referral=None):
+    """Add (or subtract) points and record the movement. Returns the new balance"""
+    with transaction.atomic():
+        record_transactions(user, [
+            PointsTransaction(
+                transaction_type=transaction_type,
+                points=points,
+                description=description,
+                related_user=related_user,
+                related_referral=related_referral
+            )
+        ])
+
+        # Referral rewards also count towards the referrer's code totals
+        if related_referral is not None:
+            add_referral_points(related_referral.referral_code_id, points)
+
+    return user.points
+
+
+def record_transactions(user, transactions):
+    """Apply several unsaved PointsTransaction of ``user`` at once. Returns the new balance"""
+    if not transactions:
+        return user.points
+
+    with transaction.atomic():
+        add_points(user, sum(entry.points for entry in transactions))
+        _append(user, transactions)
+
+    return user.points
+
+
+def spend(user, transaction_type, points, description):
+    """
+    Debit ``points`` only if the balance covers them, and record the movement.
+    Returns the new balance, or None if there were not enough points.
+    """
+    with transaction.atomic():
+        if spend_points(user, points) is None:
+            return None
+        _append(user, [
+            PointsTransaction(transaction_type=transaction_type, points=-points, description=description)
+        ])
+
+    return user.points
+
+
+def _append(user, transactions):
+    for entry in transactions:
+        entry.user = user
+    PointsTransaction.objects.bulk_create(transactions)
+    _update_rollups(user, transactions)
+
+
+def _update_rollups(user, transactions):
+    totals = defaultdict(lambda: {'earned': 0, 'spent': 0, 'count': 0})
+    for entry in transactions:
+        rollup = totals[entry.transaction_type]
+        if entry.points >= 0:
+            rollup['earned'] += entry.points
+        else:
+            rollup['spent'] -= entry.points
+        rollup['count'] += 1
+
+    # Make sure the rows exist, then add to them with F() updates
+    PointsActionRollup.objects.bulk_create(
+        [PointsActionRollup(user=user, transaction_type=transaction_type) for transaction_type in totals],
+        ignore_conflicts=True
+    )
+    now = timezone.now()
+    for transaction_type, rollup in totals.items():
+        PointsActionRollup.objects.filter(user=user, transaction_type=transaction_type).update(
+            earned=F('earned') + rollup['earned'],
+            spent=F('spent') + rollup['spent'],
+            count=F('count') + rollup['count'],
+            updated_at=now
+        )
+
+
+def points_summary(user):
+    """Total earned and per-type totals, from the rollup rows"""
+    rollups = list(PointsActionRollup.objects.filter(user=user))
+    by_action = sorted(
+        (
+            {
+                'action': rollup.transaction_type,
+                'total': rollup.earned - rollup.spent,
+                'count': rollup.count,
+            }
+            for rollup in rollups
+        ),
+        key=lambda item: -item['total']
+    )
+    return {
+        'total_points': user.points,
+        'total_earned': sum(rollup.earned for rollup in rollups),
+        'by_action': by_action,
+    }
@@ -0,0 +1,55 @@
+"""
+Reward redemption.
+
+A redemption is a single transaction of conditional updates, so concurrent
+requests can neither overspend points nor oversell a limited reward:
+
+1. Debit the points only if the balance covers them. This locks the user row,
+   so concurrent redemptions of the same user run one after the other.
+2. Check the per-user limit.
+3. Claim one unit with ``UPDATE ... WHERE redeemed_count < total_available``.
+
+If any step fails the whole redemption is rolled back.
+"""
+from django.db import transaction
+from django.db.models import F, Q
+
+from . import points
+from .models_referral import Reward, RewardRedemption
+
+
+class RedemptionError(Exception):
+    """The reward can't be redeemed; ``message`` is shown to the user"""
+
+    def __init__(self, message):
+        super().__init__(message)
+        self.message = message
+
+
+def redeem_reward(user, reward):
+    """Redeem ``reward`` for ``user``. Returns the RewardRedemption or raises RedemptionError"""
+    balance = user.points
+    try:
+        with transaction.atomic():
+            if points.spend(user, 'redeem', reward.points_required, f"Canjeado: {reward.name}") is None:
+                raise RedemptionError('Puntos insuficientes')
+
+            times_redeemed = RewardRedemption.objects.filter(user=user, reward=reward).count()
+            if times_redeemed >= reward.max_redemptions_per_user:
+                raise RedemptionError('Ya alcanzaste el límite de canjes para esta recompensa')
+
+            # Claimed last so the hot reward row stays locked as briefly as possible
+            claimed = Reward.objects.filter(pk=reward.pk, is_active=True).filter(
+                Q(total_available__isnull=True) | Q(redeemed_count__lt=F('total_available'))
+            ).update(redeemed_count=F('redeemed_count') + 1)
+            if not claimed:
+                raise RedemptionError('Esta recompensa ya no está disponible')
+
+            return RewardRedemption.objects.create(
+                user=user,
+                reward=reward,
+                points_spent=reward.points_required
+            )
+    except RedemptionError:
+        user.points = balance  # The debit was rolled back
+        raise
@@ -123,10 +123,8 @@ class RewardSerializer(serializers.ModelSerializer):
             return False
         
         # Check total available
-        if obj.total_available is not None:
-            total_redeemed = obj.redemptions.count()
-            if total_redeemed >= obj.total_available:
-                return False
+        if obj.total_available is not None and obj.redeemed_count >= obj.total_available:
+            return False
         
         return True
     
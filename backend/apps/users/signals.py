@@ -1,9 +1,15 @@
 """
 Signals for User App
 """
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
-from .models import User, JobAlertPreference
+from joby_api.field_tracking import enqueue_after_commit, fields_changed, track_fields
+from .mentor_matching import STORY_MATCH_FIELDS, USER_MATCH_FIELDS
+from .counters import release_mentee_slot
+from .models import User, JobAlertPreference, SuccessStory, MentorshipRequest
+
+track_fields(User, USER_MATCH_FIELDS)
+track_fields(SuccessStory, STORY_MATCH_FIELDS)
 
 
 @receiver(post_save, sender=User)
@@ -13,3 +19,35 @@ def create_job_alert_preference(sender, instance, created, **kwargs):
     """
     if created:
         JobAlertPreference.objects.get_or_create(user=instance)
+
+
+@receiver(post_save, sender=User)
+def refresh_mentor_matches_for_user(sender, instance, created, update_fields=None, **kwargs):
+    """Rescore the user as a mentee and, if they mentor, as a mentor when their profile changes"""
+    if fields_changed(instance, USER_MATCH_FIELDS, created, update_fields):
+        from .tasks import refresh_mentor_column, refresh_user_mentor_matches
+        enqueue_after_commit(refresh_user_mentor_matches, str(instance.pk))
+        # A new user has no success story yet, so there is no column to compute
+        if not created:
+            enqueue_after_commit(refresh_mentor_column, str(instance.pk))
+
+
+@receiver(post_save, sender=SuccessStory)
+def refresh_mentor_column_for_story(sender, instance, created, update_fields=None, **kwargs):
+    """Build or drop the mentor's column when they start or stop mentoring"""
+    if fields_changed(instance, STORY_MATCH_FIELDS, created, update_fields):
+        from .tasks import refresh_mentor_column
+        enqueue_after_commit(refresh_mentor_column, str(instance.user_id))
+
+
+@receiver(post_delete, sender=SuccessStory)
+def drop_mentor_column_for_story(sender, instance, **kwargs):
+    from .tasks import refresh_mentor_column
+    enqueue_after_commit(refresh_mentor_column, str(instance.user_id))
+
+
+@receiver(post_delete, sender=MentorshipRequest)
+def release_mentee_slot_for_request(sender, instance, **kwargs):
+    """Keep SuccessStory.active_mentees in step when an accepted request goes away"""
+    if instance.status == 'accepted':
+        release_mentee_slot(instance.to_user_id)
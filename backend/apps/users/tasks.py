@@ -9,51 +9,57 @@ from .models import User, JobAlertPreference
 @shared_task
 def check_job_alerts_for_all_users():
     """
-    Check job alerts for all users with enabled preferences
+    Dispatch alerts for active jobs whose fan-out never ran (e.g. the task
+    queued on publish was lost). Alerts are normally pushed when a job is
+    published, see JobAlertFanoutService.
     This task should run periodically (e.g., every hour)
     """
-    from apps.jobs.services import JobMatchingService
+    from apps.jobs.models import Job
+    from apps.jobs.services import JobAlertFanoutService
     
-    # Get users with enabled alerts
-    preferences = JobAlertPreference.objects.filter(is_enabled=True).select_related('user')
+    jobs = Job.objects.filter(is_active=True, alerts_dispatched_at__isnull=True)
     
+    jobs_dispatched = 0
     alerts_sent = 0
-    for preference in preferences:
+    for job in jobs:
         try:
-            notification = JobMatchingService.check_new_jobs_for_user(preference.user)
-            if notification:
-                alerts_sent += 1
+            totals = JobAlertFanoutService.dispatch_job_alerts(job)
+            alerts_sent += totals['instant']
+            jobs_dispatched += 1
         except Exception as e:
-            print(f"Error checking alerts for user {preference.user.email}: {str(e)}")
+            print(f"Error dispatching alerts for job {job.id}: {str(e)}")
     
-    return f"Checked {preferences.count()} users, sent {alerts_sent} alerts"
+    return f"Dispatched {jobs_dispatched} jobs, sent {alerts_sent} alerts"
 
 
-@shared_task
-def send_daily_job_digest():
-    """
-    Send daily digest of matching jobs to users with daily frequency
-    """
-    from apps.jobs.services import JobMatchingService
+def _send_pending_digests(frequency):
+    """Send the buffered job matches of every user with the given digest frequency"""
+    from apps.jobs.services import JobAlertFanoutService
     
-    # Get users with daily frequency
+    # Only users with something in their pending buffer
     preferences = JobAlertPreference.objects.filter(
         is_enabled=True,
-        frequency='daily'
-    ).select_related('user')
+        frequency=frequency,
+        user__pending_job_alerts__isnull=False
+    ).distinct().select_related('user')
     
     digests_sent = 0
     for preference in preferences:
         try:
-            # Find matching jobs
-            matching_jobs = JobMatchingService.find_matching_jobs(preference.user, min_score=60)
-            
-            if matching_jobs:
-                JobMatchingService.send_job_alert(preference.user, matching_jobs)
+            if JobAlertFanoutService.send_pending_digest(preference.user):
                 digests_sent += 1
         except Exception as e:
             print(f"Error sending digest to user {preference.user.email}: {str(e)}")
     
+    return digests_sent
+
+
+@shared_task
+def send_daily_job_digest():
+    """
+    Send daily digest of matching jobs to users with daily frequency
+    """
+    digests_sent = _send_pending_digests('daily')
     return f"Sent {digests_sent} daily digests"
 
 
@@ -62,24 +68,60 @@ def send_weekly_job_digest():
     """
     Send weekly digest of matching jobs to users with weekly frequency
     """
-    from apps.jobs.services import JobMatchingService
+    digests_sent = _send_pending_digests('weekly')
+    return f"Sent {digests_sent} weekly digests"
+
+
+@shared_task
+def refresh_user_mentor_matches(user_id):
+    """
+    Recompute the user's ProfileMatch row (the user against every willing mentor).
+    Queued when the user is created or their skills, location or experience change.
+    """
+    from .mentor_matching import refresh_user_row
     
-    # Get users with weekly frequency
-    preferences = JobAlertPreference.objects.filter(
-        is_enabled=True,
-        frequency='weekly'
-    ).select_related('user')
+    try:
+        user = User.objects.get(pk=user_id)
+    except User.DoesNotExist:
+        return f"User {user_id} no longer exists"
     
-    digests_sent = 0
-    for preference in preferences:
-        try:
-            # Find matching jobs
-            matching_jobs = JobMatchingService.find_matching_jobs(preference.user, min_score=60)
-            
-            if matching_jobs:
-                JobMatchingService.send_job_alert(preference.user, matching_jobs)
-                digests_sent += 1
-        except Exception as e:
-            print(f"Error sending digest to user {preference.user.email}: {str(e)}")
+    kept = refresh_user_row(user)
+    return f"Stored {kept} mentor matches for user {user_id}"
+
+
+@shared_task
+def refresh_mentor_column(mentor_id):
+    """
+    Recompute every user's match against a mentor, one chunk of users per job,
+    or drop the column if the user is no longer available as a mentor.
+    """
+    from .mentor_matching import drop_mentor_column, is_willing_mentor, seeker_chunks
     
-    return f"Sent {digests_sent} weekly digests"
+    try:
+        mentor = User.objects.get(pk=mentor_id)
+    except User.DoesNotExist:
+        return f"User {mentor_id} no longer exists"
+    
+    if not is_willing_mentor(mentor):
+        deleted = drop_mentor_column(mentor)
+        return f"Removed {deleted} matches for {mentor_id}"
+    
+    chunks = 0
+    for user_ids in seeker_chunks(mentor):
+        refresh_mentor_column_chunk.delay(mentor_id, [str(user_id) for user_id in user_ids])
+        chunks += 1
+    return f"Queued {chunks} chunks for mentor {mentor_id}"
+
+
+@shared_task
+def refresh_mentor_column_chunk(mentor_id, user_ids):
+    """Recompute the matches of a chunk of users against a mentor"""
+    from .mentor_matching import refresh_mentor_column_chunk as refresh_chunk
+    
+    try:
+        mentor = User.objects.get(pk=mentor_id)
+    except User.DoesNotExist:
+        return f"User {mentor_id} no longer exists"
+    
+    kept = refresh_chunk(mentor, user_ids)
+    return f"Stored {kept} matches for mentor {mentor_id}"
@@ -0,0 +1,373 @@
+"""
+Tests for Users App
+"""
+import random
+import threading
+import uuid
+from datetime import date
+from unittest import mock
+
+from django.db import connection
+from django.db.models import Count, Sum
+from django.test import SimpleTestCase, TestCase, TransactionTestCase
+from rest_framework.test import APIClient
+
+from apps.streaks.models import Streak
+from apps.streaks.services import StreakService
+from apps.users.counters import add_points, increment_returning, spend_points
+from apps.users.mentor_matching import score_profiles
+from apps.users.models import User
+from apps.users.models_courses import Company, Course
+from apps.users.models_mentorship import MentorshipRequest, ProfileMatch, SuccessStory
+from apps.users.models_referral import PointsTransaction, Reward, RewardRedemption
+from apps.users.points import award_points, points_summary, record_transactions, spend
+from apps.users.rewards import RedemptionError, redeem_reward
+from apps.users.views_mentorship import calculate_profile_similarity
+from joby_api.factories import make_user
+from joby_api.testing import assert_max_queries
+
+SKILLS = ['Python', 'python', 'Django', 'SQL', 'React', 'AWS', 'Docker', 'Excel']
+LOCATIONS = [None, '', 'Bogotá, Colombia', 'bogotá, colombia', 'Lima, Perú']
+EXPERIENCES = [None, '', 'Junior developer', 'Mid level', 'Senior engineer', 'Tech lead', '3 años', 'Estudiante']
+
+
+def random_profile(rng):
+    return User(
+        skills=rng.sample(SKILLS, rng.randint(0, 4)),
+        location=rng.choice(LOCATIONS),
+        experience=rng.choice(EXPERIENCES),
+    )
+
+
+class AtomicCounterTests(TestCase):
+    """Copies cargadas antes de un incremento no pisan los incrementos de otros"""
+
+    def setUp(self):
+        self.user = make_user()
+
+    def test_points_from_stale_copies_add_up(self):
+        first = User.objects.get(pk=self.user.pk)
+        second = User.objects.get(pk=self.user.pk)
+
+        self.assertEqual(add_points(first, 10), 10)
+        self.assertEqual(add_points(second, 5), 15)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.points, 15)
+
+    def test_spend_points_never_goes_negative(self):
+        add_points(self.user, 30)
+        stale = User.objects.get(pk=self.user.pk)
+
+        self.assertEqual(spend_points(self.user, 20), 10)
+        self.assertIsNone(spend_points(stale, 20))
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.points, 10)
+
+    def test_increment_returning_only_matches_the_filters(self):
+        self.assertIsNone(increment_returning(User, {'id': uuid.uuid4()}, {'points': 1}))
+        row = increment_returning(User, {'id': self.user.pk}, {'points': 3}, returning=['email'])
+        self.assertEqual(row, {'points': 3, 'email': self.user.email})
+
+    def test_activity_counters_from_stale_streaks_add_up(self):
+        StreakService.record_activity(self.user, 'login')
+        for _ in range(3):
+            StreakService.record_activity(User.objects.get(pk=self.user.pk), 'job_viewed')
+
+        streak = Streak.objects.get(user=self.user)
+        self.assertEqual((streak.total_logins, streak.total_jobs_viewed, streak.current_streak), (1, 3, 1))
+
+
+class PointsLedgerTests(TestCase):
+    """Saldo, movimientos y totales por tipo se escriben juntos y cuadran"""
+
+    def setUp(self):
+        self.user = make_user()
+        award_points(self.user, 'welcome_bonus', 20, 'Bono de bienvenida')
+        record_transactions(self.user, [
+            PointsTransaction(transaction_type='login', points=5, description='Daily login bonus')
+            for _ in range(3)
+        ])
+        spend(self.user, 'redeem', 12, 'Canje')
+
+    def test_summary_matches_the_transactions(self):
+        summary = points_summary(self.user)
+
+        by_type = {
+            row['transaction_type']: (row['total'], row['count'])
+            for row in PointsTransaction.objects.filter(user=self.user).values('transaction_type').annotate(
+                total=Sum('points'), count=Count('id')
+            )
+        }
+        self.assertEqual({item['action']: (item['total'], item['count']) for item in summary['by_action']}, by_type)
+        self.assertEqual((summary['total_points'], summary['total_earned']), (23, 35))
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.points, 23)
+
+    def test_failed_spend_records_nothing(self):
+        self.assertIsNone(spend(self.user, 'redeem', 100, 'Canje'))
+        self.assertEqual(PointsTransaction.objects.filter(user=self.user, transaction_type='redeem').count(), 1)
+
+    def test_summary_endpoint_reads_only_the_rollups(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+
+        with assert_max_queries(1):
+            response = client.get('/api/streaks/points-history/summary/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['by_action'][0], {'action': 'welcome_bonus', 'total': 20, 'count': 1})
+
+    def test_course_points_use_listed_transaction_types(self):
+        company = Company.objects.create(name='Acme')
+        course = Course.objects.create(
+            title='Django', description='APIs con Django', company=company,
+            duration_value=4, duration_unit='weeks', course_url='https://example.com/django'
+        )
+        client = APIClient()
+        client.force_authenticate(self.user)
+
+        response = client.post('/api/auth/user-courses/enroll/', {'course_id': str(course.id)}, format='json')
+        client.post(
+            f"/api/auth/user-courses/{response.data['id']}/update_progress/",
+            {'progress_percentage': 100}, format='json'
+        )
+
+        actions = {item['action'] for item in points_summary(self.user)['by_action']}
+        self.assertTrue({'course_enroll', 'course_complete'} <= actions)
+        self.assertTrue(actions <= set(dict(PointsTransaction.TRANSACTION_TYPES)))
+
+
+def make_reward(**kwargs):
+    kwargs.setdefault('name', 'Insignia')
+    kwargs.setdefault('description', 'Recompensa de prueba')
+    kwargs.setdefault('reward_type', 'badge')
+    kwargs.setdefault('points_required', 50)
+    return Reward.objects.create(**kwargs)
+
+
+class RedeemRewardTests(TestCase):
+
+    def setUp(self):
+        self.reward = make_reward(total_available=2)
+
+    def rich_user(self):
+        user = make_user()
+        add_points(user, 100)
+        return user
+
+    def test_stale_reward_copies_do_not_oversell(self):
+        stale = Reward.objects.get(pk=self.reward.pk)
+        redeem_reward(self.rich_user(), stale)
+        redeem_reward(self.rich_user(), stale)
+        late = self.rich_user()
+
+        with self.assertRaisesMessage(RedemptionError, 'Esta recompensa ya no está disponible'):
+            redeem_reward(late, stale)
+
+        self.reward.refresh_from_db()
+        self.assertEqual((self.reward.redeemed_count, RewardRedemption.objects.count()), (2, 2))
+        self.assertEqual(late.points, 100)
+        late.refresh_from_db()
+        self.assertEqual(late.points, 100)
+
+    def test_per_user_limit_refunds_the_debit(self):
+        user = self.rich_user()
+        redeem_reward(user, self.reward)
+
+        with self.assertRaisesMessage(RedemptionError, 'Ya alcanzaste el límite'):
+            redeem_reward(user, self.reward)
+
+        user.refresh_from_db()
+        self.assertEqual(user.points, 50)
+        self.assertEqual(PointsTransaction.objects.filter(user=user, transaction_type='redeem').count(), 1)
+
+    def test_insufficient_points(self):
+        user = make_user()
+        add_points(user, 49)
+
+        with self.assertRaisesMessage(RedemptionError, 'Puntos insuficientes'):
+            redeem_reward(user, self.reward)
+        self.assertFalse(RewardRedemption.objects.exists())
+
+
+class ConcurrentRedemptionTests(TransactionTestCase):
+    """Canjes simultáneos en conexiones distintas"""
+
+    def test_concurrent_redemptions_never_exceed_the_stock(self):
+        reward = make_reward(total_available=3)
+        users = [make_user() for _ in range(8)]
+        for user in users:
+            add_points(user, 50)
+        barrier = threading.Barrier(len(users))
+        outcomes = []
+
+        def redeem(user):
+            try:
+                barrier.wait()
+                redeem_reward(user, Reward.objects.get(pk=reward.pk))
+                outcomes.append('ok')
+            except RedemptionError:
+                outcomes.append('rejected')
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=redeem, args=(user,)) for user in users]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        reward.refresh_from_db()
+        self.assertEqual(sorted(outcomes), ['ok'] * 3 + ['rejected'] * 5)
+        self.assertEqual((reward.redeemed_count, RewardRedemption.objects.count()), (3, 3))
+        self.assertEqual(sum(User.objects.values_list('points', flat=True)), 5 * 50)
+
+
+class MentorScoringTests(SimpleTestCase):
+    """score_profiles debe dar exactamente los mismos scores que calculate_profile_similarity"""
+
+    def test_matches_the_scalar_similarity(self):
+        rng = random.Random(2024)
+        for _ in range(50):
+            user = random_profile(rng)
+            others = [random_profile(rng) for _ in range(30)]
+
+            expected = [calculate_profile_similarity(user, other) for other in others]
+            self.assertEqual(score_profiles(user, others).tolist(), expected)
+            # The score is symmetric, so columns reuse it
+            self.assertEqual([score_profiles(other, [user]).tolist()[0] for other in others], expected)
+
+    def test_empty_batch(self):
+        self.assertEqual(score_profiles(User(skills=['Python']), []).tolist(), [])
+
+
+def make_story(user, **kwargs):
+    kwargs.setdefault('company', 'Acme')
+    kwargs.setdefault('position', 'Backend Developer')
+    kwargs.setdefault('hire_date', date(2024, 1, 15))
+    kwargs.setdefault('success_description', 'Practicando entrevistas')
+    kwargs.setdefault('is_willing_to_mentor', True)
+    return SuccessStory.objects.create(user=user, **kwargs)
+
+
+class ProfileMatchRefreshTests(TestCase):
+    """La matriz usuario x mentor se recalcula en segundo plano al cambiar perfiles"""
+
+    def setUp(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.mentor = make_user(skills=['Python', 'Django'], location='Bogotá', experience='Senior engineer')
+            make_story(self.mentor)
+            self.seeker = make_user(skills=['python', 'SQL'], location='Bogotá', experience='Junior developer')
+
+    def stored_score(self):
+        return ProfileMatch.objects.filter(user=self.seeker, matched_user=self.mentor).values_list(
+            'similarity_score', flat=True
+        ).first()
+
+    def test_new_users_get_their_row(self):
+        self.assertEqual(self.stored_score(), calculate_profile_similarity(self.seeker, self.mentor))
+
+    def test_profile_changes_rescore_row_and_column(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.seeker.skills = ['Python', 'Django']
+            self.seeker.save()
+        self.assertEqual(self.stored_score(), calculate_profile_similarity(self.seeker, self.mentor))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.mentor.location = 'Lima'
+            self.mentor.save(update_fields=['location'])
+        self.assertEqual(self.stored_score(), calculate_profile_similarity(self.seeker, self.mentor))
+
+    def test_profile_changes_refresh_mentors_and_jobs(self):
+        with mock.patch('apps.users.tasks.refresh_user_mentor_matches.delay') as mentors, \
+                mock.patch('apps.jobs.tasks.refresh_user_match_index.delay') as jobs:
+            with self.captureOnCommitCallbacks(execute=True):
+                seeker = User.objects.get(pk=self.seeker.pk)
+                seeker.skills = ['Python', 'Go']
+                seeker.save()
+
+        mentors.assert_called_once_with(str(seeker.pk))
+        jobs.assert_called_once_with(str(seeker.pk))
+
+    def test_other_fields_do_not_queue_a_refresh(self):
+        with mock.patch('apps.users.tasks.refresh_user_mentor_matches.delay') as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.seeker.name = 'Otro nombre'
+                self.seeker.save()
+        delay.assert_not_called()
+
+    def test_column_is_dropped_when_the_mentor_stops_mentoring(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            story = self.mentor.success_story
+            story.is_willing_to_mentor = False
+            story.save()
+
+        self.assertIsNone(self.stored_score())
+
+    def test_find_mentors_reads_the_stored_matches(self):
+        client = APIClient()
+        client.force_authenticate(self.seeker)
+
+        response = client.get('/api/auth/mentorship/find_mentors/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([match['similarity_score'] for match in response.data], [self.stored_score()])
+
+    def test_find_mentors_computes_a_missing_row(self):
+        # Users created before the matrix was filled have no rows until a task reaches them
+        newcomer = make_user(skills=['Django'], location='Bogotá', experience='Mid developer')
+        client = APIClient()
+        client.force_authenticate(newcomer)
+
+        response = client.get('/api/auth/mentorship/find_mentors/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [match['similarity_score'] for match in response.data],
+            [calculate_profile_similarity(newcomer, self.mentor)]
+        )
+
+
+class MenteeSlotTests(TestCase):
+
+    def setUp(self):
+        self.mentor = make_user()
+        self.story = make_story(self.mentor, max_mentees=1)
+        self.requests = [
+            MentorshipRequest.objects.create(from_user=make_user(), to_user=self.mentor, message='Hola')
+            for _ in range(2)
+        ]
+        self.client = APIClient()
+        self.client.force_authenticate(self.mentor)
+
+    def accept(self, mentorship_request):
+        return self.client.post(
+            f'/api/auth/mentorship/{mentorship_request.pk}/respond/', {'action': 'accept'}, format='json'
+        )
+
+    def active_mentees(self):
+        return SuccessStory.objects.values_list('active_mentees', flat=True).get(pk=self.story.pk)
+
+    def test_accepts_only_up_to_max_mentees(self):
+        self.assertEqual(self.accept(self.requests[0]).status_code, 200)
+        self.assertEqual(self.accept(self.requests[1]).status_code, 400)
+        self.assertEqual(self.active_mentees(), 1)
+        self.requests[1].refresh_from_db()
+        self.assertEqual(self.requests[1].status, 'pending')
+
+    def test_deleting_an_accepted_request_frees_the_slot(self):
+        self.accept(self.requests[0])
+        MentorshipRequest.objects.filter(pk=self.requests[0].pk).get().delete()
+
+        self.assertEqual(self.active_mentees(), 0)
+        self.assertEqual(self.accept(self.requests[1]).status_code, 200)
+
+    def test_saving_a_stale_story_keeps_the_count(self):
+        self.accept(self.requests[0])
+
+        self.story.position = 'Tech Lead'
+        self.story.save()
+        SuccessStory.objects.only('company').get(pk=self.story.pk).save()
+
+        self.assertEqual(self.active_mentees(), 1)
+        self.assertEqual(SuccessStory.objects.get(pk=self.story.pk).position, 'Tech Lead')
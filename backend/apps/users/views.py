@@ -132,6 +132,9 @@ def update_profile(request):
     
     if serializer.is_valid():
         serializer.save()
+        
+        from apps.streaks.challenges import advance_challenges
+        advance_challenges(user, 'update_profile')
         return Response(serializer.data, status=status.HTTP_200_OK)
     
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -156,8 +159,10 @@ class UserProfileUpdateView(generics.UpdateAPIView):
         if serializer.is_valid():
             self.perform_update(serializer)
             
-            # Record profile update activity for streaks
+            # Record profile update activity for streaks and challenges
+            from apps.streaks.challenges import advance_challenges
             from apps.streaks.services import StreakService
+            advance_challenges(instance, 'update_profile')
             StreakService.record_activity(
                 user=instance,
                 activity_type='profile_updated',
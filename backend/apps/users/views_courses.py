@@ -13,6 +13,7 @@ class CourseViewSet(viewsets.ReadOnlyModelViewSet):
     
     serializer_class = CourseSerializer
     permission_classes = [IsAuthenticated]
+    query_budget = 5
     
     def get_queryset(self):
         return Course.objects.filter(is_active=True)
@@ -82,6 +83,7 @@ class UserCourseViewSet(viewsets.ModelViewSet):
     
     serializer_class = UserCourseSerializer
     permission_classes = [IsAuthenticated]
+    query_budget = {'default': 5, 'enroll': 10, 'update_progress': 15}
     
     def get_queryset(self):
         return UserCourse.objects.filter(user=self.request.user)
@@ -94,7 +96,7 @@ class UserCourseViewSet(viewsets.ModelViewSet):
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
         
         course_id = serializer.validated_data['course_id']
-        course = Course.objects.get(id=course_id)
+        course = Course.objects.select_related('company').get(id=course_id)
         
         # Check if already enrolled
         existing = UserCourse.objects.filter(user=request.user, course=course).first()
@@ -114,7 +116,7 @@ class UserCourseViewSet(viewsets.ModelViewSet):
         from apps.streaks.services import StreakService
         StreakService.award_points(
             request.user,
-            'course_enrolled',
+            'course_enroll',
             10,
             f'Inscrito en: {course.title}'
         )
@@ -148,7 +150,7 @@ class UserCourseViewSet(viewsets.ModelViewSet):
             from apps.streaks.services import StreakService
             StreakService.award_points(
                 request.user,
-                'course_completed',
+                'course_complete',
                 50,
                 f'Curso completado: {enrollment.course.title}'
             )
@@ -7,9 +7,12 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django.contrib.auth import get_user_model
 from django.utils import timezone
+from django.db import transaction
 from django.db.models import Q
 
+from .counters import claim_mentee_slot
 from .models_mentorship import SuccessStory, ProfileMatch, MentorshipRequest
+from .mentor_matching import refresh_user_row, top_matches
 from .serializers_mentorship import (
     SuccessStorySerializer,
     ProfileMatchSerializer,
@@ -78,6 +81,7 @@ class MentorshipViewSet(viewsets.GenericViewSet):
     """ViewSet for mentorship matching and connections"""
     
     permission_classes = [IsAuthenticated]
+    query_budget = {'default': 5, 'find_mentors': 8, 'send_request': 10, 'respond': 10}
     
     @action(detail=False, methods=['get'])
     def find_mentors(self, request):
@@ -85,54 +89,11 @@ class MentorshipViewSet(viewsets.GenericViewSet):
         Find potential mentors based on profile similarity
         GET /api/auth/mentorship/find_mentors/
         """
-        user = request.user
-        
-        # Get all users with success stories who are willing to mentor
-        mentors = User.objects.filter(
-            success_story__is_willing_to_mentor=True,
-            success_story__is_active=True
-        ).exclude(id=user.id)
-        
-        # Calculate or get cached matches
-        matches = []
-        for mentor in mentors:
-            # Check if match already calculated
-            match, created = ProfileMatch.objects.get_or_create(
-                user=user,
-                matched_user=mentor,
-                defaults={'similarity_score': 0}
-            )
-            
-            # Recalculate if old (more than 7 days) or just created
-            if created or (timezone.now() - match.calculated_at).days > 7:
-                score = calculate_profile_similarity(user, mentor)
-                
-                # Calculate matching details
-                user_skills = set([s.lower() for s in (user.skills or [])])
-                mentor_skills = set([s.lower() for s in (mentor.skills or [])])
-                matching_skills = list(user_skills.intersection(mentor_skills))
-                
-                skill_overlap = 0
-                if user_skills:
-                    skill_overlap = (len(matching_skills) / len(user_skills)) * 100
-                
-                match.similarity_score = score
-                match.matching_skills = matching_skills
-                match.skill_overlap_percentage = round(skill_overlap, 2)
-                match.same_location = (
-                    user.location and mentor.location and
-                    user.location.lower() == mentor.location.lower()
-                )
-                match.save()
-            
-            matches.append(match)
-        
-        # Filter matches with score >= 5 (cambiado de 30 para mostrar más resultados)
-        matches = [m for m in matches if m.similarity_score >= 5]
-        matches.sort(key=lambda x: x.similarity_score, reverse=True)
-        
-        # Limit to top 20 matches
-        matches = matches[:20]
+        # Matches are precomputed in the background (see mentor_matching);
+        # a user the tasks have not reached yet gets their row computed here
+        if not ProfileMatch.objects.filter(user=request.user).exists():
+            refresh_user_row(request.user)
+        matches = top_matches(request.user)
         
         serializer = ProfileMatchSerializer(matches, many=True)
         return Response(serializer.data)
@@ -191,38 +152,40 @@ class MentorshipViewSet(viewsets.GenericViewSet):
         POST /api/auth/mentorship/{id}/respond/
         Body: {"action": "accept"|"decline", "response_message": "..."}
         """
-        try:
-            mentorship_request = MentorshipRequest.objects.get(
-                id=pk,
-                to_user=request.user,
-                status='pending'
-            )
-        except MentorshipRequest.DoesNotExist:
-            return Response(
-                {'error': 'Solicitud no encontrada o no autorizada'},
-                status=status.HTTP_404_NOT_FOUND
-            )
-        
         serializer = RespondMentorshipRequestSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         
         action_type = serializer.validated_data['action']
         response_message = serializer.validated_data.get('response_message', '')
         
-        if action_type == 'accept':
-            # Check if mentor can still accept mentees
-            if not request.user.success_story.can_accept_mentees:
+        with transaction.atomic():
+            # Locking the request makes a second concurrent answer see it as no longer pending
+            try:
+                mentorship_request = MentorshipRequest.objects.select_for_update().get(
+                    id=pk,
+                    to_user=request.user,
+                    status='pending'
+                )
+            except MentorshipRequest.DoesNotExist:
                 return Response(
-                    {'error': 'Has alcanzado el límite de mentorados'},
-                    status=status.HTTP_400_BAD_REQUEST
+                    {'error': 'Solicitud no encontrada o no autorizada'},
+                    status=status.HTTP_404_NOT_FOUND
                 )
-            mentorship_request.status = 'accepted'
-        else:
-            mentorship_request.status = 'declined'
-        
-        mentorship_request.response_message = response_message
-        mentorship_request.responded_at = timezone.now()
-        mentorship_request.save()
+            
+            if action_type == 'accept':
+                # Conditional UPDATE: concurrent accepts can't go over max_mentees
+                if not claim_mentee_slot(request.user.pk):
+                    return Response(
+                        {'error': 'Has alcanzado el límite de mentorados'},
+                        status=status.HTTP_400_BAD_REQUEST
+                    )
+                mentorship_request.status = 'accepted'
+            else:
+                mentorship_request.status = 'declined'
+            
+            mentorship_request.response_message = response_message
+            mentorship_request.responded_at = timezone.now()
+            mentorship_request.save()
         
         response_serializer = MentorshipRequestSerializer(mentorship_request)
         return Response(response_serializer.data)
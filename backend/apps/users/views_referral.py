@@ -5,14 +5,14 @@ from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from django.db.models import Count, Sum, Q
-from django.db import transaction
+from django.db.models import Count, Q
 from django.contrib.auth import get_user_model
 
 from .models_referral import (
-    ReferralCode, Referral, PointsTransaction, 
+    ReferralCode, Referral, PointsTransaction, PointsActionRollup,
     Reward, RewardRedemption
 )
+from .rewards import RedemptionError, redeem_reward
 from .serializers_referral import (
     ReferralCodeSerializer, ReferralSerializer,
     PointsTransactionSerializer, RewardSerializer,
@@ -26,6 +26,7 @@ class ReferralViewSet(viewsets.GenericViewSet):
     """ViewSet for referral system"""
     
     permission_classes = [IsAuthenticated]
+    query_budget = 6
     
     @action(detail=False, methods=['get'])
     def my_code(self, request):
@@ -81,10 +82,10 @@ class ReferralViewSet(viewsets.GenericViewSet):
         }
         
         # Points from referrals
-        points_from_referrals = PointsTransaction.objects.filter(
-            user=user,
-            transaction_type__startswith='referral_'
-        ).aggregate(total=Sum('points'))['total'] or 0
+        points_from_referrals = sum(
+            rollup.earned - rollup.spent
+            for rollup in PointsActionRollup.objects.filter(user=user, transaction_type__startswith='referral_')
+        )
         
         # Recent activity (last 10 transactions)
         recent_transactions = PointsTransaction.objects.filter(
@@ -145,6 +146,7 @@ class PointsViewSet(viewsets.GenericViewSet):
     """ViewSet for points system"""
     
     permission_classes = [IsAuthenticated]
+    query_budget = {'default': 5, 'redeem': 10}
     
     @action(detail=False, methods=['get'])
     def balance(self, request):
@@ -213,53 +215,25 @@ class PointsViewSet(viewsets.GenericViewSet):
         
         user = request.user
         
-        # Validations
+        # Quick rejections without touching the database; redeem_reward re-checks
+        # everything with conditional updates
         if user.points < reward.points_required:
             return Response(
                 {'error': 'Puntos insuficientes'},
                 status=status.HTTP_400_BAD_REQUEST
             )
-        
-        # Check redemption limit
-        times_redeemed = RewardRedemption.objects.filter(
-            user=user,
-            reward=reward
-        ).count()
-        
-        if times_redeemed >= reward.max_redemptions_per_user:
+        if reward.total_available is not None and reward.redeemed_count >= reward.total_available:
             return Response(
-                {'error': 'Ya alcanzaste el límite de canjes para esta recompensa'},
+                {'error': 'Esta recompensa ya no está disponible'},
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Check total available
-        if reward.total_available is not None:
-            total_redeemed = reward.redemptions.count()
-            if total_redeemed >= reward.total_available:
-                return Response(
-                    {'error': 'Esta recompensa ya no está disponible'},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-        
-        # Perform redemption
-        with transaction.atomic():
-            # Deduct points
-            user.points -= reward.points_required
-            user.save()
-            
-            # Create redemption
-            redemption = RewardRedemption.objects.create(
-                user=user,
-                reward=reward,
-                points_spent=reward.points_required
-            )
-            
-            # Create transaction record
-            PointsTransaction.objects.create(
-                user=user,
-                transaction_type='redeem',
-                points=-reward.points_required,
-                description=f"Canjeado: {reward.name}"
+        try:
+            redemption = redeem_reward(user, reward)
+        except RedemptionError as e:
+            return Response(
+                {'error': e.message},
+                status=status.HTTP_400_BAD_REQUEST
             )
         
         serializer = RewardRedemptionSerializer(redemption)
@@ -277,25 +251,3 @@ class PointsViewSet(viewsets.GenericViewSet):
         
         serializer = RewardRedemptionSerializer(redemptions, many=True)
         return Response(serializer.data)
-
-
-def award_points(user, transaction_type, points, description, related_user=None, related_referral=None):
-    """
-    Helper function to award points to a user
-    """
-    with transaction.atomic():
-        # Update user points
-        user.points += points
-        user.save()
-        
-        # Create transaction record
-        PointsTransaction.objects.create(
-            user=user,
-            transaction_type=transaction_type,
-            points=points,
-            description=description,
-            related_user=related_user,
-            related_referral=related_referral
-        )
-    
-    return user.points
@@ -28,6 +28,31 @@ app.conf.beat_schedule = {
         'task': 'apps.notifications.tasks.check_new_job_recommendations',
         'schedule': crontab(minute=0, hour='*/6'),  # Every 6 hours
     },
+    # Fan out alerts for published jobs whose dispatch task was lost
+    'dispatch-pending-job-alerts': {
+        'task': 'apps.users.tasks.check_job_alerts_for_all_users',
+        'schedule': crontab(minute=30),  # Every hour
+    },
+    # Flush buffered job detail views to the database
+    'flush-job-view-counts': {
+        'task': 'apps.jobs.tasks.flush_job_view_counts',
+        'schedule': crontab(minute='*'),  # Every minute
+    },
+    # Fold new points into the daily/weekly/monthly leaderboards
+    'aggregate-period-leaderboards': {
+        'task': 'apps.streaks.tasks.aggregate_period_leaderboards',
+        'schedule': crontab(minute='*/5'),  # Every 5 minutes
+    },
+    # Reconcile the points leaderboard with the database at 4 AM
+    'rebuild-points-leaderboard': {
+        'task': 'apps.streaks.tasks.rebuild_points_leaderboard',
+        'schedule': crontab(hour=4, minute=0),  # 4:00 AM daily
+    },
+    # Fold activity events whose processing task was lost
+    'process-pending-activity-events': {
+        'task': 'apps.streaks.tasks.process_pending_activity_events',
+        'schedule': crontab(minute='*'),  # Every minute
+    },
 }
 
 @app.task(bind=True)
@@ -0,0 +1,32 @@
+"""
+Factories shared by the app test suites.
+
+    from joby_api.factories import make_job, make_user
+
+    poster = make_user()
+    job = make_job(poster, skills_required=['Python'])
+
+Each call creates a unique user, so tests can create as many as they need.
+"""
+import uuid
+
+from apps.jobs.models import Job
+from apps.users.models import User
+
+
+def make_user(**kwargs):
+    suffix = uuid.uuid4().hex[:8]
+    kwargs.setdefault('email', f'user-{suffix}@example.com')
+    kwargs.setdefault('username', f'user-{suffix}')
+    kwargs.setdefault('name', 'Test User')
+    return User.objects.create_user(password='secret', **kwargs)
+
+
+def make_job(posted_by, **kwargs):
+    kwargs.setdefault('title', 'Backend Developer')
+    kwargs.setdefault('company_name', 'Acme')
+    kwargs.setdefault('location', 'Bogotá, Colombia')
+    kwargs.setdefault('job_type', 'full_time')
+    kwargs.setdefault('experience_level', 'mid')
+    kwargs.setdefault('description', 'Desarrollo de APIs')
+    return Job.objects.create(posted_by=posted_by, **kwargs)
@@ -0,0 +1,80 @@
+"""
+Track model field changes for signal handlers that refresh derived data.
+
+    from joby_api.field_tracking import enqueue_after_commit, fields_changed, track_fields
+
+    track_fields(User, ('skills', 'location'))
+
+    @receiver(post_save, sender=User)
+    def user_saved(sender, instance, created, update_fields=None, **kwargs):
+        if fields_changed(instance, ('skills', 'location'), created, update_fields):
+            enqueue_after_commit(refresh_task, str(instance.pk))
+
+Every app tracking the same model shares one snapshot, taken once per loaded
+instance. Each save compares against the values loaded before it, whatever
+order the post_save receivers run in.
+"""
+import copy
+import logging
+
+from django.db import transaction
+from django.db.models.signals import post_init, post_save, pre_save
+
+logger = logging.getLogger(__name__)
+
+_tracked_fields = {}
+
+
+def track_fields(model, fields):
+    """Snapshot ``fields`` of every ``model`` instance when it is loaded and after each save"""
+    if model not in _tracked_fields:
+        _tracked_fields[model] = set()
+        uid = f'field_tracking:{model._meta.label}'
+        post_init.connect(_take_snapshot, sender=model, weak=False, dispatch_uid=uid)
+        pre_save.connect(_keep_loaded_values, sender=model, weak=False, dispatch_uid=uid)
+        post_save.connect(_take_snapshot, sender=model, weak=False, dispatch_uid=uid)
+    _tracked_fields[model].update(fields)
+
+
+def _take_snapshot(sender, instance, **kwargs):
+    instance._field_snapshot = {
+        field: copy.deepcopy(instance.__dict__[field])
+        for field in _tracked_fields[sender] if field in instance.__dict__
+    }
+
+
+def _keep_loaded_values(sender, instance, **kwargs):
+    instance._loaded_values = getattr(instance, '_field_snapshot', {})
+
+
+def loaded_value(instance, field, default=None):
+    """Value of ``field`` before the save in progress, or ``default`` if it was not loaded"""
+    return getattr(instance, '_loaded_values', {}).get(field, default)
+
+
+def fields_changed(instance, fields, created, update_fields):
+    """Whether the save in progress created ``instance`` or changed any of ``fields``"""
+    if created:
+        return True
+    if update_fields is not None and not set(update_fields) & set(fields):
+        return False
+    loaded = getattr(instance, '_loaded_values', {})
+    for field in fields:
+        if field not in instance.__dict__:
+            continue  # Deferred and never touched
+        if field not in loaded or loaded[field] != instance.__dict__[field]:
+            return True
+    return False
+
+
+def enqueue_after_commit(task, object_id):
+    """
+    Queue ``task`` for ``object_id`` once the transaction commits. What it refreshes
+    can be rebuilt, so a broker failure is logged instead of failing the request
+    """
+    def enqueue():
+        try:
+            task.delay(object_id)
+        except Exception as e:
+            logger.error(f"Could not queue {task.name} for {object_id}: {str(e)}")
+    transaction.on_commit(enqueue)
@@ -0,0 +1,232 @@
+"""
+SQL query budget and N+1 detection.
+
+QueryBudgetMiddleware counts the queries and DB time of each (sampled) request,
+groups the statements by shape (the SQL with its parameters and IN/VALUES lists
+collapsed) to spot N+1 patterns, and keeps per-endpoint histograms. When a view
+goes over its declared budget it logs an error, or raises QueryBudgetExceeded if
+QUERY_BUDGET['RAISE'] is set (tests, development).
+
+Budgets are declared on the view:
+
+    class JobViewSet(viewsets.ModelViewSet):
+        query_budget = {'default': 10, 'list': 15}
+
+An int applies to every action; a dict maps action names (or 'default') to
+budgets. Function views can set ``view.query_budget`` the same way. Views
+without one use QUERY_BUDGET['DEFAULT_BUDGET'].
+
+joby_api.testing.assert_max_queries uses the same recorder for tests.
+"""
+import logging
+import random
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'ENABLED': True,
+    # Fraction of requests measured; lower it in production
+    'SAMPLE_RATE': 1.0,
+    'DEFAULT_BUDGET': 20,
+    # The same statement shape this many times in one request is reported as N+1
+    'REPEAT_THRESHOLD': 5,
+    'RAISE': False,
+    # Add X-Query-Count / X-Query-Time-Ms to the response
+    'HEADERS': False,
+    # Log the histograms every this many measured requests (0 to disable)
+    'LOG_HISTOGRAMS_EVERY': 1000,
+}
+
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200)
+DB_TIME_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000)
+
+_PLACEHOLDER_LIST = re.compile(r'\(\s*%s(?:\s*,\s*%s)*\s*\)')
+_REPEATED_LISTS = re.compile(r'\(\.\.\.\)(?:\s*,\s*\(\.\.\.\))+')
+_WHITESPACE = re.compile(r'\s+')
+_IGNORED_PREFIXES = ('SAVEPOINT', 'RELEASE SAVEPOINT', 'ROLLBACK TO SAVEPOINT')
+
+
+def get_config():
+    config = dict(DEFAULTS)
+    config.update(getattr(settings, 'QUERY_BUDGET', {}))
+    return config
+
+
+def sql_shape(sql):
+    """The statement without its parameters, so the same query with other values matches"""
+    shape = _PLACEHOLDER_LIST.sub('(...)', sql)
+    shape = _REPEATED_LISTS.sub('(...)', shape)
+    return _WHITESPACE.sub(' ', shape).strip()
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+class QueryRecorder:
+    """Context manager recording every query run on all database connections"""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.shapes = Counter()
+        self._stack = None
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            if not sql.lstrip().upper().startswith(_IGNORED_PREFIXES):
+                self.count += 1
+                self.shapes[sql_shape(sql)] += 1
+
+    def __enter__(self):
+        self._stack = ExitStack()
+        for alias in connections:
+            self._stack.enter_context(connections[alias].execute_wrapper(self))
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stack.close()
+
+    @property
+    def duration_ms(self):
+        return self.duration * 1000
+
+    def repeated(self, threshold):
+        """(shape, times) of the statements run at least ``threshold`` times, most repeated first"""
+        return [(shape, times) for shape, times in self.shapes.most_common() if times >= threshold]
+
+    def report(self, threshold, limit=5):
+        lines = [f'{self.count} queries in {self.duration_ms:.1f}ms']
+        for shape, times in self.repeated(threshold)[:limit]:
+            lines.append(f'  {times}x {shape[:300]}')
+        return '\n'.join(lines)
+
+
+def _bucket(value, buckets):
+    for bound in buckets:
+        if value <= bound:
+            return f'<={bound}'
+    return f'>{buckets[-1]}'
+
+
+class EndpointHistograms:
+    """Per-endpoint histograms of query count and DB time, kept per process"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._data = {}
+        self._observed = 0
+
+    def observe(self, endpoint, queries, duration_ms):
+        with self._lock:
+            entry = self._data.setdefault(endpoint, {
+                'requests': 0,
+                'max_queries': 0,
+                'queries': Counter(),
+                'db_time_ms': Counter(),
+            })
+            entry['requests'] += 1
+            entry['max_queries'] = max(entry['max_queries'], queries)
+            entry['queries'][_bucket(queries, QUERY_COUNT_BUCKETS)] += 1
+            entry['db_time_ms'][_bucket(duration_ms, DB_TIME_BUCKETS_MS)] += 1
+            self._observed += 1
+            return self._observed
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                endpoint: {
+                    'requests': entry['requests'],
+                    'max_queries': entry['max_queries'],
+                    'queries': dict(entry['queries']),
+                    'db_time_ms': dict(entry['db_time_ms']),
+                }
+                for endpoint, entry in self._data.items()
+            }
+
+    def reset(self):
+        with self._lock:
+            self._data = {}
+            self._observed = 0
+
+
+histograms = EndpointHistograms()
+
+
+def resolve_query_budget(view_func, method, default):
+    """Budget declared by the view (or its viewset) for the action handling ``method``"""
+    budget = getattr(view_func, 'query_budget', None)
+    view_class = getattr(view_func, 'cls', None) or getattr(view_func, 'view_class', None)
+    if budget is None and view_class is not None:
+        budget = getattr(view_class, 'query_budget', None)
+    if isinstance(budget, dict):
+        action = (getattr(view_func, 'actions', None) or {}).get(method.lower())
+        budget = budget.get(action, budget.get('default'))
+    return default if budget is None else budget
+
+
+def _endpoint(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        # Unresolved paths (404s) share one entry so they can't grow the histograms
+        return f'{request.method} <unresolved>'
+    route = match.route.lstrip('^').rstrip('$')
+    return f'{request.method} /{route}'
+
+
+class QueryBudgetMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        config = get_config()
+        if not config['ENABLED'] or random.random() >= config['SAMPLE_RATE']:
+            return self.get_response(request)
+
+        request._query_budget = config['DEFAULT_BUDGET']
+        with QueryRecorder() as recorder:
+            response = self.get_response(request)
+
+        self._check(request, recorder, config)
+        if config['HEADERS']:
+            response['X-Query-Count'] = str(recorder.count)
+            response['X-Query-Time-Ms'] = f'{recorder.duration_ms:.1f}'
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if hasattr(request, '_query_budget'):
+            request._query_budget = resolve_query_budget(view_func, request.method, request._query_budget)
+
+    def _check(self, request, recorder, config):
+        endpoint = _endpoint(request)
+        observed = histograms.observe(endpoint, recorder.count, recorder.duration_ms)
+        if config['LOG_HISTOGRAMS_EVERY'] and observed % config['LOG_HISTOGRAMS_EVERY'] == 0:
+            logger.info(f"Query histograms: {histograms.snapshot()}")
+
+        repeated = recorder.repeated(config['REPEAT_THRESHOLD'])
+        if repeated:
+            logger.warning(
+                f"Possible N+1 in {endpoint}: {repeated[0][1]} runs of {repeated[0][0][:300]}"
+            )
+
+        budget = request._query_budget
+        if recorder.count > budget:
+            message = (
+                f"{endpoint} ran over its query budget ({budget}): "
+                f"{recorder.report(config['REPEAT_THRESHOLD'])}"
+            )
+            if config['RAISE']:
+                raise QueryBudgetExceeded(message)
+            logger.error(message)
@@ -0,0 +1,12 @@
+"""
+Shared Redis connection for in-app counters
+"""
+from functools import lru_cache
+from django.conf import settings
+
+
+@lru_cache(maxsize=None)
+def get_redis():
+    """Return a process-wide Redis client for settings.REDIS_URL"""
+    import redis
+    return redis.Redis.from_url(settings.REDIS_URL, decode_responses=True)
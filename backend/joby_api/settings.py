@@ -27,6 +27,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     
     # Third party apps
     'rest_framework',
@@ -46,6 +47,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'joby_api.middleware.QueryBudgetMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -184,14 +186,46 @@ GEMINI_MODEL = config('GEMINI_MODEL', default='gemini-pro')
 FIREBASE_CREDENTIALS_PATH = config('FIREBASE_CREDENTIALS_PATH', default='')
 FIREBASE_PROJECT_ID = config('FIREBASE_PROJECT_ID', default='')
 
+# Redis (Celery broker, cache and in-app counters)
+REDIS_URL = config('REDIS_URL', default='redis://localhost:6379/0')
+
+# Shared by every web and Celery process, so invalidating a key (e.g. the application
+# statistics in apps/applications/statistics.py) drops it for all of them
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': config('CACHE_REDIS_URL', default=REDIS_URL),
+        'KEY_PREFIX': 'joby',
+    }
+}
+
 # Celery Settings
-CELERY_BROKER_URL = config('REDIS_URL', default='redis://localhost:6379/0')
-CELERY_RESULT_BACKEND = config('REDIS_URL', default='redis://localhost:6379/0')
+CELERY_BROKER_URL = REDIS_URL
+CELERY_RESULT_BACKEND = REDIS_URL
 CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = TIME_ZONE
 
+# Job view counter: 'redis' shares the buffer across web and Celery processes (the periodic
+# flush can only see that one); 'local' buffers in-process and is meant for tests/single process
+JOB_VIEW_COUNTER_BACKEND = config('JOB_VIEW_COUNTER_BACKEND', default='redis')
+JOB_VIEW_FLUSH_INTERVAL_SECONDS = config('JOB_VIEW_FLUSH_INTERVAL_SECONDS', default=60, cast=int)
+
+# Points leaderboard: 'redis' keeps a sorted set shared by every worker; 'local' a per-process
+# sorted list that other processes don't see updated, meant for tests/single process
+LEADERBOARD_BACKEND = config('LEADERBOARD_BACKEND', default='redis')
+
+# Query budget / N+1 detection (joby_api.middleware.QueryBudgetMiddleware).
+# In production measure a sample of requests and log; in development every request
+QUERY_BUDGET = {
+    'ENABLED': config('QUERY_BUDGET_ENABLED', default=True, cast=bool),
+    'SAMPLE_RATE': config('QUERY_BUDGET_SAMPLE_RATE', default=1.0 if DEBUG else 0.01, cast=float),
+    'DEFAULT_BUDGET': config('QUERY_BUDGET_DEFAULT', default=20, cast=int),
+    'RAISE': config('QUERY_BUDGET_RAISE', default=False, cast=bool),
+    'HEADERS': DEBUG,
+}
+
 # AWS S3 Settings (optional)
 USE_S3 = config('USE_S3', default=False, cast=bool)
 if USE_S3:
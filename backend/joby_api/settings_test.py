@@ -0,0 +1,28 @@
+"""
+Settings for the test suite (pytest picks them up from pytest.ini).
+
+Same as settings.py but with in-process backends instead of Redis and Celery
+tasks run inline, so the tests only need PostgreSQL.
+"""
+from .settings import *  # noqa
+
+DEBUG = False
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+CELERY_BROKER_URL = 'memory://'
+CELERY_RESULT_BACKEND = 'cache+memory://'
+CELERY_TASK_ALWAYS_EAGER = True
+CELERY_TASK_EAGER_PROPAGATES = True
+
+JOB_VIEW_COUNTER_BACKEND = 'local'
+LEADERBOARD_BACKEND = 'local'
+
+PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+
+# Every request made by the tests is measured and fails when its view goes over budget
+QUERY_BUDGET = {**QUERY_BUDGET, 'SAMPLE_RATE': 1.0, 'RAISE': True, 'HEADERS': True}  # noqa: F405
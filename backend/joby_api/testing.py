@@ -0,0 +1,51 @@
+"""
+Test helpers for query budgets.
+
+    from joby_api.testing import assert_max_queries
+
+    with assert_max_queries(5):
+        client.get('/api/jobs/')
+
+The failure message lists the statements that ran most often, which is usually
+the N+1 to fix. Set QUERY_BUDGET = {'RAISE': True} in the test settings to make
+every request through QueryBudgetMiddleware fail when its view goes over the
+budget it declares.
+"""
+from contextlib import contextmanager
+
+from .middleware import QueryRecorder, get_config, resolve_query_budget
+
+
+@contextmanager
+def assert_max_queries(budget, repeat_threshold=None):
+    """Fail if the block runs more than ``budget`` queries"""
+    threshold = repeat_threshold or get_config()['REPEAT_THRESHOLD']
+    with QueryRecorder() as recorder:
+        yield recorder
+    if recorder.count > budget:
+        raise AssertionError(f"Expected at most {budget} queries, got {recorder.report(threshold)}")
+
+
+@contextmanager
+def assert_no_repeated_queries(threshold=None):
+    """Fail if any statement shape runs ``threshold`` times or more (an N+1)"""
+    threshold = threshold or get_config()['REPEAT_THRESHOLD']
+    with QueryRecorder() as recorder:
+        yield recorder
+    if recorder.repeated(threshold):
+        raise AssertionError(f"Repeated queries: {recorder.report(threshold)}")
+
+
+def assert_view_within_budget(client, method, path, **kwargs):
+    """Make a request and check it against the budget declared by the view that served it"""
+    with QueryRecorder() as recorder:
+        response = getattr(client, method.lower())(path, **kwargs)
+
+    match = response.resolver_match
+    budget = resolve_query_budget(match.func, method, get_config()['DEFAULT_BUDGET'])
+    if recorder.count > budget:
+        raise AssertionError(
+            f"{method.upper()} {path} ran over its query budget ({budget}): "
+            f"{recorder.report(get_config()['REPEAT_THRESHOLD'])}"
+        )
+    return response
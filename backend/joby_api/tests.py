@@ -0,0 +1,117 @@
+"""
+Tests for the query budget middleware and test helpers
+"""
+from django.contrib.auth import get_user_model
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+
+from joby_api.middleware import (
+    QueryBudgetExceeded, QueryBudgetMiddleware, histograms, resolve_query_budget, sql_shape
+)
+from joby_api.testing import assert_max_queries, assert_no_repeated_queries
+
+User = get_user_model()
+
+BUDGET_SETTINGS = {
+    'ENABLED': True,
+    'SAMPLE_RATE': 1.0,
+    'DEFAULT_BUDGET': 20,
+    'REPEAT_THRESHOLD': 3,
+    'RAISE': True,
+    'HEADERS': True,
+    'LOG_HISTOGRAMS_EVERY': 0,
+}
+
+
+def users_one_by_one(request):
+    """N+1 on purpose: the same query four times"""
+    for _ in range(4):
+        User.objects.filter(pk=0).exists()
+    return HttpResponse('ok')
+
+
+users_one_by_one.query_budget = 2
+
+
+class SqlShapeTests(SimpleTestCase):
+
+    def test_collapses_parameters_and_lists(self):
+        self.assertEqual(
+            sql_shape('SELECT * FROM t WHERE id IN (%s, %s,%s)'),
+            sql_shape('SELECT *  FROM t WHERE id IN (%s)')
+        )
+        self.assertEqual(
+            sql_shape('INSERT INTO t (a, b) VALUES (%s, %s), (%s, %s)'),
+            'INSERT INTO t (a, b) VALUES (...)'
+        )
+
+
+class ResolveQueryBudgetTests(SimpleTestCase):
+
+    def view(self, budget, actions=None):
+        class View:
+            query_budget = budget
+
+        def view_func(request):
+            return None
+        view_func.cls = View
+        view_func.actions = actions or {}
+        return view_func
+
+    def test_int_dict_and_default(self):
+        self.assertEqual(resolve_query_budget(self.view(7), 'GET', 20), 7)
+        by_action = {'default': 5, 'create': 15}
+        self.assertEqual(resolve_query_budget(self.view(by_action, {'post': 'create'}), 'POST', 20), 15)
+        self.assertEqual(resolve_query_budget(self.view(by_action, {'get': 'list'}), 'GET', 20), 5)
+        self.assertEqual(resolve_query_budget(self.view(None), 'GET', 20), 20)
+
+
+@override_settings(QUERY_BUDGET=BUDGET_SETTINGS)
+class QueryBudgetMiddlewareTests(TestCase):
+
+    def setUp(self):
+        histograms.reset()
+        self.addCleanup(histograms.reset)
+
+    def run_view(self, view):
+        def get_response(request):
+            middleware.process_view(request, view, (), {})
+            return view(request)
+
+        middleware = QueryBudgetMiddleware(get_response)
+        return middleware(RequestFactory().get('/users/'))
+
+    def test_raises_over_the_view_budget_and_reports_the_repeated_query(self):
+        with self.assertLogs('joby_api.middleware', 'WARNING') as logs:
+            with self.assertRaisesMessage(QueryBudgetExceeded, 'ran over its query budget (2): 4 queries'):
+                self.run_view(users_one_by_one)
+        self.assertIn('Possible N+1', logs.output[0])
+
+    @override_settings(QUERY_BUDGET={**BUDGET_SETTINGS, 'RAISE': False})
+    def test_logs_instead_of_raising_and_adds_headers(self):
+        with self.assertLogs('joby_api.middleware', 'ERROR'):
+            response = self.run_view(users_one_by_one)
+
+        self.assertEqual(response['X-Query-Count'], '4')
+        endpoint = histograms.snapshot()['GET <unresolved>']
+        self.assertEqual((endpoint['requests'], endpoint['max_queries']), (1, 4))
+
+
+class QueryAssertionTests(TestCase):
+
+    def test_assert_max_queries(self):
+        with assert_max_queries(1):
+            User.objects.exists()
+        with self.assertRaisesMessage(AssertionError, 'Expected at most 1 queries, got 2 queries'):
+            with assert_max_queries(1):
+                User.objects.exists()
+                User.objects.count()
+
+    def test_assert_no_repeated_queries(self):
+        with assert_no_repeated_queries(threshold=3):
+            for _ in range(2):
+                User.objects.filter(pk=0).exists()
+        with self.assertRaisesMessage(AssertionError, 'Repeated queries'):
+            with assert_no_repeated_queries(threshold=3):
+                for _ in range(3):
+                    User.objects.filter(pk=0).exists()
@@ -10,6 +10,7 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'joby_api.settings')
 django.setup()
 
 from apps.streaks.models import Challenge, UserChallenge
+from apps.users.points import award_points
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
@@ -239,8 +240,12 @@ def complete_some_challenges_for_test_user():
                 )
                 
                 # Award points to user
-                user.points += challenge.points_reward
-                user.save()
+                award_points(
+                    user=user,
+                    transaction_type='challenge_complete',
+                    points=challenge.points_reward,
+                    description=f'Reto completado: {challenge.title}'
+                )
                 
                 print(f"✓ Reto completado para test user: {challenge.icon} {challenge.title} (+{challenge.points_reward} pts)")
                 completed_count += 1
@@ -9,7 +9,7 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'joby_api.settings')
 django.setup()
 
 from apps.users.models_referral import Reward, ReferralCode
-from apps.users.views_referral import award_points
+from apps.users.points import award_points
 from django.contrib.auth import get_user_model
 
 User = get_user_model()